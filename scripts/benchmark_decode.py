@@ -0,0 +1,110 @@
+"""
+Micro-benchmark of WebSocket frame decoding (frames/sec).
+
+Compares the plain decode path (stdlib json, every frame decoded) with the
+fast path (repeated frames skipped, orjson when installed) on recorded
+traffic.
+
+Usage:
+    python scripts/benchmark_decode.py [--frames FILE] [--uid SSD-7] [--repeat 3]
+    python scripts/benchmark_decode.py --record FILE --count 200
+
+FILE holds one raw frame per line. Without --frames, traffic is replayed
+from scripts/scraped_data.csv: every row becomes one frame of the
+multi-site array, with the other sites following the same readings at
+different offsets.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "functions"))
+
+from websocket_listener.websocket_handler import JSON_BACKEND, WebSocketListener
+
+CSV_PATH = os.path.join(os.path.dirname(__file__), "scraped_data.csv")
+WS_URL = "wss://badi-public.crowdmonitor.ch:9591/api"
+SITES = 24
+
+
+def frames_from_csv(path=CSV_PATH, sites=SITES):
+    """Rebuild multi-site frames from the recorded SSD-7 readings."""
+    with open(path, newline="") as f:
+        readings = [int(row["occupancy"]) for row in csv.DictReader(f)]
+
+    frames = []
+    for i in range(len(readings)):
+        array = [
+            {
+                "uid": f"SSD-{site}",
+                "name": f"Site {site}",
+                "currentfill": str(readings[max(0, i - 97 * (site - 7) ** 2)]),
+                "capacity": 800,
+                "isopen": 1,
+            }
+            for site in range(1, sites + 1)
+        ]
+        frames.append(json.dumps(array))
+    return frames
+
+
+async def record(path, count, url=WS_URL):
+    """Record raw frames from the live API, one per line."""
+    import websockets
+
+    async with websockets.connect(url) as websocket:
+        await websocket.send("all")
+        with open(path, "w") as f:
+            for _ in range(count):
+                f.write((await websocket.recv()).replace("\n", " ") + "\n")
+
+
+def measure(frames, uid, repeat, fast):
+    """Return the best frames/sec of a decode configuration."""
+    best = 0.0
+    for _ in range(repeat):
+        listener = WebSocketListener(WS_URL, uid, skip_repeated_frames=fast)
+        if not fast:
+            listener.decode = json.loads
+        started = time.perf_counter()
+        for frame in frames:
+            listener._parse_message(frame)
+        best = max(best, len(frames) / (time.perf_counter() - started))
+    return best, listener.repeated_frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frames", help="File with one recorded frame per line")
+    parser.add_argument("--uid", default="SSD-7", help="UID(s) to extract, or 'all'")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per configuration")
+    parser.add_argument("--record", help="Record live frames to this file and exit")
+    parser.add_argument("--count", type=int, default=200, help="Frames to record")
+    args = parser.parse_args()
+
+    if args.record:
+        asyncio.run(record(args.record, args.count))
+        return
+
+    if args.frames:
+        with open(args.frames) as f:
+            frames = [line.rstrip("\n") for line in f if line.strip()]
+    else:
+        frames = frames_from_csv()
+
+    baseline, _ = measure(frames, args.uid, args.repeat, fast=False)
+    fast, repeated = measure(frames, args.uid, args.repeat, fast=True)
+
+    print(f"frames:      {len(frames)} ({repeated / len(frames):.0%} repeats)")
+    print(f"before:      {baseline:,.0f} frames/s (json, every frame decoded)")
+    print(f"after:       {fast:,.0f} frames/s ({JSON_BACKEND}, repeats skipped)")
+    print(f"speedup:     {fast / baseline:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
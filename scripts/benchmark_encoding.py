@@ -0,0 +1,111 @@
+"""
+Size and parse-time comparison of plain vs change-only window updates.
+
+Replays scripts/scraped_data.csv as 5-minute windows, stores each window
+in the plain and in the delta-rle encoding, and reports total bytes, the
+JSON parse time and the time to expand every window back into plain
+updates.
+
+Usage:
+    python scripts/benchmark_encoding.py [--csv FILE] [--repeat 3]
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from azure_storage.update_encoding import decode_window, encode_window
+
+CSV_PATH = os.path.join(os.path.dirname(__file__), "scraped_data.csv")
+WINDOW_SECONDS = 300
+
+
+def windows_from_csv(path):
+    """Group the recorded readings into 5-minute window documents."""
+    # The CSV keeps whole seconds; live receive times carry microseconds
+    jitter = random.Random(0)
+    windows = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            moment = datetime.fromisoformat(row["timestamp"]) + timedelta(
+                microseconds=jitter.randrange(1_000_000)
+            )
+            epoch = int(moment.timestamp())
+            start = datetime.fromtimestamp(epoch - epoch % WINDOW_SECONDS)
+            windows.setdefault(start, []).append(
+                {"occupancy": int(row["occupancy"]), "timestamp": moment.isoformat()}
+            )
+
+    return [
+        {
+            "window": {
+                "start": start.isoformat(),
+                "end": (start + timedelta(seconds=WINDOW_SECONDS)).isoformat(),
+                "duration_seconds": WINDOW_SECONDS,
+            },
+            "target_uid": "SSD-7",
+            "updates": updates,
+        }
+        for start, updates in sorted(windows.items())
+    ]
+
+
+def best_time(function, repeat):
+    """Return the fastest of several runs of a function."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--csv", default=CSV_PATH, help="Recorded readings")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing runs")
+    args = parser.parse_args()
+
+    windows = windows_from_csv(args.csv)
+    plain = [json.dumps(window) for window in windows]
+    encoded = [
+        json.dumps(encode_window(window), separators=(",", ":")) for window in windows
+    ]
+
+    for window, blob in zip(windows, encoded):
+        assert decode_window(json.loads(blob)) == window, "round trip failed"
+
+    plain_bytes = sum(map(len, plain))
+    encoded_bytes = sum(map(len, encoded))
+    plain_time = best_time(lambda: [json.loads(blob) for blob in plain], args.repeat)
+    columns_time = best_time(
+        lambda: [json.loads(blob) for blob in encoded], args.repeat
+    )
+    encoded_time = best_time(
+        lambda: [decode_window(json.loads(blob)) for blob in encoded], args.repeat
+    )
+    updates = sum(len(window["updates"]) for window in windows)
+
+    print(f"windows:     {len(windows)} ({updates} updates, lossless round trip)")
+    print(f"plain:       {plain_bytes:,} bytes, parsed in {plain_time * 1000:.1f} ms")
+    print(
+        f"delta-rle:   {encoded_bytes:,} bytes, parsed in {columns_time * 1000:.1f} ms "
+        f"({encoded_time * 1000:.1f} ms expanded to plain updates)"
+    )
+    print(
+        f"savings:     {1 - encoded_bytes / plain_bytes:.0%} bytes, JSON parse "
+        f"{plain_time / columns_time:.1f}x faster, expanded "
+        f"{plain_time / encoded_time:.2f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
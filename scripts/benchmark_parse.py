@@ -0,0 +1,101 @@
+"""
+Micro-benchmark of the "Anzahl Gäste" extraction (pages/sec).
+
+Compares the targeted pattern (Parser.parse_fast) with full-DOM parsing
+(Parser.parse_dom, BeautifulSoup) on saved pages and checks that both
+find the same value.
+
+Usage:
+    python scripts/benchmark_parse.py [--pages FILE ...] [--repeat 3]
+    python scripts/benchmark_parse.py --record FILE [--url URL]
+
+Without --pages, a synthetic page of the size of the stadt-zuerich.ch
+pool page (navigation, teasers and footer around the occupancy field) is
+used.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from scraper.fetcher import Fetcher  # noqa: E402
+from scraper.parser import Parser  # noqa: E402
+
+PAGE_URL = (
+    "https://www.stadt-zuerich.ch/de/stadtleben/sport-und-erholung/"
+    "sport-und-badeanlagen/hallenbaeder/oerlikon.html"
+)
+
+
+def synthetic_page(occupancy=137, sections=400):
+    """Return a ~130 KB page with the field after most of the markup."""
+    navigation = "".join(
+        f'<li class="nav-item"><a href="/de/{i}.html" data-id="{i}">'
+        f"Rubrik {i} &ndash; Sport und Erholung</a></li>"
+        for i in range(sections)
+    )
+    teasers = "".join(
+        f'<div class="teaser"><h3>Hallenbad {i}</h3><p>Öffnungszeiten '
+        f"{6 + i % 4}:00&nbsp;&ndash;&nbsp;22:00, Eintritt CHF {i % 9}.-</p></div>"
+        for i in range(sections)
+    )
+    field = (
+        '<div class="occupancy"><dl><dt>Anzahl G&auml;ste:</dt>\n'
+        f"<dd><strong>{occupancy}</strong></dd></dl></div>"
+    )
+    return (
+        "<!DOCTYPE html><html><head><title>Hallenbad Oerlikon</title></head>"
+        f"<body><nav><ul>{navigation}</ul></nav><main>{teasers}{field}</main>"
+        f"<footer>{navigation}</footer></body></html>"
+    )
+
+
+def measure(pages, function, repeat):
+    """Return the best pages/sec of an extraction function and its results."""
+    best = 0.0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        values = [function(page) for page in pages]
+        best = max(best, len(pages) / (time.perf_counter() - started))
+    return best, values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", nargs="+", help="Saved HTML pages")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per method")
+    parser.add_argument("--record", help="Save the live page to this file and exit")
+    parser.add_argument("--url", default=PAGE_URL, help="Page to record")
+    args = parser.parse_args()
+
+    if args.record:
+        with open(args.record, "w", encoding="utf-8") as f:
+            f.write(Fetcher().fetch_data(args.url))
+        return
+
+    if args.pages:
+        pages = []
+        for path in args.pages:
+            with open(path, encoding="utf-8") as f:
+                pages.append(f.read())
+    else:
+        pages = [synthetic_page(occupancy) for occupancy in range(100, 120)]
+
+    fast, fast_values = measure(pages, Parser.parse_fast, args.repeat)
+    dom, dom_values = measure(pages, Parser.parse_dom, args.repeat)
+    size = sum(map(len, pages)) / len(pages)
+
+    print(f"pages:       {len(pages)} (avg {size / 1024:,.0f} KiB)")
+    print(f"full DOM:    {dom:,.1f} pages/s (BeautifulSoup)")
+    print(f"pattern:     {fast:,.1f} pages/s (precompiled regex)")
+    print(f"speedup:     {fast / dom:.0f}x")
+    if fast_values != dom_values:
+        mismatches = sum(a != b for a, b in zip(fast_values, dom_values))
+        print(f"WARNING:     {mismatches} pages differ between the methods")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+Benchmark suite for the hot paths of the pipeline.
+
+Measures, on recorded data and fully offline:
+    parse.*    WebSocketListener._parse_message on replayed frames
+    stats.*    Window statistics (StreamingStats, bucketing) on 80-point
+               (one window) and 100k-point series
+    storage.*  AzureBlobStorageAdapter save/list/retrieve on the memory and
+               local-disk backends
+    route.*    Flask route latency through the test client
+
+Every benchmark records per-call latency percentiles (microseconds) and
+the results are written as JSON, so two commits can be compared:
+
+Usage:
+    python scripts/benchmark_suite.py [--output FILE] [--only PREFIX] [--quick]
+    python scripts/benchmark_suite.py --compare BASELINE.json [--output FILE]
+
+With --compare, the p50 of every benchmark present in both runs is printed
+next to the baseline, and benchmarks that got slower than --threshold
+(default 10%) are flagged.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(SCRIPTS_DIR, "..", "src")
+sys.path.insert(0, os.path.join(SRC_DIR, "functions"))
+sys.path.insert(0, SRC_DIR)
+
+# Everything runs against the offline backends; set before the app is imported
+os.environ["STORAGE_BACKEND"] = "memory"
+os.environ.setdefault("BLOB_CONTAINER_NAME", "benchmark")
+# The pipeline logs every write; keep the report readable
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from benchmark_decode import WS_URL, frames_from_csv  # noqa: E402
+from benchmark_encoding import windows_from_csv, CSV_PATH  # noqa: E402
+from azure_storage.blob_adapter import AzureBlobStorageAdapter  # noqa: E402
+from azure_storage.blob_index import occupancy_series  # noqa: E402
+from azure_storage.clients import reset_clients  # noqa: E402
+from services.occupancy import bucket_updates  # noqa: E402
+from utils.statistics import StreamingStats  # noqa: E402
+from websocket_listener.websocket_handler import WebSocketListener  # noqa: E402
+
+DEFAULT_OUTPUT = "benchmark-results.json"
+
+
+def timed(function, runs, warmup=3):
+    """
+    Time repeated calls of a function.
+
+    Args:
+        function: Callable without arguments
+        runs: Number of timed calls
+        warmup: Untimed calls made first
+
+    Returns:
+        Dictionary with runs, mean, p50, p99 and min in microseconds
+    """
+    for _ in range(warmup):
+        function()
+
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter_ns()
+        function()
+        samples.append((time.perf_counter_ns() - started) / 1000)
+
+    samples.sort()
+    return {
+        "runs": runs,
+        "mean_us": round(sum(samples) / runs, 3),
+        "p50_us": round(samples[(runs - 1) // 2], 3),
+        "p99_us": round(samples[min(runs - 1, int(runs * 0.99))], 3),
+        "min_us": round(samples[0], 3),
+    }
+
+
+def bench_parse(scale):
+    """_parse_message per frame, plain decode vs the fast path."""
+    frames = frames_from_csv()[: int(2000 * scale)]
+    results = {}
+    for name, fast in (("plain", False), ("fast", True)):
+        listener = WebSocketListener(WS_URL, "SSD-7", skip_repeated_frames=fast)
+        if not fast:
+            listener.decode = json.loads
+        frame_iter = iter(frames * 100)
+        results[f"parse.{name}"] = timed(
+            lambda: listener._parse_message(next(frame_iter)), len(frames)
+        )
+    return results
+
+
+def _series(points):
+    """Synthetic 5-second occupancy series of a given length."""
+    start = datetime(2024, 6, 1, 8, 0, 0)
+    return [
+        {
+            "occupancy": 300 + (i * 7919) % 400,
+            "timestamp": (start + timedelta(seconds=5 * i)).isoformat(),
+        }
+        for i in range(points)
+    ]
+
+
+def bench_stats(scale):
+    """Window statistics on one window and on a multi-day series."""
+    results = {}
+    for points, runs in ((80, int(2000 * scale)), (100_000, max(3, int(10 * scale)))):
+        updates = _series(points)
+        readings = [
+            (u["occupancy"], datetime.fromisoformat(u["timestamp"])) for u in updates
+        ]
+        end = readings[-1][1] + timedelta(seconds=5)
+
+        def window_stats():
+            stats = StreamingStats()
+            for value, moment in readings:
+                stats.add(value, moment)
+            stats.close(end)
+            return stats.summary()
+
+        results[f"stats.window.{points}"] = timed(window_stats, runs)
+        results[f"stats.buckets_5m.{points}"] = timed(
+            lambda: bucket_updates(updates, 300), runs
+        )
+    return results
+
+
+def bench_storage(scale):
+    """Adapter save/list/retrieve on the offline backends."""
+    windows = windows_from_csv(CSV_PATH)[: int(200 * scale)]
+    results = {}
+    root = tempfile.mkdtemp(prefix="benchmark-storage-")
+    try:
+        for backend in ("memory", "local"):
+            os.environ["STORAGE_BACKEND"] = backend
+            os.environ["STORAGE_LOCAL_PATH"] = root
+            reset_clients()
+            adapter = AzureBlobStorageAdapter()
+
+            names = []
+            for window in windows:
+                start = datetime.fromisoformat(window["window"]["start"])
+                names.append(
+                    f"occupancy_data/{start.strftime('%Y%m%d_%H%M%S')}_SSD-7.json"
+                )
+
+            name_iter = iter(names * 2)
+            window_iter = iter(windows * 2)
+            results[f"storage.{backend}.save"] = timed(
+                lambda: adapter.save_data(next(window_iter), next(name_iter)),
+                len(windows),
+            )
+            results[f"storage.{backend}.list"] = timed(
+                lambda: adapter.list_blobs("occupancy_data/"),
+                max(5, int(50 * scale)),
+            )
+            name_iter = iter(names * 2)
+            results[f"storage.{backend}.retrieve"] = timed(
+                lambda: adapter.retrieve_entry(next(name_iter)), len(names)
+            )
+    finally:
+        os.environ["STORAGE_BACKEND"] = "memory"
+        reset_clients()
+        shutil.rmtree(root, ignore_errors=True)
+    return results
+
+
+def bench_routes(scale):
+    """p50/p99 of the API routes on a seeded in-memory container."""
+    reset_clients()
+    import api.app  # noqa: F401  (creates the repository on the memory backend)
+
+    api_module = sys.modules["api.app"]
+    repository = api_module.repository
+    windows = windows_from_csv(CSV_PATH)[: int(300 * scale)]
+    for window in windows:
+        start = datetime.fromisoformat(window["window"]["start"])
+        name = f"occupancy_data/{start.strftime('%Y%m%d_%H%M%S')}_SSD-7.json"
+        repository.adapter.save_data(window, name)
+        repository.adapter.rollups.merge_window(occupancy_series("SSD-7"), name, window)
+    repository.save_data({"occupancy": 120, "url": WS_URL})
+
+    first = windows[0]["window"]["start"]
+    last = windows[-1]["window"]["end"]
+    routes = {
+        "health": "/health",
+        "latest": "/api/data/latest",
+        "blobs": "/api/data/blobs?limit=100&order=desc",
+        "occupancy": f"/api/occupancy?uid=SSD-7&from={first}&to={last}&resolution=5m",
+        "trends": f"/api/trends?uid=SSD-7&kind=hourly&from={first}&to={last}",
+    }
+
+    client = api_module.app.test_client()
+    results = {}
+    for name, url in routes.items():
+
+        def request():
+            response = client.get(url)
+            assert response.status_code == 200, (url, response.status_code)
+
+        results[f"route.{name}"] = timed(request, max(20, int(200 * scale)))
+    return results
+
+
+BENCHMARKS = {
+    "parse": bench_parse,
+    "stats": bench_stats,
+    "storage": bench_storage,
+    "route": bench_routes,
+}
+
+
+def _git_commit():
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "--short", "HEAD"],
+                cwd=SCRIPTS_DIR,
+                stderr=subprocess.DEVNULL,
+            )
+            .decode()
+            .strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Print the p50 change of every benchmark present in both runs."""
+    regressions = 0
+    for name in sorted(results):
+        if name not in baseline:
+            continue
+        before = baseline[name]["p50_us"]
+        after = results[name]["p50_us"]
+        change = (after - before) / before if before else 0.0
+        flag = "  REGRESSION" if change > threshold else ""
+        regressions += bool(flag)
+        print(f"{name:32} {before:12.1f} -> {after:12.1f} us  {change:+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Result file")
+    parser.add_argument("--only", help="Run only benchmarks starting with this")
+    parser.add_argument("--quick", action="store_true", help="Fewer runs (smoke)")
+    parser.add_argument("--compare", help="Baseline result file to compare with")
+    parser.add_argument(
+        "--threshold", type=float, default=0.10, help="p50 slowdown to flag"
+    )
+    args = parser.parse_args()
+
+    scale = 0.1 if args.quick else 1.0
+    results = {}
+    for group, benchmark in BENCHMARKS.items():
+        if args.only and not group.startswith(args.only.split(".")[0]):
+            continue
+        for name, result in benchmark(scale).items():
+            if args.only and not name.startswith(args.only):
+                continue
+            results[name] = result
+            print(
+                f"{name:32} p50 {result['p50_us']:12.1f} us   "
+                f"p99 {result['p99_us']:12.1f} us"
+            )
+
+    report = {
+        "commit": _git_commit(),
+        "created": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": args.quick,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        print()
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
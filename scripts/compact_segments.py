@@ -0,0 +1,40 @@
+"""
+Compact finished days of occupancy windows into daily segments.
+
+Usage:
+    python scripts/compact_segments.py SSD-7 2024-01-15 [2024-01-16 ...] [--delete-sources]
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from azure_storage.blob_adapter import AzureBlobStorageAdapter
+from azure_storage.compaction import SegmentCompactor
+from utils.logger import Logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("uid", help="CrowdMonitor location UID, e.g. SSD-7")
+    parser.add_argument("days", nargs="+", help="Days to compact (YYYY-MM-DD)")
+    parser.add_argument(
+        "--delete-sources",
+        action="store_true",
+        help="Delete the window blobs once their segment is verified",
+    )
+    args = parser.parse_args()
+
+    logger = Logger()
+    adapter = AzureBlobStorageAdapter(os.getenv("AZURE_STORAGE_CONNECTION_STRING"))
+    compactor = SegmentCompactor(adapter)
+
+    for day in args.days:
+        segment_name = compactor.compact_day(args.uid, day, args.delete_sources)
+        logger.log_info(f"{day}: {segment_name or 'no windows'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Import legacy timestamp,occupancy CSV readings as occupancy windows.
+
+Usage:
+    python scripts/import_csv.py [CSV] [--uid SSD-7] [--chunk-rows N]
+                                 [--workers N] [--timezone UTC] [--restart]
+
+The readings are bucketed into the 5-minute windows the WebSocket listener
+writes, uploaded concurrently and registered in the blob index and the
+rollups. Progress is checkpointed next to the CSV (<CSV>.<UID>.checkpoint.json),
+so an interrupted import continues where it stopped and running it again
+only adds new rows. Existing window blobs are never overwritten.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPTS_DIR, "..", "src"))
+
+from azure_storage.blob_adapter import AzureBlobStorageAdapter  # noqa: E402
+from services.csv_import import DEFAULT_CHUNK_ROWS, CsvImporter  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "csv",
+        nargs="?",
+        default=os.path.join(SCRIPTS_DIR, "scraped_data.csv"),
+        help="CSV with timestamp and occupancy columns",
+    )
+    parser.add_argument(
+        "--uid", default=os.getenv("TARGET_UID", "SSD-7"), help="Location UID"
+    )
+    parser.add_argument(
+        "--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="Rows per chunk"
+    )
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent uploads")
+    parser.add_argument(
+        "--timezone", default="UTC", help="Time zone of naive CSV timestamps"
+    )
+    parser.add_argument("--checkpoint", help="Progress file (default: next to CSV)")
+    parser.add_argument(
+        "--restart", action="store_true", help="Ignore an existing checkpoint"
+    )
+    args = parser.parse_args()
+
+    checkpoint = args.checkpoint or f"{args.csv}.{args.uid}.checkpoint.json"
+    if args.restart and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+    adapter = AzureBlobStorageAdapter(os.getenv("AZURE_STORAGE_CONNECTION_STRING"))
+    importer = CsvImporter(adapter, args.uid, max_workers=args.workers)
+    counters = importer.run(
+        args.csv, checkpoint, chunk_rows=args.chunk_rows, source_tz=args.timezone
+    )
+    print(json.dumps(counters, indent=2))
+
+
+if __name__ == "__main__":
+    main()
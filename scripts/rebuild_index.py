@@ -0,0 +1,30 @@
+"""
+Regenerate the blob index (latest pointers and daily manifests).
+
+Lists the whole container once and rewrites every index document, e.g. after
+blobs were uploaded or deleted outside of the adapter and the listener.
+
+Usage:
+    python scripts/rebuild_index.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from azure_storage.blob_adapter import AzureBlobStorageAdapter
+from utils.logger import Logger
+
+
+def main():
+    logger = Logger()
+    adapter = AzureBlobStorageAdapter(os.getenv("AZURE_STORAGE_CONNECTION_STRING"))
+
+    counts = adapter.rebuild_index()
+    for series, count in sorted(counts.items()):
+        logger.log_info(f"{series}: {count} blobs indexed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Rebuild the hourly, daily and weekday-hour rollups of occupancy series.
+
+Usage:
+    python scripts/rebuild_rollups.py SSD-7 [SSD-8 ...]
+"""
+
+import argparse
+import os
+import sys
+from datetime import date, datetime, time, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from azure_storage.blob_index import occupancy_series
+from azure_storage.repository import AzureBlobRepository
+from utils.logger import Logger
+
+
+def iter_windows(repository, uid, first_day, last_day):
+    """Yield (blob name, window) pairs of a UID one day at a time."""
+    day = first_day
+    while day <= last_day:
+        yield from repository.get_named_occupancy_windows(
+            uid,
+            datetime.combine(day, time.min),
+            datetime.combine(day, time.max),
+        )
+        day += timedelta(days=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("uids", nargs="+", help="CrowdMonitor location UIDs")
+    args = parser.parse_args()
+
+    logger = Logger()
+    repository = AzureBlobRepository(os.getenv("AZURE_STORAGE_CONNECTION_STRING"))
+    adapter = repository.adapter
+
+    for uid in args.uids:
+        series = occupancy_series(uid)
+        pointer = adapter.index.get_latest(series)
+        if pointer is None:
+            logger.log_info(f"{uid}: no indexed windows (run rebuild_index.py first)")
+            continue
+
+        first_day = date.fromisoformat(pointer["first_date"])
+        last_day = datetime.fromisoformat(pointer["timestamp"]).date()
+        count = adapter.rollups.rebuild(
+            series, iter_windows(repository, uid, first_day, last_day)
+        )
+        logger.log_info(f"{uid}: {count} windows")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,136 @@
 """Flask API backend for serving scraped data."""
 
+import json
 import os
-from flask import Flask, jsonify, send_from_directory
+import time
+from datetime import date, datetime, timezone
+from flask import Flask, Response, g, jsonify, request, send_from_directory
 from flask_cors import CORS
+from azure.core.exceptions import ResourceNotFoundError
+from azure_storage.blob_index import occupancy_series
 from azure_storage.repository import AzureBlobRepository
-from utils.logger import Logger
+from utils.logger import Logger, dropped_records
+from utils.metrics import REGISTRY, counter, gauge, histogram
+from api.responses import compress_response, conditional_json
+from services.downsample import SeriesDownsampler
+from services.forecast import OccupancyForecaster
+from services.live_feed import LiveFeed
+from services.occupancy import bucket_updates, parse_resolution
 
 app = Flask(__name__, static_folder="static", static_url_path="/static")
 CORS(app)
+app.after_request(compress_response)
 
-logger = Logger()
+logger = Logger("api")
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+MAX_OCCUPANCY_RANGE_DAYS = 31
+MAX_OCCUPANCY_BUCKETS = 10000
+MAX_TREND_RANGE_DAYS = 366
+MAX_BATCH_SIZE = 500
+DEFAULT_SERIES_POINTS = 1000
+MAX_SERIES_POINTS = 5000
 
 # Initialize repository
 connection_string = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
 repository = AzureBlobRepository(connection_string)
 
+# One poller behind /api/stream, shared by every connected dashboard
+live_uid = os.getenv("TARGET_UID", "SSD-7")
+live_feed = LiveFeed(
+    {
+        "reading": repository.get_latest_entry,
+        "window": lambda: repository.get_latest_entry(occupancy_series(live_uid)),
+    },
+    poll_seconds=float(os.getenv("STREAM_POLL_SECONDS", 15)),
+    logger=logger,
+)
+
+# Forecast models are fitted once per UID and refitted when new windows arrive
+forecaster = OccupancyForecaster(repository.adapter, repository.executor)
+# Downsampled chart series, cached per (uid, range, points, method)
+downsampler = SeriesDownsampler(repository)
+
+REQUEST_SECONDS = histogram(
+    "http_request_seconds", "Latency of API requests", ["route", "method", "status"]
+)
+for _name, _key, _help in (
+    ("cache_hits_total", "hits", "Blob cache hits"),
+    ("cache_misses_total", "misses", "Blob cache misses"),
+    ("cache_evictions_total", "evictions", "Blob cache evictions"),
+):
+    counter(_name, _help).set_function(lambda key=_key: repository.cache_stats()[key])
+gauge("cache_bytes", "Bytes held by the blob cache").set_function(
+    lambda: repository.cache_stats()["bytes"]
+)
+gauge("cache_entries", "Blobs held by the blob cache").set_function(
+    lambda: repository.cache_stats()["entries"]
+)
+for _name, _key, _help in (
+    ("series_cache_hits_total", "hits", "Downsampled series cache hits"),
+    ("series_cache_misses_total", "misses", "Downsampled series cache misses"),
+):
+    counter(_name, _help).set_function(lambda key=_key: downsampler.cache_stats()[key])
+gauge("stream_clients", "Connected live stream clients").set_function(
+    lambda: live_feed.subscriber_count
+)
+counter(
+    "log_records_dropped_total", "Log records dropped on a full queue"
+).set_function(dropped_records)
+
+
+@app.before_request
+def start_timer():
+    """Remember when the request started."""
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_latency(response):
+    """Observe the latency of every request, labelled by its route pattern."""
+    started = g.pop("request_started", None)
+    if started is not None:
+        # The URL rule, not the path, keeps the number of label values bounded
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        REQUEST_SECONDS.labels(
+            route=route, method=request.method, status=response.status_code
+        ).observe(time.perf_counter() - started)
+    return response
+
 
 @app.route("/health", methods=["GET"])
 def health_check():
     """Health check endpoint."""
-    return jsonify({"status": "healthy", "message": "API is running"}), 200
+    return (
+        jsonify(
+            {
+                "status": "healthy",
+                "message": "API is running",
+                "cache": repository.cache_stats(),
+                "stream_clients": live_feed.subscriber_count,
+            }
+        ),
+        200,
+    )
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Expose the metrics registry in the Prometheus text format."""
+    return Response(
+        REGISTRY.render_prometheus(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
 
 
 @app.route("/api/data/latest", methods=["GET"])
 def get_latest_data():
     """Get the latest scraped data."""
     try:
-        data = repository.get_latest_data()
+        entry = repository.get_latest_entry()
 
-        if data is None:
+        if entry is None:
             return (
                 jsonify(
                     {
@@ -39,33 +141,324 @@ def get_latest_data():
                 404,
             )
 
-        return jsonify(data), 200
+        return conditional_json(entry.data, entry.etag, entry.last_modified)
 
     except Exception as e:
         logger.log_error(f"Error retrieving latest data: {e}")
         return jsonify({"error": "Internal server error", "message": str(e)}), 500
 
 
+@app.route("/api/stream", methods=["GET"])
+def stream_live_data():
+    """
+    Push new readings and windows as Server-Sent Events.
+
+    Events:
+        reading: Latest scraped data (same body as /api/data/latest)
+        window: Latest occupancy window of TARGET_UID
+
+    Every client is served from the shared live feed; the newest event of
+    each kind is sent right after connecting.
+    """
+    heartbeat = float(os.getenv("STREAM_HEARTBEAT_SECONDS", 25))
+    return Response(
+        live_feed.stream(heartbeat),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.route("/api/data/blobs", methods=["GET"])
 def list_blobs():
-    """List all available data blobs."""
+    """
+    List available data blobs, one page at a time.
+
+    Query parameters:
+        limit: Page size (default 100, max 1000)
+        order: "asc" (oldest first, default) or "desc" (newest first)
+        from, to: Optional inclusive ISO 8601 time window (UTC)
+        continuation_token: Token returned with the previous page
+    """
     try:
-        blobs = repository.get_all_blobs()
+        limit = min(int(request.args.get("limit", DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        if limit < 1:
+            raise ValueError("limit must be positive")
+
+        blobs = repository.get_all_blobs(
+            limit=limit,
+            order=request.args.get("order", "asc"),
+            start=_parse_time_arg("from"),
+            end=_parse_time_arg("to"),
+            continuation_token=request.args.get("continuation_token"),
+        )
+
+        return conditional_json(
+            {
+                "count": len(blobs),
+                "blobs": blobs,
+                "continuation_token": blobs.continuation_token,
+            }
+        )
 
-        return jsonify({"count": len(blobs), "blobs": blobs}), 200
+    except ValueError as e:
+        return jsonify({"error": "Bad request", "message": str(e)}), 400
 
     except Exception as e:
         logger.log_error(f"Error listing blobs: {e}")
         return jsonify({"error": "Internal server error", "message": str(e)}), 500
 
 
-@app.route("/api/data/<blob_name>", methods=["GET"])
+@app.route("/api/occupancy", methods=["GET"])
+def get_occupancy():
+    """
+    Aggregate occupancy of a location over a time range.
+
+    Query parameters:
+        uid: CrowdMonitor location UID (default: TARGET_UID or 'SSD-7')
+        from, to: Inclusive ISO 8601 time range (UTC), at most 31 days
+        resolution: Bucket width, e.g. '300', '5m', '1h', '1d' (default '1h')
+    """
+    try:
+        uid = request.args.get("uid", os.getenv("TARGET_UID", "SSD-7"))
+        start = _parse_time_arg("from")
+        end = _parse_time_arg("to")
+        resolution = parse_resolution(request.args.get("resolution", "1h"))
+
+        if start is None or end is None:
+            raise ValueError("'from' and 'to' are required")
+        if end < start:
+            raise ValueError("'to' must not be before 'from'")
+        span = (end - start).total_seconds()
+        if span > MAX_OCCUPANCY_RANGE_DAYS * 86400:
+            raise ValueError(f"Range must not exceed {MAX_OCCUPANCY_RANGE_DAYS} days")
+        if span / resolution > MAX_OCCUPANCY_BUCKETS:
+            raise ValueError("Resolution too fine for the requested range")
+
+        updates = repository.get_occupancy_updates(uid, start, end)
+
+        return conditional_json(
+            {
+                "uid": uid,
+                "from": start.isoformat(),
+                "to": end.isoformat(),
+                "resolution_seconds": resolution,
+                "count": len(updates),
+                "buckets": bucket_updates(updates, resolution),
+            }
+        )
+
+    except ValueError as e:
+        return jsonify({"error": "Bad request", "message": str(e)}), 400
+
+    except Exception as e:
+        logger.log_error(f"Error aggregating occupancy: {e}")
+        return jsonify({"error": "Internal server error", "message": str(e)}), 500
+
+
+@app.route("/api/series", methods=["GET"])
+def get_series():
+    """
+    Occupancy readings of a time range, downsampled for a chart.
+
+    Query parameters:
+        uid: CrowdMonitor location UID (default: TARGET_UID or 'SSD-7')
+        from, to: Inclusive ISO 8601 time range (UTC), at most 31 days
+        points: Target number of readings, 3 to 5000 (default 1000)
+        method: 'minmax' (lowest and highest reading per pixel bucket) or
+                'lttb' (Largest-Triangle-Three-Buckets), default 'minmax'
+    """
+    try:
+        uid = request.args.get("uid", os.getenv("TARGET_UID", "SSD-7"))
+        start = _parse_time_arg("from")
+        end = _parse_time_arg("to")
+        points = int(request.args.get("points", DEFAULT_SERIES_POINTS))
+        method = request.args.get("method", "minmax")
+
+        if start is None or end is None:
+            raise ValueError("'from' and 'to' are required")
+        if end < start:
+            raise ValueError("'to' must not be before 'from'")
+        if (end - start).total_seconds() > MAX_OCCUPANCY_RANGE_DAYS * 86400:
+            raise ValueError(f"Range must not exceed {MAX_OCCUPANCY_RANGE_DAYS} days")
+        if not 3 <= points <= MAX_SERIES_POINTS:
+            raise ValueError(f"'points' must be between 3 and {MAX_SERIES_POINTS}")
+
+        return conditional_json(downsampler.get_series(uid, start, end, points, method))
+
+    except ValueError as e:
+        return jsonify({"error": "Bad request", "message": str(e)}), 400
+
+    except Exception as e:
+        logger.log_error(f"Error downsampling occupancy: {e}")
+        return jsonify({"error": "Internal server error", "message": str(e)}), 500
+
+
+@app.route("/api/trends", methods=["GET"])
+def get_trends():
+    """
+    Serve occupancy trends from the incrementally maintained rollups.
+
+    Query parameters:
+        uid: CrowdMonitor location UID (default: TARGET_UID or 'SSD-7')
+        kind: 'hourly', 'daily' or 'weekday_hour' (default 'hourly')
+        from, to: Inclusive ISO 8601 time range (UTC), at most 366 days;
+                  required unless kind is 'weekday_hour'
+    """
+    try:
+        uid = request.args.get("uid", os.getenv("TARGET_UID", "SSD-7"))
+        kind = request.args.get("kind", "hourly")
+        start = _parse_time_arg("from")
+        end = _parse_time_arg("to")
+
+        if start is not None and end is not None:
+            if end < start:
+                raise ValueError("'to' must not be before 'from'")
+            if (end - start).total_seconds() > MAX_TREND_RANGE_DAYS * 86400:
+                raise ValueError(f"Range must not exceed {MAX_TREND_RANGE_DAYS} days")
+
+        trends = repository.get_trends(uid, kind, start, end)
+
+        return conditional_json(
+            {
+                "uid": uid,
+                "kind": kind,
+                "from": start.isoformat() if start else None,
+                "to": end.isoformat() if end else None,
+                "buckets": trends,
+            }
+        )
+
+    except ValueError as e:
+        return jsonify({"error": "Bad request", "message": str(e)}), 400
+
+    except Exception as e:
+        logger.log_error(f"Error retrieving trends: {e}")
+        return jsonify({"error": "Internal server error", "message": str(e)}), 500
+
+
+@app.route("/api/forecast", methods=["GET"])
+def get_forecast():
+    """
+    Forecast the occupancy of a day per hour from the in-memory model.
+
+    Query parameters:
+        uid: CrowdMonitor location UID (default: TARGET_UID or 'SSD-7')
+        date: Local day (YYYY-MM-DD, default: today in ROLLUP_TIMEZONE)
+
+    Each hour holds the recency-weighted mean and quantiles (p10 to p90) of
+    the occupancy seen at that weekday and hour.
+    """
+    try:
+        uid = request.args.get("uid", os.getenv("TARGET_UID", "SSD-7"))
+        tz = repository.adapter.rollups.tz
+        day_arg = request.args.get("date")
+        if day_arg:
+            try:
+                day = date.fromisoformat(day_arg)
+            except ValueError:
+                raise ValueError("Invalid 'date', expected YYYY-MM-DD")
+        else:
+            day = datetime.now(tz).date()
+
+        forecast = forecaster.forecast(uid, day)
+        if forecast is None:
+            return (
+                jsonify(
+                    {
+                        "error": "No data available",
+                        "message": f"No occupancy windows found for {uid}",
+                    }
+                ),
+                404,
+            )
+
+        return conditional_json(
+            {"uid": uid, "date": day.isoformat(), "timezone": str(tz), **forecast}
+        )
+
+    except ValueError as e:
+        return jsonify({"error": "Bad request", "message": str(e)}), 400
+
+    except Exception as e:
+        logger.log_error(f"Error computing forecast: {e}")
+        return jsonify({"error": "Internal server error", "message": str(e)}), 500
+
+
+@app.route("/api/data/batch", methods=["POST"])
+def get_data_batch():
+    """
+    Retrieve many blobs in one request.
+
+    Request body: {"blobs": ["<blob name>", ...]} (at most 500 names)
+
+    The blobs are downloaded concurrently through the repository's bounded
+    worker pool and streamed back in request order as
+    {"count": n, "items": [...], "errors": k}. Each item is either
+    {"blob_name", "data"} or {"blob_name", "error", "status"}, so a missing
+    blob does not fail the whole batch.
+    """
+    body = request.get_json(silent=True)
+    blob_names = body.get("blobs") if isinstance(body, dict) else None
+    if not isinstance(blob_names, list) or not all(
+        isinstance(name, str) and name for name in blob_names
+    ):
+        return (
+            jsonify(
+                {
+                    "error": "Bad request",
+                    "message": 'Expected a JSON body {"blobs": [<blob name>, ...]}',
+                }
+            ),
+            400,
+        )
+    if len(blob_names) > MAX_BATCH_SIZE:
+        return (
+            jsonify(
+                {
+                    "error": "Bad request",
+                    "message": f"At most {MAX_BATCH_SIZE} blobs per batch",
+                }
+            ),
+            400,
+        )
+
+    def generate():
+        errors = 0
+        yield f'{{"count":{len(blob_names)},"items":['
+        for position, (name, entry, error) in enumerate(
+            repository.iter_blob_entries(blob_names)
+        ):
+            if error is None:
+                item = {"blob_name": name, "data": entry.data}
+            else:
+                errors += 1
+                not_found = isinstance(error, ResourceNotFoundError)
+                item = {
+                    "blob_name": name,
+                    "error": "Blob not found" if not_found else str(error),
+                    "status": 404 if not_found else 500,
+                }
+            separator = "," if position else ""
+            yield separator + json.dumps(
+                item, ensure_ascii=False, separators=(",", ":")
+            )
+        yield f'],"errors":{errors}}}'
+
+    return Response(generate(), mimetype="application/json")
+
+
+@app.route("/api/data/<path:blob_name>", methods=["GET"])
 def get_data_by_blob(blob_name):
-    """Get data by specific blob name."""
+    """
+    Get data by specific blob name.
+
+    Blob names may contain '/' (e.g. occupancy_data/20240601_100500_SSD-7.json).
+    Index and rollup documents are not data blobs and answer 404.
+    """
     try:
-        data = repository.get_data_by_blob_name(blob_name)
+        entry = repository.get_entry_by_blob_name(blob_name)
 
-        if data is None:
+        if entry is None:
             return (
                 jsonify(
                     {
@@ -76,13 +469,42 @@ def get_data_by_blob(blob_name):
                 404,
             )
 
-        return jsonify(data), 200
+        return conditional_json(
+            entry.data, entry.etag, entry.last_modified, immutable=True
+        )
 
     except Exception as e:
         logger.log_error(f"Error retrieving blob {blob_name}: {e}")
         return jsonify({"error": "Internal server error", "message": str(e)}), 500
 
 
+def _parse_time_arg(name):
+    """
+    Parse an optional ISO 8601 query parameter into a naive UTC datetime.
+
+    Args:
+        name: Query parameter name
+
+    Returns:
+        datetime, or None if the parameter is absent
+
+    Raises:
+        ValueError: If the value is not a valid ISO 8601 timestamp
+    """
+    value = request.args.get(name)
+    if not value:
+        return None
+
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"Invalid '{name}' timestamp: {value}")
+
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
 @app.route("/", methods=["GET"])
 def serve_frontend():
     """Serve the main frontend page."""
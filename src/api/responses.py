@@ -0,0 +1,106 @@
+"""HTTP caching and compression helpers for the Flask API."""
+
+import gzip
+import hashlib
+import json
+from typing import Optional
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Blobs are never rewritten once their window is closed
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Clients may keep the body but must revalidate it before every use
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/javascript",
+    "text/css",
+    "text/html",
+    "text/javascript",
+    "text/plain",
+}
+MIN_COMPRESS_BYTES = 512
+
+
+def conditional_json(
+    data,
+    etag: Optional[str] = None,
+    last_modified=None,
+    immutable: bool = False,
+    status: int = 200,
+) -> Response:
+    """
+    Build a JSON response that honours If-None-Match / If-Modified-Since.
+
+    The ETag is derived from the blob version when one is given and from the
+    body otherwise. It is sent as a weak validator because the body may be
+    re-encoded (compressed) on the way out.
+
+    Args:
+        data: JSON-serializable payload
+        etag: ETag of the underlying blob version, if known
+        last_modified: Last-modified datetime of the underlying blob, if known
+        immutable: Whether the payload can never change for this URL
+        status: HTTP status code
+
+    Returns:
+        Flask response (304 without body when the client copy is current)
+    """
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    response = Response(body, status=status, mimetype="application/json")
+
+    if etag:
+        response.set_etag(etag.strip('"'), weak=True)
+    else:
+        response.set_etag(hashlib.sha1(body.encode("utf-8")).hexdigest(), weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+
+    response.headers["Cache-Control"] = (
+        IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL
+    )
+    return response.make_conditional(request)
+
+
+def compress_response(response: Response) -> Response:
+    """
+    Compress a response body with brotli or gzip if the client accepts it.
+
+    Meant to be registered as an after_request hook. Streamed and
+    passthrough responses (e.g. static files) are left untouched.
+
+    Args:
+        response: Outgoing Flask response
+
+    Returns:
+        The (possibly compressed) response
+    """
+    response.vary.add("Accept-Encoding")
+
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+
+    body = response.get_data()
+    if len(body) < MIN_COMPRESS_BYTES:
+        return response
+
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        response.set_data(brotli.compress(body, quality=5))
+        response.headers["Content-Encoding"] = "br"
+    elif accepted["gzip"]:
+        response.set_data(gzip.compress(body, compresslevel=6))
+        response.headers["Content-Encoding"] = "gzip"
+
+    return response
@@ -3,7 +3,8 @@
  */
 
 const API_BASE_URL = '/api';
-let autoRefreshInterval = null;
+const HISTORY_LENGTH = 10;
+let liveStream = null;
 let autoRefreshEnabled = false;
 
 /**
@@ -27,7 +28,6 @@ document.addEventListener('DOMContentLoaded', () => {
 async function loadLatestData() {
     const statusBox = document.getElementById('currentStatus');
     const lastUpdatedDiv = document.getElementById('lastUpdated');
-    const latestDataDiv = document.getElementById('latestData');
     
     try {
         statusBox.classList.remove('loading', 'available', 'busy', 'full');
@@ -43,7 +43,7 @@ async function loadLatestData() {
         const data = await response.json();
         
         // Display the data
-        displayLatestData(data, statusBox, lastUpdatedDiv, latestDataDiv);
+        displayLatestData(data);
         
     } catch (error) {
         console.error('Error loading latest data:', error);
@@ -56,7 +56,11 @@ async function loadLatestData() {
 /**
  * Display the latest data in the UI
  */
-function displayLatestData(data, statusBox, lastUpdatedDiv, latestDataDiv) {
+function displayLatestData(data) {
+    const statusBox = document.getElementById('currentStatus');
+    const lastUpdatedDiv = document.getElementById('lastUpdated');
+    const latestDataDiv = document.getElementById('latestData');
+    
     // Update timestamp
     const timestamp = data.timestamp || new Date().toISOString();
     const date = new Date(timestamp);
@@ -82,7 +86,7 @@ function displayLatestData(data, statusBox, lastUpdatedDiv, latestDataDiv) {
     }
     
     // Update status display
-    statusBox.classList.remove('loading');
+    statusBox.classList.remove('loading', 'available', 'busy', 'full', 'unknown');
     statusBox.classList.add(status);
     statusBox.innerHTML = `<p>${statusText}</p>`;
     
@@ -97,7 +101,8 @@ async function loadHistory() {
     const historyDiv = document.getElementById('historyList');
     
     try {
-        const response = await fetch(`${API_BASE_URL}/data/blobs`);
+        // Only the newest page is fetched; the server walks the index backwards
+        const response = await fetch(`${API_BASE_URL}/data/blobs?limit=${HISTORY_LENGTH}&order=desc`);
         
         if (!response.ok) {
             throw new Error(`HTTP error! status: ${response.status}`);
@@ -111,17 +116,8 @@ async function loadHistory() {
             return;
         }
         
-        // Display blobs in reverse order (most recent first)
-        const historyHTML = blobs
-            .reverse()
-            .slice(0, 10) // Show last 10
-            .map(blob => `
-                <div class="history-item" onclick="loadHistoryItem('${blob}')">
-                    <div class="history-item-timestamp">${formatBlobName(blob)}</div>
-                    <div class="history-item-info">Click to view details</div>
-                </div>
-            `)
-            .join('');
+        // Blobs arrive most recent first
+        const historyHTML = blobs.map(renderHistoryItem).join('');
         
         historyDiv.innerHTML = historyHTML;
         
@@ -131,6 +127,46 @@ async function loadHistory() {
     }
 }
 
+/**
+ * Render one entry of the history list
+ */
+function renderHistoryItem(blob) {
+    return `
+        <div class="history-item" data-blob="${blob}" onclick="loadHistoryItem('${blob}')">
+            <div class="history-item-timestamp">${formatBlobName(blob)}</div>
+            <div class="history-item-info">Click to view details</div>
+        </div>
+    `;
+}
+
+/**
+ * Prepend a newly written blob to a history list
+ */
+function prependHistoryItem(blob, listId = 'historyList') {
+    const historyDiv = document.getElementById(listId);
+    if (historyDiv.querySelector(`[data-blob="${blob}"]`)) {
+        return;
+    }
+    if (!historyDiv.querySelector('.history-item')) {
+        historyDiv.innerHTML = '';
+    }
+    
+    historyDiv.insertAdjacentHTML('afterbegin', renderHistoryItem(blob));
+    const items = historyDiv.querySelectorAll('.history-item');
+    for (let i = HISTORY_LENGTH; i < items.length; i++) {
+        items[i].remove();
+    }
+}
+
+/**
+ * Blob name of an occupancy window (see WindowWriter)
+ */
+function windowBlobName(window_) {
+    // "2024-06-01T10:05:00" -> occupancy_data/20240601_100500_SSD-7.json
+    const start = window_.window.start.slice(0, 19).replace(/[-:]/g, '').replace('T', '_');
+    return `occupancy_data/${start}_${window_.target_uid}.json`;
+}
+
 /**
  * Load and display specific history item
  */
@@ -177,6 +213,10 @@ async function refreshData() {
 
 /**
  * Toggle auto-refresh
+ *
+ * Updates are pushed by the server over /api/stream (Server-Sent Events);
+ * all open dashboards share one server-side poller instead of each one
+ * polling storage on its own.
  */
 function toggleAutoRefresh() {
     const btn = document.getElementById('autoRefreshBtn');
@@ -184,22 +224,51 @@ function toggleAutoRefresh() {
     if (autoRefreshEnabled) {
         // Disable auto-refresh
         autoRefreshEnabled = false;
-        clearInterval(autoRefreshInterval);
+        closeLiveStream();
         btn.classList.remove('active');
-        btn.textContent = '⏱ Auto Refresh (60s)';
+        btn.textContent = '⏱ Auto Refresh (live)';
     } else {
         // Enable auto-refresh
         autoRefreshEnabled = true;
         btn.classList.add('active');
-        btn.textContent = '⏸ Auto Refresh (60s) - Active';
-        
-        // Refresh immediately
-        refreshData();
+        btn.textContent = '⏸ Auto Refresh (live) - Active';
         
-        // Set up interval
-        autoRefreshInterval = setInterval(() => {
-            refreshData();
-        }, 60000); // 60 seconds
+        // The stream sends the current state right after connecting
+        openLiveStream();
+    }
+}
+
+/**
+ * Subscribe to pushed readings and windows
+ */
+function openLiveStream() {
+    liveStream = new EventSource(`${API_BASE_URL}/stream`);
+    
+    liveStream.addEventListener('reading', event => {
+        displayLatestData(JSON.parse(event.data));
+    });
+    
+    liveStream.addEventListener('window', event => {
+        const window_ = JSON.parse(event.data);
+        if (window_.window && window_.target_uid) {
+            // Windows are kept apart from the scraped-data history
+            prependHistoryItem(windowBlobName(window_), 'windowList');
+        }
+    });
+    
+    // EventSource reconnects on its own; just report the gap
+    liveStream.onerror = () => {
+        console.warn('Live stream interrupted, reconnecting...');
+    };
+}
+
+/**
+ * Close the live stream
+ */
+function closeLiveStream() {
+    if (liveStream) {
+        liveStream.close();
+        liveStream = null;
     }
 }
 
@@ -213,12 +282,16 @@ function formatBlobName(blobName) {
         const date = `${match[1]} ${match[2]}:${match[3]}:${match[4]}`;
         return date;
     }
+    // Format: occupancy_data/20240115_143000_SSD-7.json (window start, UTC)
+    const windowMatch = blobName.match(/occupancy_data\/(\d{4})(\d{2})(\d{2})_(\d{2})(\d{2})(\d{2})_(.+)\.json$/);
+    if (windowMatch) {
+        const [, year, month, day, hour, minute, second, uid] = windowMatch;
+        return `${year}-${month}-${day} ${hour}:${minute}:${second} (${uid})`;
+    }
     return blobName;
 }
 
 // Clean up on page unload
 window.addEventListener('beforeunload', () => {
-    if (autoRefreshInterval) {
-        clearInterval(autoRefreshInterval);
-    }
+    closeLiveStream();
 });
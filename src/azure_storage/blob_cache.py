@@ -0,0 +1,195 @@
+"""In-process cache for decoded blob data."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+class CacheEntry:
+    """Decoded blob data together with the blob version it came from."""
+
+    def __init__(self, data, etag: Optional[str], last_modified, size: int):
+        """
+        Initialize a cache entry.
+
+        Args:
+            data: Decoded JSON data of the blob
+            etag: ETag of the blob version
+            last_modified: Last-modified datetime of the blob version
+            size: Size of the blob in bytes (used for the byte budget)
+        """
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+        self.size = size
+
+
+class BlobCache:
+    """
+    Byte-budget LRU for immutable blobs plus short-TTL "latest" entries.
+
+    Per-window blobs never change after they are written, so they are kept
+    until the byte budget forces an eviction. "Latest" entries only remember
+    which blob was the newest and the ETag of the pointer that said so; once
+    their TTL runs out the caller revalidates them with a conditional read.
+    """
+
+    def __init__(
+        self, max_bytes: int = 64 * 1024 * 1024, latest_ttl_seconds: float = 30
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_bytes: Total blob bytes to keep in the LRU
+            latest_ttl_seconds: Time a latest entry is served without revalidation
+        """
+        self.max_bytes = max_bytes
+        self.latest_ttl_seconds = latest_ttl_seconds
+        self._entries = OrderedDict()
+        self._latest = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "latest_hits": 0,
+            "latest_revalidations": 0,
+            "latest_misses": 0,
+        }
+
+    def get(self, blob_name: str) -> Optional[CacheEntry]:
+        """
+        Look up an immutable blob.
+
+        Args:
+            blob_name: Name of the blob
+
+        Returns:
+            Cached entry, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(blob_name)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+
+            self._entries.move_to_end(blob_name)
+            self._counters["hits"] += 1
+            return entry
+
+    def put(self, blob_name: str, entry: CacheEntry) -> None:
+        """
+        Store an immutable blob, evicting least recently used blobs as needed.
+
+        Blobs larger than the whole budget are not cached.
+
+        Args:
+            blob_name: Name of the blob
+            entry: Entry to store
+        """
+        if entry.size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(blob_name, None)
+            if previous is not None:
+                self._bytes -= previous.size
+
+            self._entries[blob_name] = entry
+            self._bytes += entry.size
+
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self._counters["evictions"] += 1
+
+    def get_latest(
+        self, series: str
+    ) -> Tuple[Optional[CacheEntry], Optional[str], bool]:
+        """
+        Look up the latest entry of a series.
+
+        Args:
+            series: Index series name
+
+        Returns:
+            (entry, pointer_etag, fresh) where fresh tells whether the entry
+            is still within its TTL; entry is None if nothing is cached
+        """
+        with self._lock:
+            cached = self._latest.get(series)
+            if cached is None:
+                self._counters["latest_misses"] += 1
+                return None, None, False
+
+            entry, pointer_etag, expires_at = cached
+            fresh = time.monotonic() < expires_at
+            if fresh:
+                self._counters["latest_hits"] += 1
+            return entry, pointer_etag, fresh
+
+    def put_latest(
+        self, series: str, entry: CacheEntry, pointer_etag: Optional[str]
+    ) -> None:
+        """
+        Store (or renew) the latest entry of a series.
+
+        Args:
+            series: Index series name
+            entry: Entry of the newest blob
+            pointer_etag: ETag of the latest pointer that referenced the blob
+        """
+        with self._lock:
+            self._latest[series] = (
+                entry,
+                pointer_etag,
+                time.monotonic() + self.latest_ttl_seconds,
+            )
+
+    def record_revalidation(self) -> None:
+        """Count a latest entry that was confirmed by a conditional read."""
+        with self._lock:
+            self._counters["latest_revalidations"] += 1
+
+    def invalidate_latest(self, series: Optional[str] = None) -> None:
+        """
+        Drop the latest entry of a series (or of every series).
+
+        Args:
+            series: Index series name, or None for all series
+        """
+        with self._lock:
+            if series is None:
+                self._latest.clear()
+            else:
+                self._latest.pop(series, None)
+
+    def discard(self, blob_name: str) -> None:
+        """
+        Remove a blob from the cache (e.g. after it was deleted).
+
+        Args:
+            blob_name: Name of the blob
+        """
+        with self._lock:
+            entry = self._entries.pop(blob_name, None)
+            if entry is not None:
+                self._bytes -= entry.size
+
+    def stats(self) -> dict:
+        """
+        Snapshot of the cache counters.
+
+        Returns:
+            Dictionary with hit/miss/eviction counters and current usage
+        """
+        with self._lock:
+            return {
+                **self._counters,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
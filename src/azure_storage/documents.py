@@ -0,0 +1,113 @@
+"""Small JSON documents kept next to the data blobs."""
+
+import json
+from typing import Optional, Tuple
+from azure.core import MatchConditions
+from azure.core.exceptions import (
+    ResourceExistsError,
+    ResourceModifiedError,
+    ResourceNotFoundError,
+)
+from azure_storage.clients import BYTES_READ, BYTES_WRITTEN, STORAGE_SECONDS
+from utils.logger import Logger
+
+MAX_UPDATE_ATTEMPTS = 5
+
+
+class JsonDocumentStore:
+    """
+    Base class for JSON documents that several writers update concurrently.
+
+    Updates are optimistic read-modify-write cycles guarded by ETag
+    preconditions, so a writer that loses a race retries on top of the
+    winner's version instead of overwriting it.
+    """
+
+    def __init__(self, container_client):
+        """
+        Initialize the store.
+
+        Args:
+            container_client: ContainerClient of the data container
+        """
+        self.container_client = container_client
+        self.logger = Logger()
+
+    def _read(
+        self, blob_name: str, if_none_match: Optional[str] = None
+    ) -> Tuple[Optional[dict], Optional[str]]:
+        """Download a document, returning (document, etag)."""
+        conditions = {}
+        if if_none_match is not None:
+            conditions = {
+                "etag": if_none_match,
+                "match_condition": MatchConditions.IfModified,
+            }
+
+        try:
+            with STORAGE_SECONDS.labels(operation="read").time():
+                blob_client = self.container_client.get_blob_client(blob_name)
+                downloader = blob_client.download_blob(**conditions)
+                content = downloader.readall()
+            BYTES_READ.inc(len(content))
+            return json.loads(content), downloader.properties.etag
+        except ResourceNotFoundError:
+            return None, None
+
+    def _write(self, blob_name: str, document: dict, **conditions) -> None:
+        """Upload a document."""
+        content = json.dumps(document, separators=(",", ":"))
+        with STORAGE_SECONDS.labels(operation="write").time():
+            self.container_client.get_blob_client(blob_name).upload_blob(
+                content,
+                overwrite=conditions.pop("overwrite", True),
+                **conditions,
+            )
+        BYTES_WRITTEN.inc(len(content.encode("utf-8")))
+
+    def _delete(self, blob_name: str) -> None:
+        """Delete a document if it exists."""
+        try:
+            self.container_client.get_blob_client(blob_name).delete_blob()
+        except ResourceNotFoundError:
+            pass
+
+    def _update(self, blob_name: str, mutate, default: Optional[dict]) -> bool:
+        """
+        Apply an optimistic read-modify-write to a document.
+
+        Args:
+            blob_name: Document to update
+            mutate: Callable returning the new document, or None to skip
+            default: Document to start from if missing (None skips creation)
+
+        Returns:
+            True if the document was written, False if the update was skipped
+        """
+        for _ in range(MAX_UPDATE_ATTEMPTS):
+            document, etag = self._read(blob_name)
+            if document is None:
+                if default is None:
+                    return False
+                document = json.loads(json.dumps(default))
+
+            updated = mutate(document)
+            if updated is None:
+                return False
+
+            try:
+                if etag is None:
+                    self._write(blob_name, updated, overwrite=False)
+                else:
+                    self._write(
+                        blob_name,
+                        updated,
+                        etag=etag,
+                        match_condition=MatchConditions.IfNotModified,
+                    )
+                return True
+            except (ResourceExistsError, ResourceModifiedError):
+                # Another writer updated the document first; retry on top of it
+                continue
+
+        raise RuntimeError(f"Could not update document {blob_name}")
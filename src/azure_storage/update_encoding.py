@@ -0,0 +1,149 @@
+"""
+Change-only encoding of the 'updates' of occupancy window blobs.
+
+Occupancy changes slowly, yet a plain window stores one
+{'occupancy', 'timestamp'} object per frame. The encoded form keeps the
+same information as two compact columns:
+
+    {
+        "encoding": "delta-rle/1",
+        "start": <epoch microseconds of the first update>,
+        "deltas": [<microseconds to the next update>, ...],
+        "runs": [[<occupancy>, <number of consecutive updates>], ...]
+    }
+
+Only updates that round-trip exactly are encoded; anything else is kept
+in the plain list form, which every reader still accepts.
+"""
+
+from datetime import datetime, timedelta
+from typing import List, Union
+
+ENCODING = "delta-rle/1"
+# Size of one update in the plain JSON form, for cache budgeting
+PLAIN_UPDATE_BYTES = 64
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def to_micros(timestamp: str) -> int:
+    """Convert a naive UTC ISO timestamp into epoch microseconds."""
+    delta = datetime.fromisoformat(timestamp) - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def from_micros(micros: int) -> str:
+    """Convert epoch microseconds back into a naive UTC ISO timestamp."""
+    return (_EPOCH + timedelta(microseconds=micros)).isoformat()
+
+
+def encode_updates(updates: List[dict]) -> Union[dict, List[dict]]:
+    """
+    Encode window updates as timestamp deltas and occupancy runs.
+
+    Args:
+        updates: [{'occupancy': int, 'timestamp': str}, ...]
+
+    Returns:
+        Encoded dictionary, or the unchanged list if it is empty or cannot
+        be represented losslessly
+    """
+    if not updates:
+        return updates
+
+    micros = []
+    runs = []
+    for update in updates:
+        value = update.get("occupancy")
+        if len(update) != 2 or type(value) is not int:
+            return updates
+        try:
+            moment = to_micros(update["timestamp"])
+        except (KeyError, TypeError, ValueError):
+            return updates
+        if from_micros(moment) != update["timestamp"]:
+            return updates
+
+        micros.append(moment)
+        if runs and runs[-1][0] == value:
+            runs[-1][1] += 1
+        else:
+            runs.append([value, 1])
+
+    return {
+        "encoding": ENCODING,
+        "start": micros[0],
+        "deltas": [b - a for a, b in zip(micros, micros[1:])],
+        "runs": runs,
+    }
+
+
+def decode_updates(encoded: Union[dict, List[dict]]) -> List[dict]:
+    """
+    Decode updates produced by encode_updates().
+
+    Args:
+        encoded: Encoded dictionary or a plain list of updates
+
+    Returns:
+        Plain list of {'occupancy': int, 'timestamp': str} dicts
+
+    Raises:
+        ValueError: If the encoding is unknown
+    """
+    if isinstance(encoded, list):
+        return encoded
+    if encoded.get("encoding") != ENCODING:
+        raise ValueError(f"Unknown updates encoding: {encoded.get('encoding')}")
+
+    moment = encoded["start"]
+    deltas = iter(encoded["deltas"])
+    updates = []
+    minute = None
+    for value, count in encoded["runs"]:
+        for _ in range(count):
+            if updates:
+                moment += next(deltas)
+            # Same output as from_micros(), formatting the minute only once
+            seconds, micros = divmod(moment, 1_000_000)
+            current, second = divmod(seconds, 60)
+            if current != minute:
+                minute = current
+                prefix = from_micros(minute * 60_000_000)[:17]
+            if micros:
+                timestamp = f"{prefix}{second:02d}.{micros:06d}"
+            else:
+                timestamp = f"{prefix}{second:02d}"
+            updates.append({"occupancy": value, "timestamp": timestamp})
+    return updates
+
+
+def decode_window(document):
+    """
+    Return a window document with plain updates.
+
+    Documents without encoded updates (including non-window blobs) are
+    returned unchanged.
+
+    Args:
+        document: Decoded JSON of a blob
+
+    Returns:
+        Document whose 'updates' is a plain list
+    """
+    if isinstance(document, dict) and isinstance(document.get("updates"), dict):
+        return {**document, "updates": decode_updates(document["updates"])}
+    return document
+
+
+def encode_window(document: dict) -> dict:
+    """
+    Return a window document with encoded updates.
+
+    Args:
+        document: Window document with a plain 'updates' list
+
+    Returns:
+        Copy of the document with encoded updates where possible
+    """
+    return {**document, "updates": encode_updates(document.get("updates", []))}
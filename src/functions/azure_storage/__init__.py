@@ -1,6 +1,8 @@
 """Azure Storage module for BADI Oerlikon scraper."""
 
 from .blob_adapter import AzureBlobStorageAdapter
+from .blob_cache import BlobCache
+from .blob_index import BlobIndex
 from .repository import AzureBlobRepository
 
-__all__ = ['AzureBlobStorageAdapter', 'AzureBlobRepository']
+__all__ = ['AzureBlobStorageAdapter', 'AzureBlobRepository', 'BlobCache', 'BlobIndex']
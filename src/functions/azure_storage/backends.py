@@ -0,0 +1,465 @@
+"""
+Offline storage backends with the ContainerClient surface the repo uses.
+
+Every storage user (adapter, blob index, rollups, compaction, window
+writer) talks to a container client. Besides Azure's own, a process can
+run on one of the backends below, selected with STORAGE_BACKEND (see
+azure_storage.clients), so the API, the listener and the scripts can be
+run and benchmarked without a storage account:
+
+    memory: Blobs in a dictionary, shared by the whole process
+    local:  One file per blob under STORAGE_LOCAL_PATH; writes go to a
+            temporary file that atomically replaces the blob, and ETags are
+            digests of the content
+
+Both implement the conditional requests (ETag / MatchConditions) the
+documents rely on, and raise the same azure.core exceptions as the service.
+"""
+
+import asyncio
+import functools
+import hashlib
+import os
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional, Tuple, Union
+from azure.core import MatchConditions
+from azure.core.exceptions import (
+    ResourceExistsError,
+    ResourceModifiedError,
+    ResourceNotFoundError,
+    ResourceNotModifiedError,
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows: conditional writes are atomic per process only
+    fcntl = None
+
+# Files in the local backend that are not blobs (temporary files, lock)
+_HIDDEN_PREFIX = "."
+_LOCK_NAME = ".lock"
+
+
+class BlobItem:
+    """Name and version of a stored blob (subset of BlobProperties)."""
+
+    __slots__ = ("name", "etag", "last_modified", "size")
+
+    def __init__(self, name: str, etag: str, last_modified: datetime, size: int):
+        self.name = name
+        self.etag = etag
+        self.last_modified = last_modified
+        self.size = size
+
+
+class StorageBackend(ABC):
+    """Blob storage primitives behind BackendContainerClient."""
+
+    @abstractmethod
+    def read(self, name: str) -> Tuple[bytes, BlobItem]:
+        """
+        Read a blob.
+
+        Raises:
+            ResourceNotFoundError: If the blob does not exist
+        """
+
+    @abstractmethod
+    def write(
+        self,
+        name: str,
+        data: bytes,
+        overwrite: bool = True,
+        if_match: Optional[str] = None,
+    ) -> BlobItem:
+        """
+        Write a blob atomically.
+
+        Args:
+            name: Blob name
+            data: New content
+            overwrite: Whether an existing blob may be replaced
+            if_match: Only replace the blob if its ETag is still this one
+
+        Raises:
+            ResourceExistsError: If the blob exists and overwrite is False
+            ResourceModifiedError: If the blob no longer matches if_match
+        """
+
+    @abstractmethod
+    def delete(self, name: str) -> None:
+        """
+        Delete a blob.
+
+        Raises:
+            ResourceNotFoundError: If the blob does not exist
+        """
+
+    @abstractmethod
+    def list(self, prefix: str = "") -> List[BlobItem]:
+        """Return the blobs whose name starts with prefix, sorted by name."""
+
+    @staticmethod
+    def _check_write(
+        name: str, current: Optional[BlobItem], overwrite: bool, if_match
+    ) -> None:
+        """Apply the service's rules for conditional uploads."""
+        if if_match is not None:
+            if current is None or current.etag != if_match:
+                raise ResourceModifiedError(
+                    f"The condition specified was not met: {name}"
+                )
+        elif current is not None and not overwrite:
+            raise ResourceExistsError(f"The specified blob already exists: {name}")
+
+
+class MemoryBackend(StorageBackend):
+    """Blobs held in a dictionary."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._blobs = {}
+        self._version = 0
+
+    def read(self, name: str) -> Tuple[bytes, BlobItem]:
+        try:
+            return self._blobs[name]
+        except KeyError:
+            raise ResourceNotFoundError(f"The specified blob does not exist: {name}")
+
+    def write(self, name, data, overwrite=True, if_match=None) -> BlobItem:
+        with self._lock:
+            current = self._blobs.get(name)
+            self._check_write(name, current and current[1], overwrite, if_match)
+            self._version += 1
+            item = BlobItem(
+                name, f'"{self._version:x}"', datetime.now(timezone.utc), len(data)
+            )
+            self._blobs[name] = (bytes(data), item)
+            return item
+
+    def delete(self, name: str) -> None:
+        with self._lock:
+            if self._blobs.pop(name, None) is None:
+                raise ResourceNotFoundError(
+                    f"The specified blob does not exist: {name}"
+                )
+
+    def list(self, prefix: str = "") -> List[BlobItem]:
+        with self._lock:
+            names = sorted(name for name in self._blobs if name.startswith(prefix))
+            return [self._blobs[name][1] for name in names]
+
+
+class LocalDiskBackend(StorageBackend):
+    """One file per blob below a root directory."""
+
+    def __init__(self, root: str):
+        """
+        Initialize the backend.
+
+        Args:
+            root: Directory holding the blobs (created if missing)
+        """
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, name: str) -> str:
+        """Map a blob name onto a file below the root."""
+        parts = name.split("/")
+        if not name or any(
+            part in ("", ".", "..") or part.startswith(_HIDDEN_PREFIX) for part in parts
+        ):
+            raise ValueError(f"Unsupported blob name for local storage: {name}")
+        return os.path.join(self.root, *parts)
+
+    @staticmethod
+    def _item(name: str, data: bytes, stat: os.stat_result) -> BlobItem:
+        # Inodes are reused after a replace and mtimes may be too coarse to
+        # tell two writes apart, so the version is a digest of the content
+        return BlobItem(
+            name,
+            f'"{hashlib.sha1(data).hexdigest()}"',
+            datetime.fromtimestamp(stat.st_mtime, timezone.utc),
+            len(data),
+        )
+
+    def _load(self, path: str, name: str) -> Tuple[bytes, BlobItem]:
+        """Read a blob file and describe the version read."""
+        with open(path, "rb") as f:
+            data = f.read()
+            return data, self._item(name, data, os.fstat(f.fileno()))
+
+    def _stat(self, name: str) -> Optional[BlobItem]:
+        try:
+            return self._load(self._path(name), name)[1]
+        except FileNotFoundError:
+            return None
+
+    @contextmanager
+    def _exclusive(self):
+        """Serialize conditional writes across threads and processes."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.root, _LOCK_NAME), "a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def read(self, name: str) -> Tuple[bytes, BlobItem]:
+        try:
+            return self._load(self._path(name), name)
+        except FileNotFoundError:
+            raise ResourceNotFoundError(f"The specified blob does not exist: {name}")
+
+    def write(self, name, data, overwrite=True, if_match=None) -> BlobItem:
+        path = self._path(name)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        # Write the new content aside, then swap it in with one rename
+        fd, temp_path = tempfile.mkstemp(prefix=f"{_HIDDEN_PREFIX}tmp-", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            if overwrite and if_match is None:
+                os.replace(temp_path, path)
+            else:
+                with self._exclusive():
+                    self._check_write(name, self._stat(name), overwrite, if_match)
+                    os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return self._item(name, data, os.stat(path))
+
+    def delete(self, name: str) -> None:
+        try:
+            os.remove(self._path(name))
+        except FileNotFoundError:
+            raise ResourceNotFoundError(f"The specified blob does not exist: {name}")
+
+    def list(self, prefix: str = "") -> List[BlobItem]:
+        # Only walk the deepest directory the prefix pins down
+        directory = prefix.rsplit("/", 1)[0] if "/" in prefix else ""
+        start = (
+            os.path.join(self.root, *directory.split("/")) if directory else self.root
+        )
+
+        items = []
+        for current, dirs, files in os.walk(start):
+            dirs[:] = [d for d in dirs if not d.startswith(_HIDDEN_PREFIX)]
+            relative = os.path.relpath(current, self.root)
+            base = "" if relative == "." else relative.replace(os.sep, "/") + "/"
+            for file_name in files:
+                name = base + file_name
+                if file_name.startswith(_HIDDEN_PREFIX) or not name.startswith(prefix):
+                    continue
+                try:
+                    items.append(self._load(os.path.join(current, file_name), name)[1])
+                except FileNotFoundError:
+                    continue  # Deleted while listing
+        items.sort(key=lambda item: item.name)
+        return items
+
+
+class _Downloader:
+    """Result of download_blob() (subset of StorageStreamDownloader)."""
+
+    def __init__(self, content: bytes, properties: BlobItem):
+        self.content = content
+        self.properties = properties
+        self.size = properties.size
+
+    def readall(self) -> bytes:
+        return self.content
+
+
+class _BlobPages:
+    """Page iterator of a listing, tracking the continuation token."""
+
+    def __init__(self, items: List[BlobItem], page_size: int, token: Optional[str]):
+        # The token is the name of the last blob already returned
+        self._items = [item for item in items if token is None or item.name > token]
+        self._page_size = page_size
+        self.continuation_token = token
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> List[BlobItem]:
+        if not self._items:
+            raise StopIteration
+        page = self._items[: self._page_size]
+        self._items = self._items[self._page_size :]
+        self.continuation_token = page[-1].name if self._items else None
+        return page
+
+
+class _BlobListing:
+    """Result of list_blobs(): iterable, or paged through by_page()."""
+
+    def __init__(self, items: List[BlobItem], page_size: Optional[int]):
+        self._items = items
+        self._page_size = page_size or 5000
+
+    def __iter__(self) -> Iterator[BlobItem]:
+        return iter(self._items)
+
+    def by_page(self, continuation_token: Optional[str] = None) -> _BlobPages:
+        return _BlobPages(self._items, self._page_size, continuation_token)
+
+
+class BackendBlobClient:
+    """BlobClient stand-in for one blob of a backend."""
+
+    def __init__(self, backend: StorageBackend, container_name: str, blob_name: str):
+        self.backend = backend
+        self.container_name = container_name
+        self.blob_name = blob_name
+
+    def upload_blob(
+        self,
+        data: Union[bytes, str],
+        overwrite: bool = False,
+        etag: Optional[str] = None,
+        match_condition: Optional[MatchConditions] = None,
+        **kwargs,
+    ) -> dict:
+        if isinstance(data, str):
+            data = data.encode(kwargs.get("encoding", "utf-8"))
+        elif not isinstance(data, (bytes, bytearray, memoryview)):
+            data = data.read()
+        if_match = etag if match_condition == MatchConditions.IfNotModified else None
+        item = self.backend.write(self.blob_name, data, overwrite, if_match)
+        return {"etag": item.etag, "last_modified": item.last_modified}
+
+    def download_blob(
+        self,
+        etag: Optional[str] = None,
+        match_condition: Optional[MatchConditions] = None,
+        **kwargs,
+    ) -> _Downloader:
+        content, item = self.backend.read(self.blob_name)
+        if match_condition == MatchConditions.IfModified and item.etag == etag:
+            raise ResourceNotModifiedError("The condition specified was not met")
+        if match_condition == MatchConditions.IfNotModified and item.etag != etag:
+            raise ResourceModifiedError("The condition specified was not met")
+        return _Downloader(content, item)
+
+    def get_blob_properties(self, **kwargs) -> BlobItem:
+        return self.backend.read(self.blob_name)[1]
+
+    def exists(self, **kwargs) -> bool:
+        try:
+            self.backend.read(self.blob_name)
+            return True
+        except ResourceNotFoundError:
+            return False
+
+    def delete_blob(self, **kwargs) -> None:
+        self.backend.delete(self.blob_name)
+
+
+class BackendContainerClient:
+    """ContainerClient stand-in on top of a StorageBackend."""
+
+    def __init__(self, backend: StorageBackend, container_name: str):
+        self.backend = backend
+        self.container_name = container_name
+
+    def get_blob_client(self, blob) -> BackendBlobClient:
+        name = getattr(blob, "name", blob)
+        return BackendBlobClient(self.backend, self.container_name, name)
+
+    def list_blobs(
+        self,
+        name_starts_with: Optional[str] = None,
+        results_per_page: Optional[int] = None,
+        **kwargs,
+    ) -> _BlobListing:
+        return _BlobListing(self.backend.list(name_starts_with or ""), results_per_page)
+
+    def upload_blob(self, name, data, **kwargs) -> BackendBlobClient:
+        client = self.get_blob_client(name)
+        client.upload_blob(data, **kwargs)
+        return client
+
+    def download_blob(self, blob, **kwargs) -> _Downloader:
+        return self.get_blob_client(blob).download_blob(**kwargs)
+
+    def delete_blob(self, blob, **kwargs) -> None:
+        self.get_blob_client(blob).delete_blob(**kwargs)
+
+    def close(self) -> None:
+        pass
+
+
+class _AsyncBlobClient:
+    """Async BlobClient stand-in; runs the backend calls in a worker thread."""
+
+    def __init__(self, client: BackendBlobClient):
+        self._client = client
+
+    @staticmethod
+    async def _in_thread(function, *args, **kwargs):
+        # Equivalent of asyncio.to_thread, which needs Python 3.9
+        return await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(function, *args, **kwargs)
+        )
+
+    async def upload_blob(self, data, **kwargs) -> dict:
+        return await self._in_thread(self._client.upload_blob, data, **kwargs)
+
+    async def download_blob(self, **kwargs) -> _Downloader:
+        return await self._in_thread(self._client.download_blob, **kwargs)
+
+    async def delete_blob(self, **kwargs) -> None:
+        await self._in_thread(self._client.delete_blob, **kwargs)
+
+
+class AsyncBackendContainerClient:
+    """Async ContainerClient stand-in (azure.storage.blob.aio surface)."""
+
+    def __init__(self, backend: StorageBackend, container_name: str):
+        self._sync = BackendContainerClient(backend, container_name)
+        self.container_name = container_name
+
+    def get_blob_client(self, blob) -> _AsyncBlobClient:
+        return _AsyncBlobClient(self._sync.get_blob_client(blob))
+
+    async def close(self) -> None:
+        pass
+
+
+def create_backend(kind: str, container_name: str) -> StorageBackend:
+    """
+    Create an offline backend for a container.
+
+    Args:
+        kind: 'memory' or 'local'
+        container_name: Container the backend stands in for; local blobs
+                        live in STORAGE_LOCAL_PATH/<container_name>
+
+    Returns:
+        StorageBackend
+
+    Raises:
+        ValueError: If kind is unknown
+    """
+    if kind == "memory":
+        return MemoryBackend()
+    if kind == "local":
+        root = os.getenv("STORAGE_LOCAL_PATH", ".storage")
+        return LocalDiskBackend(os.path.join(root, container_name))
+    raise ValueError(f"Unknown storage backend: {kind}")
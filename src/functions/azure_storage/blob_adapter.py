@@ -1,11 +1,26 @@
 """Azure Blob Storage adapter for storing and retrieving scraped data."""
 
 import json
-import os
 from datetime import datetime
-from typing import Optional, List
-from azure.storage.blob import BlobServiceClient
-from azure.identity import DefaultAzureCredential
+from typing import Iterable, Optional, List, Tuple
+from azure_storage.blob_cache import CacheEntry
+from azure_storage.blob_index import (
+    BlobIndex,
+    SCRAPED_DATA_SERIES,
+    parse_blob_name,
+    series_prefix,
+)
+from azure_storage.clients import (
+    BYTES_READ,
+    BYTES_WRITTEN,
+    STORAGE_SECONDS,
+    default_container_name,
+    get_container_client,
+    storage_backend,
+)
+from azure_storage.rollups import RollupStore
+from azure_storage.segments import decode_segment, is_segment
+from azure_storage.update_encoding import PLAIN_UPDATE_BYTES, decode_window
 from utils.logger import Logger
 
 
@@ -15,37 +30,36 @@ class AzureBlobStorageAdapter:
     def __init__(self, connection_string: Optional[str] = None):
         """
         Initialize the Azure Blob Storage adapter.
-        
+
+        The container is served by the backend selected with STORAGE_BACKEND
+        (Azure by default, or the offline memory / local-disk backends).
+
         Args:
-            connection_string: Azure Storage connection string. 
+            connection_string: Azure Storage connection string.
                              If not provided, uses DefaultAzureCredential.
         """
-        self.logger = Logger()
-        
-        if connection_string:
-            self.blob_service_client = BlobServiceClient.from_connection_string(
-                connection_string
-            )
-        else:
-            # Use managed identity for authentication
-            account_url = f"https://{os.getenv('AZURE_STORAGE_ACCOUNT_NAME')}.blob.core.windows.net"
-            credential = DefaultAzureCredential()
-            self.blob_service_client = BlobServiceClient(
-                account_url=account_url,
-                credential=credential
-            )
-        
-        self.container_name = os.getenv('BLOB_CONTAINER_NAME', 'scraped-data')
-        self.logger.log_info(f"Azure Blob Storage adapter initialized for container: {self.container_name}")
+        self.logger = Logger("storage")
+
+        # Clients (and their connection pool) are shared process-wide
+        self.container_name = default_container_name()
+        self.container_client = get_container_client(
+            self.container_name, connection_string
+        )
+        self.index = BlobIndex(self.container_client)
+        self.rollups = RollupStore(self.container_client)
+        self.logger.log_info(
+            f"Azure Blob Storage adapter initialized for container: {self.container_name}"
+            f" ({storage_backend()} backend)"
+        )
 
     def save_data(self, data: dict, blob_name: Optional[str] = None) -> str:
         """
         Save data to Azure Blob Storage.
-        
+
         Args:
             data: Dictionary containing the data to save
             blob_name: Optional custom blob name. If not provided, uses timestamp.
-        
+
         Returns:
             The blob name/path where data was saved
         """
@@ -53,21 +67,20 @@ class AzureBlobStorageAdapter:
             if blob_name is None:
                 timestamp = datetime.utcnow().strftime("%Y-%m-%d_%H-%M-%S")
                 blob_name = f"scraped_data_{timestamp}.json"
-            
-            container_client = self.blob_service_client.get_container_client(
-                self.container_name
-            )
-            
+
             # Convert data to JSON
             json_data = json.dumps(data, ensure_ascii=False, indent=2)
-            
+
             # Upload to blob storage
-            blob_client = container_client.get_blob_client(blob_name)
-            blob_client.upload_blob(json_data, overwrite=True)
-            
+            blob_client = self.container_client.get_blob_client(blob_name)
+            with STORAGE_SECONDS.labels(operation="write").time():
+                blob_client.upload_blob(json_data, overwrite=True)
+            BYTES_WRITTEN.inc(len(json_data.encode("utf-8")))
+            self._record_in_index(blob_name)
+
             self.logger.log_info(f"Data saved to blob: {blob_name}")
             return blob_name
-        
+
         except Exception as e:
             self.logger.log_error(f"Error saving data to blob storage: {e}")
             raise
@@ -75,91 +88,250 @@ class AzureBlobStorageAdapter:
     def retrieve_data(self, blob_name: str) -> dict:
         """
         Retrieve data from Azure Blob Storage.
-        
+
         Args:
             blob_name: Name of the blob to retrieve
-        
+
         Returns:
             Dictionary containing the retrieved data
         """
+        return self.retrieve_entry(blob_name).data
+
+    def retrieve_entry(self, blob_name: str) -> CacheEntry:
+        """
+        Retrieve data together with the version of the blob it came from.
+
+        Segments are decoded into their window documents; every other blob
+        is decoded as JSON, with change-only window updates expanded.
+
+        Args:
+            blob_name: Name of the blob to retrieve
+
+        Returns:
+            CacheEntry with the decoded data, ETag, last-modified time and size
+        """
+        raw_data, properties = self.retrieve_bytes(blob_name)
+
+        if is_segment(blob_name):
+            data = decode_segment(raw_data)
+            # Budget the cache by the decoded (JSON-equivalent) size
+            size = max(data["source_bytes"], len(raw_data))
+        else:
+            document = json.loads(raw_data.decode("utf-8"))
+            data = decode_window(document)
+            size = len(raw_data)
+            if data is not document:
+                # Budget change-only windows by their plain JSON size
+                size = max(size, PLAIN_UPDATE_BYTES * len(data["updates"]))
+
+        return CacheEntry(data, properties.etag, properties.last_modified, size)
+
+    def retrieve_bytes(self, blob_name: str):
+        """
+        Retrieve the raw content of a blob.
+
+        Args:
+            blob_name: Name of the blob to retrieve
+
+        Returns:
+            (content bytes, BlobProperties) tuple
+        """
         try:
-            container_client = self.blob_service_client.get_container_client(
-                self.container_name
-            )
-            blob_client = container_client.get_blob_client(blob_name)
-            
-            download_stream = blob_client.download_blob()
-            json_data = download_stream.readall().decode('utf-8')
-            data = json.loads(json_data)
-            
-            self.logger.log_info(f"Data retrieved from blob: {blob_name}")
-            return data
-        
+            blob_client = self.container_client.get_blob_client(blob_name)
+
+            with STORAGE_SECONDS.labels(operation="read").time():
+                download_stream = blob_client.download_blob()
+                raw_data = download_stream.readall()
+            BYTES_READ.inc(len(raw_data))
+
+            self.logger.log_debug("Data retrieved from blob: %s", blob_name)
+            return raw_data, download_stream.properties
+
         except Exception as e:
             self.logger.log_error(f"Error retrieving data from blob storage: {e}")
             raise
 
+    def save_bytes(self, blob_name: str, content: bytes) -> str:
+        """
+        Save raw content to Azure Blob Storage, bypassing the blob index.
+
+        Args:
+            blob_name: Blob name/path to write
+            content: Bytes to upload
+
+        Returns:
+            The blob name/path where content was saved
+        """
+        try:
+            with STORAGE_SECONDS.labels(operation="write").time():
+                self.container_client.get_blob_client(blob_name).upload_blob(
+                    content, overwrite=True
+                )
+            BYTES_WRITTEN.inc(len(content))
+
+            self.logger.log_info(f"Data saved to blob: {blob_name}")
+            return blob_name
+
+        except Exception as e:
+            self.logger.log_error(f"Error saving data to blob storage: {e}")
+            raise
+
     def list_blobs(self, prefix: str = "") -> List[str]:
         """
         List all blobs in the container.
-        
+
         Args:
             prefix: Optional prefix to filter blobs
-        
+
         Returns:
             List of blob names
         """
         try:
-            container_client = self.blob_service_client.get_container_client(
-                self.container_name
+            with STORAGE_SECONDS.labels(operation="list").time():
+                blobs = self.container_client.list_blobs(name_starts_with=prefix)
+                blob_list = [blob.name for blob in blobs]
+
+            self.logger.log_debug(
+                "Listed %d blobs with prefix: %s", len(blob_list), prefix
             )
-            blobs = container_client.list_blobs(name_starts_with=prefix)
-            blob_list = [blob.name for blob in blobs]
-            
-            self.logger.log_info(f"Listed {len(blob_list)} blobs with prefix: {prefix}")
             return blob_list
-        
+
         except Exception as e:
             self.logger.log_error(f"Error listing blobs: {e}")
             raise
 
-    def get_latest_data(self) -> Optional[dict]:
+    def list_blobs_page(
+        self,
+        prefix: str = "",
+        limit: int = 100,
+        continuation_token: Optional[str] = None,
+    ) -> Tuple[List[str], Optional[str]]:
+        """
+        List a single page of blobs in the container.
+
+        Args:
+            prefix: Optional prefix to filter blobs
+            limit: Maximum number of blobs in the page
+            continuation_token: Marker returned by a previous call
+
+        Returns:
+            (blob names, continuation token or None if the listing is complete)
+        """
+        try:
+            with STORAGE_SECONDS.labels(operation="list").time():
+                pages = self.container_client.list_blobs(
+                    name_starts_with=prefix, results_per_page=limit
+                ).by_page(continuation_token=continuation_token)
+                blob_list = [blob.name for blob in next(pages, [])]
+
+            return blob_list, pages.continuation_token or None
+
+        except Exception as e:
+            self.logger.log_error(f"Error listing blobs: {e}")
+            raise
+
+    def get_latest_data(self, series: str = SCRAPED_DATA_SERIES) -> Optional[dict]:
         """
         Retrieve the most recently saved data.
-        
+
+        Uses the latest pointer of the blob index, so the lookup costs the
+        same number of round trips no matter how many blobs exist. Falls back
+        to a full listing (and repairs the pointer) if the index is missing.
+
+        Args:
+            series: Index series to look up (default: scraped data)
+
         Returns:
             Dictionary containing the latest data, or None if no data exists
         """
         try:
-            blobs = self.list_blobs(prefix="scraped_data_")
+            pointer = self.index.get_latest(series)
+            if pointer is not None:
+                return self.retrieve_data(pointer["blob_name"])
+
+            # Occupancy series share one prefix, so filter the listing by series
+            blobs = [
+                name
+                for name in self.list_blobs(prefix=series_prefix(series))
+                if (parse_blob_name(name) or (None,))[0] == series
+            ]
             if not blobs:
-                self.logger.log_info("No scraped data found in blob storage")
+                self.logger.log_info(f"No data found in blob storage for {series}")
                 return None
-            
+
             # Sort by name to get the most recent (names are timestamp-based)
             latest_blob = sorted(blobs)[-1]
+            self.logger.log_info(
+                f"Latest pointer missing for {series}, rebuilt from listing"
+            )
+            self._record_in_index(latest_blob)
             return self.retrieve_data(latest_blob)
-        
+
         except Exception as e:
             self.logger.log_error(f"Error retrieving latest data: {e}")
             raise
 
+    def rebuild_index(self) -> dict:
+        """
+        Regenerate the blob index from a full listing of the container.
+
+        Returns:
+            Dictionary mapping each series to the number of indexed blobs
+        """
+        try:
+            return self.index.rebuild(self.list_blobs())
+
+        except Exception as e:
+            self.logger.log_error(f"Error rebuilding blob index: {e}")
+            raise
+
     def delete_blob(self, blob_name: str) -> None:
         """
         Delete a blob from storage.
-        
+
         Args:
             blob_name: Name of the blob to delete
         """
+        self.delete_blobs([blob_name])
+
+    def delete_blobs(self, blob_names: Iterable[str]) -> None:
+        """
+        Delete a batch of blobs from storage.
+
+        The blobs are deleted one by one; the index is then updated once per
+        touched manifest instead of once per blob.
+
+        Args:
+            blob_names: Names of the blobs to delete
+        """
+        deleted = []
         try:
-            container_client = self.blob_service_client.get_container_client(
-                self.container_name
-            )
-            blob_client = container_client.get_blob_client(blob_name)
-            blob_client.delete_blob()
-            
-            self.logger.log_info(f"Blob deleted: {blob_name}")
-        
+            for blob_name in blob_names:
+                blob_client = self.container_client.get_blob_client(blob_name)
+                with STORAGE_SECONDS.labels(operation="delete").time():
+                    blob_client.delete_blob()
+                deleted.append(blob_name)
+                self.logger.log_info(f"Blob deleted: {blob_name}")
+
         except Exception as e:
             self.logger.log_error(f"Error deleting blob: {e}")
             raise
+
+        finally:
+            # Blobs deleted before a failure are dropped from the index too
+            if deleted:
+                self.index.remove_many(deleted)
+
+    def _record_in_index(self, blob_name: str) -> None:
+        """
+        Add a blob to the index without failing the surrounding write.
+
+        A stale index is repaired by rebuild_index(), so errors are only logged.
+
+        Args:
+            blob_name: Name of the blob that was written
+        """
+        try:
+            self.index.record(blob_name)
+        except Exception as e:
+            self.logger.log_error(f"Error updating blob index for {blob_name}: {e}")
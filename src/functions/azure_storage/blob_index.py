@@ -0,0 +1,393 @@
+"""Latest-pointer and time-partitioned manifest index for data blobs."""
+
+import os
+import re
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from azure.core.exceptions import ResourceNotModifiedError
+from azure_storage.documents import JsonDocumentStore
+from azure_storage.segments import decode_segment, is_segment
+
+INDEX_PREFIX = "_index/"
+SCRAPED_DATA_SERIES = "scraped_data"
+OCCUPANCY_DATA_SERIES = "occupancy_data"
+
+# scraped_data_2024-01-15_14-30-45.json
+_SCRAPED_PATTERN = re.compile(
+    r"^scraped_data_(\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})\.json$"
+)
+# occupancy_data/20240115_143045_SSD-7.json
+_OCCUPANCY_PATTERN = re.compile(r"^occupancy_data/(\d{8}_\d{6})_(.+)\.json$")
+
+
+def occupancy_series(uid: str) -> str:
+    """Return the index series name for the occupancy windows of a UID."""
+    return f"{OCCUPANCY_DATA_SERIES}/{uid}"
+
+
+def series_prefix(
+    series: str, start: Optional[datetime] = None, end: Optional[datetime] = None
+) -> str:
+    """
+    Return the longest blob name prefix shared by a series in a time window.
+
+    Args:
+        series: Index series name
+        start: Optional inclusive window start
+        end: Optional inclusive window end
+
+    Returns:
+        Prefix to pass to a container listing
+    """
+    if series == SCRAPED_DATA_SERIES:
+        prefix, time_format = "scraped_data_", "%Y-%m-%d_%H-%M-%S"
+    else:
+        prefix, time_format = f"{OCCUPANCY_DATA_SERIES}/", "%Y%m%d_%H%M%S"
+
+    if start is None or end is None:
+        return prefix
+    return os.path.commonprefix(
+        [prefix + start.strftime(time_format), prefix + end.strftime(time_format)]
+    )
+
+
+def parse_blob_name(blob_name: str) -> Optional[Tuple[str, datetime]]:
+    """
+    Derive the index series and timestamp encoded in a data blob name.
+
+    Args:
+        blob_name: Name of a data blob
+
+    Returns:
+        (series, timestamp) tuple, or None if the blob is not indexed
+    """
+    match = _SCRAPED_PATTERN.match(blob_name)
+    if match:
+        timestamp = datetime.strptime(match.group(1), "%Y-%m-%d_%H-%M-%S")
+        return SCRAPED_DATA_SERIES, timestamp
+
+    match = _OCCUPANCY_PATTERN.match(blob_name)
+    if match:
+        timestamp = datetime.strptime(match.group(1), "%Y%m%d_%H%M%S")
+        return occupancy_series(match.group(2)), timestamp
+
+    return None
+
+
+class BlobIndex(JsonDocumentStore):
+    """
+    Maintains a small index next to the data blobs of a container.
+
+    Layout (per series):
+        _index/<series>/latest.json             -> pointer to the newest blob
+        _index/<series>/manifest/<date>.json    -> sorted blob names of a day
+                                                   (and its segment, if any)
+
+    Writers call record() after every upload, so finding the latest blob
+    costs a single download regardless of how many blobs exist. Updates use
+    ETag preconditions so concurrent writers never lose entries.
+    """
+
+    @staticmethod
+    def latest_blob_name(series: str) -> str:
+        """Return the name of the latest pointer blob of a series."""
+        return f"{INDEX_PREFIX}{series}/latest.json"
+
+    @staticmethod
+    def manifest_blob_name(series: str, day: str) -> str:
+        """Return the name of the manifest blob of a series for a day."""
+        return f"{INDEX_PREFIX}{series}/manifest/{day}.json"
+
+    def record(self, blob_name: str) -> None:
+        """
+        Add a freshly written blob to the manifest and latest pointer.
+
+        Args:
+            blob_name: Name of the blob that was written
+        """
+        self.record_many([blob_name])
+
+    def record_many(self, blob_names: Iterable[str]) -> None:
+        """
+        Add a batch of written blobs to the index.
+
+        Each manifest and latest pointer touched by the batch is updated
+        once, which keeps bulk writes (e.g. the CSV importer) cheap.
+
+        Args:
+            blob_names: Names of the blobs that were written
+        """
+        # series -> day -> blob names
+        batches: Dict[str, Dict[str, List[str]]] = {}
+        latest: Dict[str, Tuple[datetime, str]] = {}
+        for blob_name in blob_names:
+            parsed = parse_blob_name(blob_name)
+            if parsed is None:
+                continue
+            series, timestamp = parsed
+            day = timestamp.strftime("%Y-%m-%d")
+            batches.setdefault(series, {}).setdefault(day, []).append(blob_name)
+            if series not in latest or latest[series] < (timestamp, blob_name):
+                latest[series] = (timestamp, blob_name)
+
+        for series, days in batches.items():
+            for day, names in days.items():
+
+                def add_to_manifest(manifest, names=names):
+                    blobs = manifest.setdefault("blobs", [])
+                    new = set(names).difference(blobs)
+                    if not new:
+                        return None
+                    blobs.extend(new)
+                    blobs.sort()
+                    return manifest
+
+                self._update(
+                    self.manifest_blob_name(series, day),
+                    add_to_manifest,
+                    {"series": series, "date": day, "blobs": []},
+                )
+
+            timestamp, blob_name = latest[series]
+            first_day = min(days)
+
+            def advance_pointer(
+                pointer, series=series, timestamp=timestamp, blob_name=blob_name
+            ):
+                first_date = min(pointer.get("first_date") or first_day, first_day)
+                if (
+                    pointer.get("blob_name")
+                    and pointer["timestamp"] >= timestamp.isoformat()
+                ):
+                    if pointer.get("first_date") == first_date:
+                        return None
+                    # An older batch can still move the start of the series
+                    pointer["first_date"] = first_date
+                    return pointer
+                pointer.update(
+                    {
+                        "series": series,
+                        "blob_name": blob_name,
+                        "timestamp": timestamp.isoformat(),
+                        "first_date": first_date,
+                    }
+                )
+                return pointer
+
+            self._update(self.latest_blob_name(series), advance_pointer, {})
+
+    def remove(self, blob_name: str) -> None:
+        """
+        Drop a deleted blob from the index.
+
+        If the latest pointer referenced the blob, the pointer is removed and
+        the next latest lookup falls back to a listing that re-creates it.
+
+        Args:
+            blob_name: Name of the blob that was deleted
+        """
+        self.remove_many([blob_name])
+
+    def remove_many(self, blob_names: Iterable[str]) -> None:
+        """
+        Drop a batch of deleted blobs from the index.
+
+        Each manifest touched by the batch is updated once, so deleting the
+        windows of a day (e.g. after compaction) costs one read-modify-write.
+
+        Args:
+            blob_names: Names of the blobs that were deleted
+        """
+        # series -> day -> blob names
+        batches: Dict[str, Dict[str, Set[str]]] = {}
+        for blob_name in blob_names:
+            parsed = parse_blob_name(blob_name)
+            if parsed is None:
+                continue
+            series, timestamp = parsed
+            day = timestamp.strftime("%Y-%m-%d")
+            batches.setdefault(series, {}).setdefault(day, set()).add(blob_name)
+
+        for series, days in batches.items():
+            for day, names in days.items():
+
+                def drop_from_manifest(manifest, names=names):
+                    blobs = manifest.get("blobs", [])
+                    kept = [name for name in blobs if name not in names]
+                    if len(kept) == len(blobs):
+                        return None
+                    manifest["blobs"] = kept
+                    return manifest
+
+                self._update(
+                    self.manifest_blob_name(series, day), drop_from_manifest, None
+                )
+
+            pointer = self.get_latest(series)
+            if pointer and any(
+                pointer.get("blob_name") in names for names in days.values()
+            ):
+                self._delete(self.latest_blob_name(series))
+
+    def get_latest(self, series: str) -> Optional[dict]:
+        """
+        Read the latest pointer of a series.
+
+        Args:
+            series: Index series name
+
+        Returns:
+            Pointer dictionary, or None if the series has no pointer yet
+        """
+        document, _ = self._read(self.latest_blob_name(series))
+        return document
+
+    def read_latest(
+        self, series: str, if_none_match: Optional[str] = None
+    ) -> Tuple[Optional[dict], Optional[str], bool]:
+        """
+        Conditionally read the latest pointer of a series.
+
+        Args:
+            series: Index series name
+            if_none_match: ETag of a previously read pointer, if any
+
+        Returns:
+            (pointer, etag, modified) tuple; when the pointer still matches
+            if_none_match, modified is False and no body is transferred
+        """
+        try:
+            document, etag = self._read(
+                self.latest_blob_name(series), if_none_match=if_none_match
+            )
+            return document, etag, True
+        except ResourceNotModifiedError:
+            return None, if_none_match, False
+
+    def get_manifest(self, series: str, day: str) -> List[str]:
+        """
+        Read the sorted blob names of a series for one day.
+
+        Args:
+            series: Index series name
+            day: Day in YYYY-MM-DD format
+
+        Returns:
+            List of blob names (empty if the day has no manifest)
+        """
+        document = self.get_manifest_document(series, day)
+        return document.get("blobs", []) if document else []
+
+    def get_manifest_document(self, series: str, day: str) -> Optional[dict]:
+        """
+        Read the full manifest of a series for one day.
+
+        Besides 'blobs' the manifest may name a compacted 'segment' and the
+        'segment_blobs' it contains.
+
+        Args:
+            series: Index series name
+            day: Day in YYYY-MM-DD format
+
+        Returns:
+            Manifest dictionary, or None if the day has no manifest
+        """
+        document, _ = self._read(self.manifest_blob_name(series, day))
+        return document
+
+    def record_segment(
+        self, series: str, day: str, segment_name: str, blob_names: List[str]
+    ) -> None:
+        """
+        Register the compacted segment of a day in its manifest.
+
+        Args:
+            series: Index series name
+            day: Day in YYYY-MM-DD format
+            segment_name: Blob name of the segment
+            blob_names: Window blobs contained in the segment
+        """
+
+        def set_segment(manifest):
+            manifest["segment"] = segment_name
+            manifest["segment_blobs"] = sorted(blob_names)
+            return manifest
+
+        self._update(
+            self.manifest_blob_name(series, day),
+            set_segment,
+            {"series": series, "date": day, "blobs": []},
+        )
+
+    def rebuild(self, blob_names: Iterable[str]) -> Dict[str, int]:
+        """
+        Regenerate every manifest and latest pointer from a full listing.
+
+        Manifests that no longer correspond to any blob are deleted.
+
+        Args:
+            blob_names: Names of all blobs in the container
+
+        Returns:
+            Dictionary mapping each series to the number of indexed blobs
+        """
+        manifests: Dict[str, Dict[str, List[str]]] = {}
+        segments = []
+        for blob_name in blob_names:
+            if is_segment(blob_name):
+                segments.append(blob_name)
+                continue
+
+            parsed = parse_blob_name(blob_name)
+            if parsed is None:
+                continue
+            series, timestamp = parsed
+            day = timestamp.strftime("%Y-%m-%d")
+            manifests.setdefault(series, {}).setdefault(day, []).append(blob_name)
+
+        segment_documents = {}
+        for segment_name in segments:
+            downloader = self.container_client.get_blob_client(
+                segment_name
+            ).download_blob()
+            segment = decode_segment(downloader.readall())
+            segment_documents[(segment["series"], segment["date"])] = {
+                "segment": segment_name,
+                "segment_blobs": segment["blob_names"],
+            }
+            manifests.setdefault(segment["series"], {}).setdefault(segment["date"], [])
+
+        written = set()
+        counts = {}
+        for series, days in manifests.items():
+            for day, blobs in days.items():
+                blobs.sort()
+                name = self.manifest_blob_name(series, day)
+                document = {"series": series, "date": day, "blobs": blobs}
+                document.update(segment_documents.get((series, day), {}))
+                self._write(name, document)
+                written.add(name)
+
+            blob_days = {day: blobs for day, blobs in days.items() if blobs}
+            if not blob_days:
+                continue
+
+            latest = blob_days[max(blob_days)][-1]
+            self._write(
+                self.latest_blob_name(series),
+                {
+                    "series": series,
+                    "blob_name": latest,
+                    "timestamp": parse_blob_name(latest)[1].isoformat(),
+                    "first_date": min(days),
+                },
+            )
+            written.add(self.latest_blob_name(series))
+            counts[series] = sum(len(blobs) for blobs in blob_days.values())
+
+        for blob in self.container_client.list_blobs(name_starts_with=INDEX_PREFIX):
+            if blob.name not in written:
+                self._delete(blob.name)
+
+        self.logger.log_info(f"Rebuilt blob index for {len(counts)} series")
+        return counts
@@ -0,0 +1,257 @@
+"""
+Process-wide factory for Azure Blob Storage clients.
+
+Every storage user (Flask app, Azure Functions, scripts) gets its clients
+from here, so a process holds one service client per account with one
+pooled, keep-alive HTTP transport, plus cached container clients.
+Credentials for managed identity are created on first use only.
+
+With STORAGE_BACKEND=memory or local the container clients are backed by
+an offline backend instead (see azure_storage.backends), so the whole
+stack runs without a storage account.
+
+Configuration:
+    STORAGE_BACKEND: 'azure' (default), 'memory' or 'local'
+    STORAGE_LOCAL_PATH: Root directory of the local backend (default .storage)
+    STORAGE_POOL_SIZE: Connections kept per host (default 16)
+    STORAGE_KEEPALIVE_SECONDS: Idle time before a pooled connection of the
+                               async transport is closed (default 60)
+    STORAGE_CONNECTION_TIMEOUT: Connect timeout in seconds (default 20)
+    STORAGE_READ_TIMEOUT: Read timeout in seconds (default 60)
+"""
+
+import asyncio
+import os
+import threading
+import weakref
+from typing import Optional
+from azure.core.pipeline.transport import RequestsTransport
+from azure.storage.blob import BlobServiceClient, ContainerClient
+from azure_storage.backends import (
+    AsyncBackendContainerClient,
+    BackendContainerClient,
+    create_backend,
+)
+from requests import Session
+from requests.adapters import HTTPAdapter
+from utils.metrics import counter, histogram
+
+_lock = threading.Lock()
+_credential = None
+_service_clients = {}
+_container_clients = {}
+_backends = {}
+# Async clients are bound to the event loop their HTTP session was opened on
+_async_clients = weakref.WeakKeyDictionary()
+
+# Recorded by every storage user around its blob calls
+STORAGE_SECONDS = histogram(
+    "storage_request_seconds", "Latency of blob storage calls", ["operation"]
+)
+BYTES_READ = counter("storage_bytes_read_total", "Blob bytes downloaded")
+BYTES_WRITTEN = counter("storage_bytes_written_total", "Blob bytes uploaded")
+
+
+def default_container_name() -> str:
+    """Return the configured data container (BLOB_CONTAINER_NAME)."""
+    return os.getenv("BLOB_CONTAINER_NAME", "scraped-data")
+
+
+def storage_backend() -> str:
+    """Return the configured storage backend (STORAGE_BACKEND)."""
+    return os.getenv("STORAGE_BACKEND", "azure").lower()
+
+
+def _get_backend(container_name: str):
+    """Return the process-wide offline backend of a container."""
+    kind = storage_backend()
+    with _lock:
+        backend = _backends.get((kind, container_name))
+        if backend is None:
+            backend = create_backend(kind, container_name)
+            _backends[(kind, container_name)] = backend
+        return backend
+
+
+def _pool_size() -> int:
+    return int(os.getenv("STORAGE_POOL_SIZE", 16))
+
+
+def _timeouts() -> dict:
+    return {
+        "connection_timeout": float(os.getenv("STORAGE_CONNECTION_TIMEOUT", 20)),
+        "read_timeout": float(os.getenv("STORAGE_READ_TIMEOUT", 60)),
+    }
+
+
+def _account_url() -> str:
+    return f"https://{os.getenv('AZURE_STORAGE_ACCOUNT_NAME')}.blob.core.windows.net"
+
+
+def _get_credential():
+    """Create the managed identity credential on first use."""
+    global _credential
+    if _credential is None:
+        from azure.identity import DefaultAzureCredential
+
+        _credential = DefaultAzureCredential()
+    return _credential
+
+
+def _pooled_transport() -> RequestsTransport:
+    """Build a requests transport with a sized keep-alive connection pool."""
+    session = Session()
+    adapter = HTTPAdapter(pool_connections=_pool_size(), pool_maxsize=_pool_size())
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return RequestsTransport(session=session, session_owner=False, **_timeouts())
+
+
+def get_blob_service_client(
+    connection_string: Optional[str] = None,
+) -> BlobServiceClient:
+    """
+    Return the shared service client of an account.
+
+    Args:
+        connection_string: Azure Storage connection string. If not provided,
+                           AZURE_STORAGE_ACCOUNT_NAME and
+                           DefaultAzureCredential are used.
+
+    Returns:
+        BlobServiceClient shared by the whole process
+    """
+    key = connection_string or _account_url()
+    client = _service_clients.get(key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _service_clients.get(key)
+        if client is None:
+            if connection_string:
+                client = BlobServiceClient.from_connection_string(
+                    connection_string, transport=_pooled_transport()
+                )
+            else:
+                client = BlobServiceClient(
+                    account_url=key,
+                    credential=_get_credential(),
+                    transport=_pooled_transport(),
+                )
+            _service_clients[key] = client
+        return client
+
+
+def get_container_client(
+    container_name: Optional[str] = None, connection_string: Optional[str] = None
+) -> ContainerClient:
+    """
+    Return the shared client of a container.
+
+    Args:
+        container_name: Container name (default: BLOB_CONTAINER_NAME)
+        connection_string: See get_blob_service_client()
+
+    Returns:
+        ContainerClient sharing the account's transport
+    """
+    container_name = container_name or default_container_name()
+    if storage_backend() != "azure":
+        return BackendContainerClient(_get_backend(container_name), container_name)
+
+    key = (connection_string or _account_url(), container_name)
+    client = _container_clients.get(key)
+    if client is None:
+        client = get_blob_service_client(connection_string).get_container_client(
+            container_name
+        )
+        _container_clients[key] = client
+    return client
+
+
+def get_async_container_client(
+    container_name: Optional[str] = None, connection_string: Optional[str] = None
+):
+    """
+    Return the shared async client of a container for the running loop.
+
+    Must be called from a coroutine. The client and its aiohttp connection
+    pool live as long as the event loop; a different loop gets its own.
+
+    Args:
+        container_name: Container name (default: BLOB_CONTAINER_NAME)
+        connection_string: See get_blob_service_client()
+
+    Returns:
+        azure.storage.blob.aio.ContainerClient
+    """
+    if storage_backend() != "azure":
+        container_name = container_name or default_container_name()
+        return AsyncBackendContainerClient(_get_backend(container_name), container_name)
+
+    from aiohttp import ClientSession, TCPConnector
+    from azure.core.pipeline.transport import AioHttpTransport
+    from azure.storage.blob.aio import BlobServiceClient as AsyncBlobServiceClient
+
+    loop = asyncio.get_running_loop()
+    container_name = container_name or default_container_name()
+    account = connection_string or _account_url()
+    clients = _async_clients.setdefault(
+        loop, {"services": {}, "containers": {}, "sessions": []}
+    )
+
+    service = clients["services"].get(account)
+    if service is None:
+        session = ClientSession(
+            connector=TCPConnector(
+                limit_per_host=_pool_size(),
+                keepalive_timeout=float(os.getenv("STORAGE_KEEPALIVE_SECONDS", 60)),
+            )
+        )
+        clients["sessions"].append(session)
+        transport = AioHttpTransport(
+            session=session, session_owner=False, **_timeouts()
+        )
+        if connection_string:
+            service = AsyncBlobServiceClient.from_connection_string(
+                connection_string, transport=transport
+            )
+        else:
+            from azure.identity.aio import DefaultAzureCredential
+
+            service = AsyncBlobServiceClient(
+                account_url=account,
+                credential=DefaultAzureCredential(),
+                transport=transport,
+            )
+        clients["services"][account] = service
+
+    key = (account, container_name)
+    client = clients["containers"].get(key)
+    if client is None:
+        client = service.get_container_client(container_name)
+        clients["containers"][key] = client
+    return client
+
+
+async def close_async_clients() -> None:
+    """Close the async clients and HTTP sessions of the running loop."""
+    clients = _async_clients.pop(asyncio.get_running_loop(), None)
+    if clients is None:
+        return
+    for service in clients["services"].values():
+        await service.close()
+    for session in clients["sessions"]:
+        await session.close()
+
+
+def reset_clients() -> None:
+    """Drop every cached client (e.g. in a forked worker process)."""
+    global _credential
+    with _lock:
+        _service_clients.clear()
+        _container_clients.clear()
+        _async_clients.clear()
+        _backends.clear()
+        _credential = None
@@ -0,0 +1,101 @@
+"""Compaction of finished days of occupancy windows into segments."""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional
+from azure_storage.blob_adapter import AzureBlobStorageAdapter
+from azure_storage.blob_index import occupancy_series
+from azure_storage.segments import decode_segment, encode_segment, segment_blob_name
+from utils.logger import Logger
+
+
+class SegmentCompactor:
+    """Rolls the window blobs of a finished day into one columnar segment."""
+
+    def __init__(self, adapter: AzureBlobStorageAdapter, max_workers: int = 8):
+        """
+        Initialize the compactor.
+
+        Args:
+            adapter: Storage adapter of the data container
+            max_workers: Concurrent downloads of source windows
+        """
+        self.adapter = adapter
+        self.max_workers = max_workers
+        self.logger = Logger()
+
+    def compact_day(
+        self, uid: str, day: str, delete_sources: bool = False
+    ) -> Optional[str]:
+        """
+        Compact all windows of a UID and day into a segment.
+
+        The segment is written, read back and compared with its sources
+        before it is registered in the day's manifest. Sources are deleted
+        only after a successful verification.
+
+        Args:
+            uid: CrowdMonitor location UID (e.g. 'SSD-7')
+            day: Day to compact (YYYY-MM-DD); must be before today (UTC)
+            delete_sources: Delete the window blobs once the segment is verified
+
+        Returns:
+            Blob name of the segment, or None if the day has no windows
+
+        Raises:
+            ValueError: If the day is not finished yet or verification fails
+        """
+        if day >= datetime.utcnow().strftime("%Y-%m-%d"):
+            raise ValueError(f"Day {day} is not finished yet")
+
+        series = occupancy_series(uid)
+        manifest = self.adapter.index.get_manifest_document(series, day) or {}
+        blob_names = sorted(
+            set(manifest.get("blobs", [])) | set(manifest.get("segment_blobs", []))
+        )
+        if not blob_names:
+            self.logger.log_info(f"No windows to compact for {series} on {day}")
+            return None
+
+        segment_name = segment_blob_name(series, day)
+        existing = {}
+        if manifest.get("segment"):
+            # Re-compaction (late windows): keep windows already in the segment
+            segment = self.adapter.retrieve_entry(manifest["segment"]).data
+            existing = dict(zip(segment["blob_names"], segment["windows"]))
+
+        missing = [name for name in blob_names if name not in existing]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            entries = dict(
+                zip(missing, executor.map(self.adapter.retrieve_entry, missing))
+            )
+
+        windows = [
+            (name, existing[name] if name in existing else entries[name].data)
+            for name in blob_names
+        ]
+        source_bytes = sum(entry.size for entry in entries.values())
+        if existing:
+            source_bytes += segment["source_bytes"]
+
+        content = encode_segment(series, day, windows, source_bytes)
+        self.adapter.save_bytes(segment_name, content)
+
+        stored, _ = self.adapter.retrieve_bytes(segment_name)
+        decoded = decode_segment(stored)
+        if decoded["blob_names"] != blob_names or decoded["windows"] != [
+            document for _, document in windows
+        ]:
+            self.adapter.delete_blob(segment_name)
+            raise ValueError(f"Segment {segment_name} does not match its sources")
+
+        self.adapter.index.record_segment(series, day, segment_name, blob_names)
+        self.logger.log_info(
+            f"Compacted {len(blob_names)} windows of {series} on {day} into "
+            f"{segment_name} ({source_bytes} -> {len(content)} bytes)"
+        )
+
+        if delete_sources:
+            self.adapter.delete_blobs(manifest.get("blobs", []))
+
+        return segment_name
@@ -0,0 +1,42 @@
+"""Opaque continuation tokens for paginated blob listings."""
+
+import base64
+import json
+
+
+def encode_token(state: dict) -> str:
+    """
+    Encode a listing position as an opaque URL-safe token.
+
+    Args:
+        state: JSON-serializable listing position
+
+    Returns:
+        URL-safe token string
+    """
+    raw = json.dumps(state, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_token(token: str) -> dict:
+    """
+    Decode a token created by encode_token().
+
+    Args:
+        token: Token string received from a client
+
+    Returns:
+        The listing position
+
+    Raises:
+        ValueError: If the token is malformed
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid continuation token: {token}") from e
+
+    if not isinstance(state, dict) or state.get("order") not in ("asc", "desc"):
+        raise ValueError(f"Invalid continuation token: {token}")
+    return state
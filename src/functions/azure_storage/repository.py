@@ -1,34 +1,82 @@
 """Repository layer for Azure Blob Storage integration."""
 
+import functools
 import os
-from datetime import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Iterable, Iterator, List, Optional, Tuple
+from azure.core.exceptions import ResourceNotFoundError
 from azure_storage.blob_adapter import AzureBlobStorageAdapter
+from azure_storage.blob_cache import BlobCache, CacheEntry
+from azure_storage.blob_index import (
+    INDEX_PREFIX,
+    SCRAPED_DATA_SERIES,
+    occupancy_series,
+    parse_blob_name,
+    series_prefix,
+)
+from azure_storage.pagination import decode_token, encode_token
+from azure_storage.rollups import ROLLUP_PREFIX, RollupStore
+from azure_storage.segments import is_segment
 from utils.logger import Logger
 
+# Largest page the Blob service returns for a single listing call
+MAX_PAGE_SIZE = 5000
+# Days without data a descending page may skip before handing back a token
+MAX_MANIFEST_READS_PER_PAGE = 31
+# Length of the collection window stored in each occupancy_data blob
+OCCUPANCY_WINDOW_SECONDS = 300
+# Granularities served from the rollups
+TREND_KINDS = ("hourly", "daily", "weekday_hour")
+# Mutable bookkeeping documents, not served as data blobs
+INTERNAL_PREFIXES = (INDEX_PREFIX, ROLLUP_PREFIX)
+
+
+class BlobPage(list):
+    """List of blob names that also carries the token for the next page."""
+
+    def __init__(self, names=(), continuation_token: Optional[str] = None):
+        super().__init__(names)
+        self.continuation_token = continuation_token
+
 
 class AzureBlobRepository:
     """Repository for persisting scraped data to Azure Blob Storage."""
 
-    def __init__(
-        self,
-        connection_string: str = None
-    ):
+    def __init__(self, connection_string: str = None, cache: BlobCache = None):
         """
         Initialize the Azure Blob repository.
-        
+
         Args:
             connection_string: Azure Storage connection string
+            cache: Optional BlobCache. If not provided, one is created from
+                   BLOB_CACHE_MAX_BYTES and LATEST_CACHE_TTL_SECONDS.
         """
         self.adapter = AzureBlobStorageAdapter(connection_string)
-        self.logger = Logger()
+        self.logger = Logger("repository")
+
+        if cache is None:
+            cache = BlobCache(
+                max_bytes=int(os.getenv("BLOB_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+                latest_ttl_seconds=float(os.getenv("LATEST_CACHE_TTL_SECONDS", 30)),
+            )
+        self.cache = cache
+
+        # Shared, bounded pool for concurrent blob downloads
+        self.download_workers = int(os.getenv("BLOB_DOWNLOAD_WORKERS", 8))
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.download_workers,
+            thread_name_prefix="blob-download",
+        )
 
     def save_data(self, data: dict) -> str:
         """
         Save scraped data to Azure Blob Storage.
-        
+
         Args:
             data: Dictionary containing scraped data
-        
+
         Returns:
             Blob name/path where data was saved
         """
@@ -37,15 +85,14 @@ class AzureBlobRepository:
             enhanced_data = {
                 "timestamp": datetime.utcnow().isoformat(),
                 "source": data.get("url", "unknown"),
-                "data": data
+                "data": data,
             }
-            
+
             blob_name = self.adapter.save_data(enhanced_data)
-            self.logger.log_info(
-                f"Data persisted to Azure Blob Storage: {blob_name}"
-            )
+            self.cache.invalidate_latest(SCRAPED_DATA_SERIES)
+            self.logger.log_info(f"Data persisted to Azure Blob Storage: {blob_name}")
             return blob_name
-        
+
         except Exception as e:
             self.logger.log_error(f"Error saving data: {e}")
             raise
@@ -53,52 +100,548 @@ class AzureBlobRepository:
     def get_latest_data(self):
         """
         Retrieve the most recently scraped data.
-        
+
         Returns:
             Dictionary with latest data or None
         """
         try:
-            data = self.adapter.get_latest_data()
-            if data:
-                self.logger.log_info("Latest data retrieved successfully")
-            return data
-        
+            entry = self.get_latest_entry()
+            if entry is None:
+                return None
+
+            self.logger.log_debug("Latest data retrieved successfully")
+            return entry.data
+
         except Exception as e:
             self.logger.log_error(f"Error retrieving latest data: {e}")
             return None
 
-    def get_all_blobs(self):
+    def get_latest_entry(
+        self, series: str = SCRAPED_DATA_SERIES
+    ) -> Optional[CacheEntry]:
+        """
+        Retrieve the newest blob of a series through the cache.
+
+        Within the TTL the cached entry is returned without touching storage.
+        Afterwards the latest pointer is re-read conditionally on its ETag, so
+        an unchanged pointer costs a bodiless 304 round trip.
+
+        Args:
+            series: Index series name (default: scraped data)
+
+        Returns:
+            CacheEntry of the newest blob, or None if no data exists
+        """
+        entry, pointer_etag, fresh = self.cache.get_latest(series)
+        if entry is not None and fresh:
+            return entry
+
+        pointer, etag, modified = self.adapter.index.read_latest(
+            series, if_none_match=pointer_etag if entry is not None else None
+        )
+        if not modified:
+            self.cache.record_revalidation()
+            self.cache.put_latest(series, entry, pointer_etag)
+            return entry
+
+        if pointer is None:
+            # No index yet: the adapter falls back to a listing and repairs it
+            data = self.adapter.get_latest_data(series)
+            return CacheEntry(data, None, None, 0) if data is not None else None
+
+        entry = self.get_blob_entry(pointer["blob_name"])
+        self.cache.put_latest(series, entry, etag)
+        return entry
+
+    def get_blob_entry(self, blob_name: str) -> CacheEntry:
         """
-        Retrieve list of all scraped data blobs.
-        
+        Retrieve a blob through the LRU cache.
+
+        Data blobs are never modified after they are written, so a cached
+        entry is served as-is. Index and rollup documents change in place
+        and are read through their own stores, never through this path.
+
+        Args:
+            blob_name: Name of the blob to retrieve
+
         Returns:
-            List of blob names
+            CacheEntry with the decoded data and blob version
+
+        Raises:
+            ResourceNotFoundError: If the blob is missing or an index or
+                                   rollup document
         """
+        if blob_name.startswith(INTERNAL_PREFIXES):
+            raise ResourceNotFoundError(f"Not a data blob: {blob_name}")
+
+        entry = self.cache.get(blob_name)
+        if entry is None:
+            entry = self.adapter.retrieve_entry(blob_name)
+            self.cache.put(blob_name, entry)
+        return entry
+
+    def cache_stats(self) -> dict:
+        """
+        Retrieve the cache counters.
+
+        Returns:
+            Dictionary with hit/miss/eviction counters and current usage
+        """
+        return self.cache.stats()
+
+    def get_all_blobs(
+        self,
+        limit: Optional[int] = None,
+        order: str = "asc",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        continuation_token: Optional[str] = None,
+        series: str = SCRAPED_DATA_SERIES,
+    ) -> BlobPage:
+        """
+        Retrieve scraped data blobs, optionally one page at a time.
+
+        Ascending pages are served by the Blob service's own paging; the
+        listing prefix is narrowed to the time window. Descending pages walk
+        the daily manifests of the blob index backwards from the newest day,
+        since the service can only list in ascending order. Either way only
+        one page of names is held in memory.
+
+        Args:
+            limit: Page size, or None to return every matching blob
+            order: "asc" (oldest first) or "desc" (newest first)
+            start: Optional inclusive window start (UTC)
+            end: Optional inclusive window end (UTC)
+            continuation_token: Token of the previous page
+            series: Index series to list (default: scraped data)
+
+        Returns:
+            BlobPage of blob names; its continuation_token is None on the
+            last page
+
+        Raises:
+            ValueError: If order or continuation_token is invalid
+        """
+        if order not in ("asc", "desc"):
+            raise ValueError(f"Invalid order: {order}")
+        state = decode_token(continuation_token) if continuation_token else {}
+        if state and state["order"] != order:
+            raise ValueError("Continuation token does not match the requested order")
+        self._check_position(state, series)
+
         try:
-            blobs = self.adapter.list_blobs(prefix="scraped_data_")
-            self.logger.log_info(f"Retrieved {len(blobs)} blobs")
-            return blobs
-        
+            if order == "asc":
+                names, next_state = self._list_ascending(
+                    series, limit, start, end, state.get("marker")
+                )
+            else:
+                names, next_state = self._list_descending(
+                    series, limit, start, end, state
+                )
+
+            self.logger.log_debug("Retrieved %d blobs", len(names))
+            next_token = None
+            if next_state is not None:
+                next_token = encode_token({"order": order, **next_state})
+            return BlobPage(names, next_token)
+
         except Exception as e:
             self.logger.log_error(f"Error listing blobs: {e}")
-            return []
+            return BlobPage()
+
+    @staticmethod
+    def _check_position(state: dict, series: str) -> None:
+        """Reject a decoded continuation token whose position is malformed."""
+        try:
+            marker = state.get("marker")
+            if marker is not None and not isinstance(marker, str):
+                raise ValueError(marker)
+            before = state.get("before")
+            if before is not None and (parse_blob_name(before) or (None,))[0] != series:
+                raise ValueError(before)
+            if state.get("day") is not None:
+                date.fromisoformat(state["day"])
+        except (TypeError, ValueError):
+            raise ValueError("Invalid continuation token") from None
+
+    def _list_ascending(
+        self,
+        series: str,
+        limit: Optional[int],
+        start: Optional[datetime],
+        end: Optional[datetime],
+        marker: Optional[str],
+    ) -> Tuple[List[str], Optional[dict]]:
+        """List one ascending page through the service's continuation markers."""
+        prefix = series_prefix(series, start, end)
+        names = []
+
+        while True:
+            page_size = MAX_PAGE_SIZE if limit is None else limit - len(names)
+            page, marker = self.adapter.list_blobs_page(prefix, page_size, marker)
+
+            for name in page:
+                parsed = parse_blob_name(name)
+                if parsed is None or parsed[0] != series:
+                    continue
+                if start is not None and parsed[1] < start:
+                    continue
+                if end is not None and parsed[1] > end:
+                    return names, None
+                names.append(name)
+
+            if marker is None:
+                return names, None
+            if limit is not None and len(names) >= limit:
+                return names, {"marker": marker}
+
+    def _list_descending(
+        self,
+        series: str,
+        limit: Optional[int],
+        start: Optional[datetime],
+        end: Optional[datetime],
+        state: dict,
+    ) -> Tuple[List[str], Optional[dict]]:
+        """List one descending page by walking daily manifests backwards."""
+        before = state.get("before")
+        index = self.adapter.index
+        pointer = index.get_latest(series)
+        if pointer is None:
+            # Index never built for this container; build it once
+            self.adapter.rebuild_index()
+            pointer = index.get_latest(series)
+            if pointer is None:
+                return [], None
+
+        first_day = date.fromisoformat(pointer["first_date"])
+        if start is not None:
+            first_day = max(first_day, start.date())
+
+        day = datetime.fromisoformat(pointer["timestamp"]).date()
+        if end is not None:
+            day = min(day, end.date())
+        if before is not None:
+            day = min(day, parse_blob_name(before)[1].date())
+        elif state.get("day") is not None:
+            day = min(day, date.fromisoformat(state["day"]))
+
+        names = []
+        manifest_reads = 0
+        while day >= first_day:
+            if manifest_reads >= MAX_MANIFEST_READS_PER_PAGE:
+                if names:
+                    return names, {"before": names[-1]}
+                return names, {"day": day.isoformat()}
+            manifest_reads += 1
+
+            for name in reversed(index.get_manifest(series, day.isoformat())):
+                timestamp = parse_blob_name(name)[1]
+                if before is not None and name >= before:
+                    continue
+                if end is not None and timestamp > end:
+                    continue
+                if start is not None and timestamp < start:
+                    return names, None
+
+                names.append(name)
+                if limit is not None and len(names) >= limit:
+                    return names, {"before": name}
+
+            day -= timedelta(days=1)
+
+        return names, None
+
+    def get_occupancy_windows(
+        self, uid: str, start: datetime, end: datetime
+    ) -> List[dict]:
+        """
+        Retrieve the window documents of a UID that overlap a time range.
+
+        Args:
+            uid: CrowdMonitor location UID (e.g. 'SSD-7')
+            start: Inclusive range start (UTC)
+            end: Inclusive range end (UTC)
+
+        Returns:
+            Window documents ({'window', 'target_uid', 'updates', ...}) in
+            time order
+        """
+        return [
+            document
+            for _, document in self.get_named_occupancy_windows(uid, start, end)
+        ]
+
+    def get_named_occupancy_windows(
+        self, uid: str, start: datetime, end: datetime
+    ) -> List[Tuple[str, dict]]:
+        """
+        Retrieve the window documents of a UID together with their blob names.
+
+        Blobs are resolved from the daily manifests of the blob index. Days
+        that were compacted are read from their segment (one download per
+        day); windows written after the compaction are read individually.
+        All downloads go concurrently through the shared worker pool (and
+        the blob cache).
+
+        Args:
+            uid: CrowdMonitor location UID (e.g. 'SSD-7')
+            start: Inclusive range start (UTC)
+            end: Inclusive range end (UTC)
+
+        Returns:
+            (blob name, window document) pairs in time order; windows read
+            from a segment carry the name of their original blob
+        """
+        series = occupancy_series(uid)
+        # A window blob is named after its start, so include the one open at start
+        window_start = start - timedelta(seconds=OCCUPANCY_WINDOW_SECONDS)
+
+        days = []
+        day = window_start.date()
+        while day <= end.date():
+            days.append(day.isoformat())
+            day += timedelta(days=1)
+
+        manifests = list(
+            self.executor.map(
+                lambda d: self.adapter.index.get_manifest_document(series, d), days
+            )
+        )
+
+        if not any(manifests) and self.adapter.index.get_latest(series) is None:
+            # No index yet: fall back to a listing
+            blob_names = list(
+                self.get_all_blobs(start=window_start, end=end, series=series)
+            )
+        else:
+            blob_names = []
+            for manifest in manifests:
+                if not manifest:
+                    continue
+                compacted = set(manifest.get("segment_blobs", []))
+                if manifest.get("segment"):
+                    blob_names.append(manifest["segment"])
+                blob_names.extend(
+                    name
+                    for name in manifest.get("blobs", [])
+                    if name not in compacted
+                    and window_start <= parse_blob_name(name)[1] <= end
+                )
+
+        windows = []
+        for name, entry in zip(
+            blob_names, self.executor.map(self.get_entry_by_blob_name, blob_names)
+        ):
+            if entry is None:
+                continue
+            if is_segment(name):
+                windows.extend(zip(entry.data["blob_names"], entry.data["windows"]))
+            else:
+                windows.append((name, entry.data))
+
+        windows.sort(key=lambda window: window[0])
+        return [
+            (name, document)
+            for name, document in windows
+            if window_start <= parse_blob_name(name)[1] <= end
+        ]
+
+    def get_occupancy_updates(
+        self, uid: str, start: datetime, end: datetime
+    ) -> List[dict]:
+        """
+        Retrieve every occupancy update of a UID within a time range.
+
+        Args:
+            uid: CrowdMonitor location UID (e.g. 'SSD-7')
+            start: Inclusive range start (UTC)
+            end: Inclusive range end (UTC)
+
+        Returns:
+            List of {'occupancy': int, 'timestamp': str} dicts sorted by time
+        """
+        windows = self.get_occupancy_windows(uid, start, end)
+
+        # Windows are in time order; overlapping windows from a late timer
+        # run only contribute readings newer than the last one kept
+        last_timestamp = start.isoformat()
+        end_iso = end.isoformat()
+        updates = []
+        for window in windows:
+            for update in window.get("updates", []):
+                timestamp = update["timestamp"]
+                if last_timestamp <= timestamp <= end_iso:
+                    if updates and timestamp == last_timestamp:
+                        continue
+                    updates.append(update)
+                    last_timestamp = timestamp
+
+        self.logger.log_debug(
+            "Retrieved %d updates from %d windows for %s",
+            len(updates),
+            len(windows),
+            uid,
+        )
+        return updates
+
+    def get_trends(
+        self,
+        uid: str,
+        kind: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> List[dict]:
+        """
+        Retrieve occupancy trends of a UID from the precomputed rollups.
+
+        Hourly and daily trends read one rollup document per local day or
+        month of the range (concurrently); the weekday x hour profile is a
+        single document covering all data, so the range is ignored. Days
+        not yet in the derived daily and weekday-hour documents are added
+        from their hourly rollups.
+
+        Args:
+            uid: CrowdMonitor location UID (e.g. 'SSD-7')
+            kind: 'hourly', 'daily' or 'weekday_hour'
+            start: Inclusive range start (UTC); required unless weekday_hour
+            end: Inclusive range end (UTC); required unless weekday_hour
+
+        Returns:
+            List of {'bucket': key, 'count', 'min', 'max', 'avg', 'p50',
+            'p90', 'p99'} in bucket order. Keys are local 'YYYY-MM-DDTHH'
+            (hourly), 'YYYY-MM-DD' (daily) or '<weekday>-<HH>' with Monday = 0
+            (weekday_hour).
+
+        Raises:
+            ValueError: If kind is unknown or the range is missing
+        """
+        if kind not in TREND_KINDS:
+            raise ValueError(f"Invalid trend kind: {kind}")
+
+        series = occupancy_series(uid)
+        rollups = self.adapter.rollups
+
+        if kind == "weekday_hour":
+            buckets = rollups.get_weekday_hour_buckets(series)
+            return [
+                {"bucket": key, **buckets[key].summary()} for key in sorted(buckets)
+            ]
+
+        if start is None or end is None:
+            raise ValueError(f"A time range is required for {kind} trends")
+
+        first = rollups.local_time(start.isoformat())
+        last = rollups.local_time(end.isoformat())
+        if kind == "hourly":
+            low, high = first.strftime("%Y-%m-%dT%H"), last.strftime("%Y-%m-%dT%H")
+        else:
+            low, high = first.strftime("%Y-%m-%d"), last.strftime("%Y-%m-%d")
+
+        periods = []
+        day = first.date()
+        while day <= last.date():
+            period = day.isoformat() if kind == "hourly" else day.isoformat()[:7]
+            if period not in periods:
+                periods.append(period)
+            day += timedelta(days=1)
+
+        if kind == "hourly":
+            names = [rollups.hourly_blob_name(series, period) for period in periods]
+            documents = self.executor.map(rollups.get_buckets, names)
+        else:
+            documents = self.executor.map(
+                functools.partial(rollups.get_daily_buckets, series), periods
+            )
+
+        trends = []
+        for period, buckets in zip(periods, documents):
+            for key in sorted(buckets):
+                bucket = f"{period}T{key}" if kind == "hourly" else key
+                if low <= bucket <= high:
+                    trends.append({"bucket": bucket, **buckets[key].summary()})
+
+        self.logger.log_debug(
+            "Retrieved %d %s trend buckets from %d rollups",
+            len(trends),
+            kind,
+            len(periods),
+        )
+        return trends
 
     def get_data_by_blob_name(self, blob_name: str):
         """
         Retrieve data by specific blob name.
-        
+
         Args:
             blob_name: Name of the blob to retrieve
-        
+
         Returns:
             Dictionary with blob data
         """
+        entry = self.get_entry_by_blob_name(blob_name)
+        return entry.data if entry is not None else None
+
+    def get_entry_by_blob_name(self, blob_name: str) -> Optional[CacheEntry]:
+        """
+        Retrieve data and blob version by specific blob name.
+
+        Args:
+            blob_name: Name of the blob to retrieve
+
+        Returns:
+            CacheEntry with blob data and version, or None
+        """
         try:
-            data = self.adapter.retrieve_data(blob_name)
-            return data
-        
+            return self.get_blob_entry(blob_name)
+
         except Exception as e:
-            self.logger.log_error(
-                f"Error retrieving data for blob {blob_name}: {e}"
-            )
+            self.logger.log_error(f"Error retrieving data for blob {blob_name}: {e}")
             return None
+
+    def iter_blob_entries(
+        self, blob_names: Iterable[str], max_in_flight: Optional[int] = None
+    ) -> Iterator[Tuple[str, Optional[CacheEntry], Optional[Exception]]]:
+        """
+        Download blobs concurrently, yielding the results in request order.
+
+        Downloads go through the shared worker pool and the blob cache. At
+        most max_in_flight downloads run ahead of the consumer, so a large
+        batch never holds more than that many decoded blobs in memory.
+
+        Args:
+            blob_names: Names of the blobs to retrieve
+            max_in_flight: Downloads submitted ahead of the consumer
+                           (default: twice BLOB_DOWNLOAD_WORKERS)
+
+        Yields:
+            (blob name, CacheEntry, None) for each retrieved blob and
+            (blob name, None, exception) for each failed one
+        """
+        if max_in_flight is None:
+            max_in_flight = 2 * self.download_workers
+
+        pending = deque()
+        names = iter(blob_names)
+        try:
+            while True:
+                for name in names:
+                    future = self.executor.submit(self.get_blob_entry, name)
+                    pending.append((name, future))
+                    if len(pending) >= max_in_flight:
+                        break
+                if not pending:
+                    return
+
+                name, future = pending.popleft()
+                try:
+                    entry = future.result()
+                except Exception as e:
+                    self.logger.log_error(f"Error retrieving data for blob {name}: {e}")
+                    yield name, None, e
+                else:
+                    yield name, entry, None
+        finally:
+            # Consumer gone (e.g. client disconnected): drop queued downloads
+            for _, future in pending:
+                future.cancel()
@@ -0,0 +1,470 @@
+"""Incrementally maintained hourly, daily and weekday-hour rollups."""
+
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+from azure.core.exceptions import ResourceNotModifiedError
+from azure_storage.documents import JsonDocumentStore
+from utils.statistics import SummaryStats
+
+ROLLUP_PREFIX = "_rollups/"
+DEFAULT_TIMEZONE = "Europe/Zurich"
+# Local days that may still receive windows (today and yesterday); they are
+# read from the hourly rollups until a refresh folds them
+OPEN_DAYS = 2
+
+
+def _merge_bucket(buckets: dict, key: str, stats: SummaryStats) -> None:
+    """Merge statistics into a serialized bucket of a rollup document."""
+    if key in buckets:
+        merged = SummaryStats.from_dict(buckets[key])
+        merged.merge(stats)
+    else:
+        merged = stats
+    buckets[key] = merged.to_dict()
+
+
+def _days_between(after: str, through: str) -> List[str]:
+    """Return the local days after `after` up to and including `through`."""
+    days = []
+    day, last = date.fromisoformat(after), date.fromisoformat(through)
+    while day < last:
+        day += timedelta(days=1)
+        days.append(day.isoformat())
+    return days
+
+
+def _day_stats(hours: Dict[str, SummaryStats]) -> SummaryStats:
+    """Merge the hourly buckets of a local day into one daily bucket."""
+    stats = SummaryStats()
+    for bucket in hours.values():
+        stats.merge(bucket)
+    return stats
+
+
+def _add_weekday_hours(
+    day: str, hours: Dict[str, SummaryStats], weekday_hours: Dict[str, SummaryStats]
+) -> None:
+    """Add the hourly buckets of a local day to weekday-hour buckets."""
+    weekday = date.fromisoformat(day).weekday()
+    for hour, stats in hours.items():
+        weekday_hours.setdefault(f"{weekday}-{hour}", SummaryStats()).merge(stats)
+
+
+class RollupStore(JsonDocumentStore):
+    """
+    Rollup documents of an occupancy series, updated on every window write.
+
+    Layout (per series, keyed in local time):
+        _rollups/<series>/hourly/<YYYY-MM-DD>.json  -> buckets "00".."23"
+        _rollups/<series>/daily/<YYYY-MM>.json      -> buckets "YYYY-MM-DD"
+        _rollups/<series>/weekday_hour.json         -> buckets "<weekday>-<hour>"
+
+    Buckets hold mergeable state (count, sum, min, max and a quantile
+    sketch), so a new window is folded in without rereading raw windows.
+    Each hourly document remembers which windows it contains, which makes
+    merging the same window twice a no-op.
+
+    Windows are only merged into the hourly documents, in one atomic update
+    per day. refresh_derived() (run by the daily compaction timer) folds
+    the hourly documents of closed days into the daily and weekday-hour
+    documents, which record the folded days and the last of them
+    ('through'); later days are read from their hourly documents when the
+    buckets are read. A crash or a lost ETag race can therefore never leave
+    a window counted in one rollup but not in another.
+    """
+
+    def __init__(self, container_client, tz: str = None):
+        """
+        Initialize the store.
+
+        Args:
+            container_client: ContainerClient of the data container
+            tz: Time zone of the bucket keys (default: ROLLUP_TIMEZONE or
+                Europe/Zurich)
+        """
+        super().__init__(container_client)
+        self.tz = ZoneInfo(tz or os.getenv("ROLLUP_TIMEZONE", DEFAULT_TIMEZONE))
+
+    @staticmethod
+    def hourly_blob_name(series: str, day: str) -> str:
+        """Return the name of the hourly rollup of a series for a local day."""
+        return f"{RollupStore.hourly_prefix(series)}{day}.json"
+
+    @staticmethod
+    def hourly_prefix(series: str) -> str:
+        """Return the common prefix of the hourly rollups of a series."""
+        return f"{ROLLUP_PREFIX}{series}/hourly/"
+
+    @staticmethod
+    def daily_blob_name(series: str, month: str) -> str:
+        """Return the name of the daily rollup of a series for a local month."""
+        return f"{ROLLUP_PREFIX}{series}/daily/{month}.json"
+
+    @staticmethod
+    def weekday_hour_blob_name(series: str) -> str:
+        """Return the name of the weekday x hour rollup of a series."""
+        return f"{ROLLUP_PREFIX}{series}/weekday_hour.json"
+
+    def local_time(self, timestamp: str) -> datetime:
+        """Convert a naive UTC ISO timestamp into the rollup time zone."""
+        return (
+            datetime.fromisoformat(timestamp)
+            .replace(tzinfo=timezone.utc)
+            .astimezone(self.tz)
+        )
+
+    def _group_by_hour(self, window: dict) -> Dict[Tuple[str, int], SummaryStats]:
+        """Summarize the updates of a window per local (day, hour)."""
+        groups: Dict[Tuple[str, int], SummaryStats] = {}
+        for update in window.get("updates", []):
+            local = self.local_time(update["timestamp"])
+            key = (local.date().isoformat(), local.hour)
+            groups.setdefault(key, SummaryStats()).add(update["occupancy"])
+        return groups
+
+    def merge_window(self, series: str, blob_name: str, window: dict) -> bool:
+        """
+        Fold a freshly written window into every rollup of its series.
+
+        Args:
+            series: Index series of the window (occupancy_data/<uid>)
+            blob_name: Name of the window blob
+            window: Window document with its 'updates'
+
+        Returns:
+            True if the window was merged, False if it had been merged before
+        """
+        return self.merge_windows(series, [(blob_name, window)]) > 0
+
+    def merge_windows(self, series: str, windows: Iterable[Tuple[str, dict]]) -> int:
+        """
+        Fold a batch of windows into the hourly rollups of their series.
+
+        Every hourly document touched by the batch is updated once, so bulk
+        writers (e.g. the CSV importer) do not race each other. Windows
+        merged before are skipped.
+
+        Args:
+            series: Index series of the windows (occupancy_data/<uid>)
+            windows: (blob name, window document) pairs
+
+        Returns:
+            Number of windows merged
+        """
+        # day -> blob name -> hour -> statistics
+        days: Dict[str, Dict[str, Dict[int, SummaryStats]]] = {}
+        for blob_name, window in windows:
+            for (day, hour), stats in self._group_by_hour(window).items():
+                days.setdefault(day, {}).setdefault(blob_name, {})[hour] = stats
+
+        merged = set()
+        for day, blobs in days.items():
+            applied: List[str] = []
+
+            def merge_hours(document, blobs=blobs, applied=applied):
+                applied.clear()
+                for blob_name, hours in blobs.items():
+                    if blob_name in document["windows"]:
+                        continue
+                    document["windows"].append(blob_name)
+                    applied.append(blob_name)
+                    for hour, stats in hours.items():
+                        _merge_bucket(document["buckets"], f"{hour:02d}", stats)
+                return document if applied else None
+
+            if self._update(
+                self.hourly_blob_name(series, day),
+                merge_hours,
+                {"series": series, "date": day, "windows": [], "buckets": {}},
+            ):
+                merged.update(applied)
+
+        return len(merged)
+
+    def refresh_derived(self, series: str, since: Optional[str] = None) -> int:
+        """
+        Fold the hourly rollups of newly closed days into the derived ones.
+
+        Only the hourly documents of the days closed since the previous
+        refresh are read. Statistics cannot be subtracted, so if days that
+        were already folded changed (e.g. by an import of old readings), the
+        derived rollups are recomputed from every hourly document instead.
+        A refresh is safe to repeat or to run after an interrupted one.
+
+        Args:
+            series: Index series name
+            since: Earliest local day (YYYY-MM-DD) whose hourly rollup changed
+                   after it might have been folded, if any
+
+        Returns:
+            Number of days with data folded
+        """
+        through = self._closed_through()
+        state, _ = self._read(self.weekday_hour_blob_name(series))
+        folded_through = state.get("through") if state else None
+        if folded_through is not None and (since is None or since > folded_through):
+            days = _days_between(folded_through, through)
+            if not days:
+                return 0
+        else:
+            state = None
+            days = [day for day in self._listed_days(series) if day <= through]
+
+        hourly = {}
+        for day in days:
+            document, _ = self._read(self.hourly_blob_name(series, day))
+            if document is not None:
+                hourly[day] = document
+        self._write_derived(series, days, hourly, through, state)
+        self.logger.log_info(
+            f"Folded {len(hourly)} days into the derived rollups of {series}"
+        )
+        return len(hourly)
+
+    def get_daily_buckets(self, series: str, month: str) -> Dict[str, SummaryStats]:
+        """
+        Read the per-day buckets of a local month.
+
+        Args:
+            series: Index series name
+            month: Local month in YYYY-MM format
+
+        Returns:
+            Mapping of 'YYYY-MM-DD' to SummaryStats (empty if no data)
+        """
+        document, _ = self._read(self.daily_blob_name(series, month))
+        buckets = self._stats(document)
+        if document is not None and "through" in document:
+            first = date.fromisoformat(f"{month}-01")
+            last = (first + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+            days = _days_between(
+                max(document["through"], (first - timedelta(days=1)).isoformat()),
+                min(last, self._today()).isoformat(),
+            )
+        else:
+            days = self._listed_days(series, month)
+
+        for day, hours in self._hourly_stats(series, days):
+            buckets[day] = _day_stats(hours)
+        return buckets
+
+    def get_weekday_hour_buckets(self, series: str) -> Dict[str, SummaryStats]:
+        """
+        Read the weekday x hour buckets covering all data of a series.
+
+        Returns:
+            Mapping of '<weekday>-<HH>' (Monday = 0) to SummaryStats
+        """
+        document, _ = self._read(self.weekday_hour_blob_name(series))
+        weekday_hours = self._stats(document)
+        folded = document.get("days", {}) if document else {}
+        if document is not None and "through" in document:
+            days = _days_between(document["through"], self._today().isoformat())
+        else:
+            days = self._listed_days(series)
+
+        for day, hours in self._hourly_stats(series, days):
+            if day not in folded:
+                _add_weekday_hours(day, hours, weekday_hours)
+        return weekday_hours
+
+    def _today(self) -> date:
+        """Return the current local date."""
+        return datetime.now(self.tz).date()
+
+    def _closed_through(self) -> str:
+        """Return the last local day that no longer receives windows."""
+        return (self._today() - timedelta(days=OPEN_DAYS)).isoformat()
+
+    def _listed_days(self, series: str, prefix: str = "") -> List[str]:
+        """List the local days with an hourly rollup, optionally by prefix."""
+        start = len(self.hourly_prefix(series))
+        return [
+            blob.name[start : -len(".json")]
+            for blob in self.container_client.list_blobs(
+                name_starts_with=self.hourly_prefix(series) + prefix
+            )
+        ]
+
+    def _hourly_stats(
+        self, series: str, days: Iterable[str]
+    ) -> Iterator[Tuple[str, Dict[str, SummaryStats]]]:
+        """Yield (day, hourly buckets) of the days that have an hourly rollup."""
+        for day in days:
+            document, _ = self._read(self.hourly_blob_name(series, day))
+            if document is not None:
+                yield day, self._stats(document)
+
+    @staticmethod
+    def _stats(document: Optional[dict]) -> Dict[str, SummaryStats]:
+        """Deserialize the buckets of a document (empty if missing)."""
+        if document is None:
+            return {}
+        return {
+            key: SummaryStats.from_dict(bucket)
+            for key, bucket in document["buckets"].items()
+        }
+
+    def _write_derived(
+        self,
+        series: str,
+        days: List[str],
+        hourly: Dict[str, dict],
+        through: str,
+        state: Optional[dict] = None,
+    ) -> List[str]:
+        """
+        Fold hourly documents into the daily and weekday-hour documents.
+
+        Daily buckets are replaced and days already in the weekday-hour
+        document are skipped, so folding a day twice changes nothing. The
+        weekday-hour document, which holds the watermark, is written last.
+
+        Args:
+            series: Index series name
+            days: Local days to fold, including days without data
+            hourly: Hourly documents of the days with data
+            through: Last local day covered after the fold
+            state: Weekday-hour document to extend (None: start over)
+
+        Returns:
+            Names of the written documents
+        """
+        months: Dict[str, List[str]] = {}
+        for day in days:
+            months.setdefault(day[:7], []).append(day)
+
+        written = []
+        for month, month_days in sorted(months.items()):
+            name = self.daily_blob_name(series, month)
+            document = self._read(name)[0] if state is not None else None
+            buckets = self._stats(document)
+            counts = dict(document["days"]) if document else {}
+            for day in month_days:
+                if day in hourly:
+                    buckets[day] = _day_stats(self._stats(hourly[day]))
+                    counts[day] = len(hourly[day]["windows"])
+            if document is None and not buckets:
+                continue
+            self._write(
+                name,
+                {
+                    "series": series,
+                    "month": month,
+                    "through": through,
+                    "days": counts,
+                    "buckets": {day: stats.to_dict() for day, stats in buckets.items()},
+                },
+            )
+            written.append(name)
+
+        weekday_hours = self._stats(state)
+        folded = dict(state["days"]) if state else {}
+        for day, document in hourly.items():
+            if day not in folded:
+                _add_weekday_hours(day, self._stats(document), weekday_hours)
+                folded[day] = len(document["windows"])
+
+        name = self.weekday_hour_blob_name(series)
+        self._write(
+            name,
+            {
+                "series": series,
+                "through": through,
+                "days": folded,
+                "buckets": {
+                    key: stats.to_dict() for key, stats in weekday_hours.items()
+                },
+            },
+        )
+        written.append(name)
+        return written
+
+    def read_document(
+        self, blob_name: str, if_none_match: Optional[str] = None
+    ) -> Tuple[Optional[dict], Optional[str], bool]:
+        """
+        Conditionally read a rollup document.
+
+        Args:
+            blob_name: Name of the rollup document
+            if_none_match: ETag of a previously read version, if any
+
+        Returns:
+            (document, etag, modified) tuple; when the document still matches
+            if_none_match, modified is False and no body is transferred
+        """
+        try:
+            document, etag = self._read(blob_name, if_none_match=if_none_match)
+            return document, etag, True
+        except ResourceNotModifiedError:
+            return None, if_none_match, False
+
+    def get_buckets(self, blob_name: str) -> Dict[str, SummaryStats]:
+        """
+        Read the buckets of a rollup document.
+
+        Args:
+            blob_name: Name of the rollup document
+
+        Returns:
+            Mapping of bucket key to SummaryStats (empty if missing)
+        """
+        document, _ = self._read(blob_name)
+        return self._stats(document)
+
+    def rebuild(self, series: str, windows: Iterable[Tuple[str, dict]]) -> int:
+        """
+        Regenerate every rollup of a series from its raw windows.
+
+        Args:
+            series: Index series name
+            windows: (blob name, window document) pairs
+
+        Returns:
+            Number of windows folded into the rollups
+        """
+        hourly: Dict[str, dict] = {}
+        count = 0
+
+        for blob_name, window in windows:
+            count += 1
+            for (day, hour), stats in self._group_by_hour(window).items():
+                document = hourly.setdefault(day, {"windows": set(), "buckets": {}})
+                document["windows"].add(blob_name)
+                document["buckets"].setdefault(f"{hour:02d}", SummaryStats()).merge(
+                    stats
+                )
+
+        documents = {
+            day: {
+                "series": series,
+                "date": day,
+                "windows": sorted(document["windows"]),
+                "buckets": {
+                    hour: stats.to_dict() for hour, stats in document["buckets"].items()
+                },
+            }
+            for day, document in hourly.items()
+        }
+        written = set()
+        for day, document in documents.items():
+            name = self.hourly_blob_name(series, day)
+            self._write(name, document)
+            written.add(name)
+        through = self._closed_through()
+        closed = {
+            day: document for day, document in documents.items() if day <= through
+        }
+        written.update(self._write_derived(series, sorted(closed), closed, through))
+
+        for blob in self.container_client.list_blobs(
+            name_starts_with=f"{ROLLUP_PREFIX}{series}/"
+        ):
+            if blob.name not in written:
+                self._delete(blob.name)
+
+        self.logger.log_info(f"Rebuilt rollups of {series} from {count} windows")
+        return count
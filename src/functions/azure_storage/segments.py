@@ -0,0 +1,182 @@
+"""
+Columnar daily segments of occupancy windows.
+
+A segment packs every 5-minute window blob of one UID and day into a single
+blob. Window metadata (window bounds, statistics, source blob names) is kept
+as JSON, while the updates are stored as two typed columns:
+
+    timestamps  int64 microseconds since the epoch, delta encoded
+    occupancy   int16
+
+Layout:
+    MAGIC | uint32 meta length | meta JSON
+          | uint32 length | zlib(timestamps) | uint32 length | zlib(occupancy)
+
+Decoding reproduces the source window documents exactly, which is what the
+compaction job verifies before it trusts a segment.
+"""
+
+import json
+import struct
+import sys
+import zlib
+from array import array
+from typing import List, Tuple
+from azure_storage.update_encoding import from_micros, to_micros
+
+SEGMENT_PREFIX = "segments/"
+SEGMENT_SUFFIX = ".seg"
+MAGIC = b"BOSEG\x01"
+
+_LENGTH = struct.Struct("<I")
+
+
+def segment_blob_name(series: str, day: str) -> str:
+    """Return the blob name of the segment of a series for a day."""
+    return f"{SEGMENT_PREFIX}{series}/{day}{SEGMENT_SUFFIX}"
+
+
+def is_segment(blob_name: str) -> bool:
+    """Return whether a blob name refers to a segment."""
+    return blob_name.startswith(SEGMENT_PREFIX) and blob_name.endswith(SEGMENT_SUFFIX)
+
+
+def _pack_column(values: array) -> bytes:
+    """Serialize a typed column as little-endian, zlib-compressed bytes."""
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    compressed = zlib.compress(values.tobytes(), 6)
+    return _LENGTH.pack(len(compressed)) + compressed
+
+
+def _unpack_column(typecode: str, raw: bytes, offset: int) -> Tuple[array, int]:
+    """Read a column written by _pack_column(), returning (values, new offset)."""
+    (length,) = _LENGTH.unpack_from(raw, offset)
+    offset += _LENGTH.size
+    values = array(typecode)
+    values.frombytes(zlib.decompress(raw[offset : offset + length]))
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values, offset + length
+
+
+def encode_segment(
+    series: str, day: str, windows: List[Tuple[str, dict]], source_bytes: int = 0
+) -> bytes:
+    """
+    Pack window documents into a segment.
+
+    Args:
+        series: Index series of the windows (occupancy_data/<uid>)
+        day: Day the windows belong to (YYYY-MM-DD)
+        windows: (blob name, window document) pairs in time order
+        source_bytes: Total size of the source blobs, kept for cache sizing
+
+    Returns:
+        Encoded segment bytes
+
+    Raises:
+        ValueError: If an update cannot be represented losslessly
+    """
+    timestamps = array("q")
+    occupancy = array("h")
+    metadata = []
+    previous = 0
+
+    for blob_name, document in windows:
+        updates = document.get("updates", [])
+        for update in updates:
+            if set(update) != {"occupancy", "timestamp"}:
+                raise ValueError(f"Unsupported update fields in {blob_name}: {update}")
+            value = update["occupancy"]
+            if type(value) is not int or not -32768 <= value <= 32767:
+                raise ValueError(
+                    f"Occupancy out of int16 range in {blob_name}: {value}"
+                )
+
+            micros = to_micros(update["timestamp"])
+            if from_micros(micros) != update["timestamp"]:
+                raise ValueError(
+                    f"Timestamp does not round-trip in {blob_name}: {update['timestamp']}"
+                )
+
+            timestamps.append(micros - previous)
+            occupancy.append(value)
+            previous = micros
+
+        window = {key: value for key, value in document.items() if key != "updates"}
+        metadata.append(
+            {"blob_name": blob_name, "count": len(updates), "document": window}
+        )
+
+    meta = json.dumps(
+        {
+            "series": series,
+            "date": day,
+            "source_bytes": source_bytes,
+            "windows": metadata,
+        },
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+    return b"".join(
+        [
+            MAGIC,
+            _LENGTH.pack(len(meta)),
+            meta,
+            _pack_column(timestamps),
+            _pack_column(occupancy),
+        ]
+    )
+
+
+def decode_segment(raw: bytes) -> dict:
+    """
+    Unpack a segment into its window documents.
+
+    Args:
+        raw: Bytes produced by encode_segment()
+
+    Returns:
+        Dictionary with 'series', 'date', 'source_bytes', 'blob_names' and
+        'windows' (the reconstructed window documents, in time order)
+
+    Raises:
+        ValueError: If the bytes are not a segment
+    """
+    if not raw.startswith(MAGIC):
+        raise ValueError("Not an occupancy segment")
+
+    offset = len(MAGIC)
+    (meta_length,) = _LENGTH.unpack_from(raw, offset)
+    offset += _LENGTH.size
+    meta = json.loads(raw[offset : offset + meta_length])
+    offset += meta_length
+
+    deltas, offset = _unpack_column("q", raw, offset)
+    occupancy, offset = _unpack_column("h", raw, offset)
+
+    blob_names = []
+    windows = []
+    position = 0
+    micros = 0
+    for window in meta["windows"]:
+        updates = []
+        for index in range(position, position + window["count"]):
+            micros += deltas[index]
+            updates.append(
+                {"occupancy": occupancy[index], "timestamp": from_micros(micros)}
+            )
+        position += window["count"]
+
+        blob_names.append(window["blob_name"])
+        windows.append({**window["document"], "updates": updates})
+
+    return {
+        "series": meta["series"],
+        "date": meta["date"],
+        "source_bytes": meta["source_bytes"],
+        "blob_names": blob_names,
+        "windows": windows,
+    }
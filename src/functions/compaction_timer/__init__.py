@@ -0,0 +1,65 @@
+"""
+Azure Function compacting yesterday's occupancy windows into daily segments
+and refreshing the daily and weekday-hour rollups.
+Triggered by timer every day at 00:30 UTC.
+"""
+
+import azure.functions as func
+import os
+import time
+from datetime import datetime, timedelta
+
+from azure_storage.blob_adapter import AzureBlobStorageAdapter
+from azure_storage.blob_index import occupancy_series
+from azure_storage.compaction import SegmentCompactor
+from utils.logger import Logger
+
+
+def main(mytimer: func.TimerRequest) -> None:
+    """
+    Compact the previous UTC day of every monitored UID, then derive its
+    daily and weekday-hour rollups from the hourly ones. A failing UID is
+    logged and skipped; the run fails once every UID was attempted.
+
+    Configuration:
+        TARGET_UID: Comma-separated UIDs to compact (default 'SSD-7')
+        COMPACTION_DELETE_SOURCES: 'true' to delete verified window blobs
+
+    Args:
+        mytimer: Timer trigger object with schedule and isPastDue info
+    """
+    logger = Logger()
+    start_time = time.time()
+
+    if mytimer.past_due:
+        logger.log_info("Timer is past due!")
+
+    day = (datetime.utcnow() - timedelta(days=1)).strftime("%Y-%m-%d")
+    uids = [uid.strip() for uid in os.getenv("TARGET_UID", "SSD-7").split(",")]
+    delete_sources = os.getenv("COMPACTION_DELETE_SOURCES", "false").lower() == "true"
+
+    try:
+        adapter = AzureBlobStorageAdapter(os.getenv("AZURE_STORAGE_CONNECTION_STRING"))
+        compactor = SegmentCompactor(adapter)
+
+        # A failing UID must not keep the others from being compacted
+        failed = []
+        for uid in uids:
+            try:
+                segment_name = compactor.compact_day(uid, day, delete_sources)
+                logger.log_info(f"Compaction of {uid} on {day}: {segment_name}")
+                days = adapter.rollups.refresh_derived(occupancy_series(uid))
+                logger.log_info(f"Folded {days} new days into the rollups of {uid}")
+            except Exception as e:
+                logger.log_error(f"Error compacting {uid} on {day}: {e}")
+                failed.append(uid)
+
+        if failed:
+            raise RuntimeError(f"Compaction failed for {', '.join(failed)}")
+        logger.log_info(f"Compaction completed in {time.time() - start_time:.2f}s")
+
+    except Exception as e:
+        logger.log_error(
+            f"Error during compaction after {time.time() - start_time:.2f}s: {e}"
+        )
+        raise
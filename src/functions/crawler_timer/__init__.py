@@ -16,6 +16,33 @@ from scraper.fetcher import Fetcher
 from scraper.parser import Parser
 from azure_storage.repository import AzureBlobRepository
 from utils.logger import Logger
+from utils.metrics import counter, histogram
+
+STAGE_SECONDS = histogram(
+    "crawler_stage_seconds", "Duration of the crawler stages", ["stage"]
+)
+RUNS = counter("crawler_runs_total", "Crawler executions", ["result"])
+
+# Reused across warm invocations (storage clients are shared process-wide;
+# the fetcher keeps its connection pool and the validators of the page)
+_repository = None
+_fetcher = None
+
+
+def _get_repository() -> AzureBlobRepository:
+    """Return the module-level repository, creating it on first use."""
+    global _repository
+    if _repository is None:
+        _repository = AzureBlobRepository(os.getenv("AZURE_STORAGE_CONNECTION_STRING"))
+    return _repository
+
+
+def _get_fetcher() -> Fetcher:
+    """Return the module-level fetcher, creating it on first use."""
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = Fetcher()
+    return _fetcher
 
 
 def main(mytimer: func.TimerRequest) -> None:
@@ -38,10 +65,9 @@ def main(mytimer: func.TimerRequest) -> None:
 
     try:
         # Initialize components
-        fetcher = Fetcher()
+        fetcher = _get_fetcher()
         parser = Parser()
-        connection_string = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
-        repository = AzureBlobRepository(connection_string)
+        repository = _get_repository()
 
         # Get URL from environment
         url = os.getenv(
@@ -54,28 +80,37 @@ def main(mytimer: func.TimerRequest) -> None:
 
         # Fetch data
         fetch_start = time.time()
-        html_data = fetcher.fetch_data(url)
+        page = fetcher.fetch(url)
+        html_data = page.text
         fetch_time = time.time() - fetch_start
-        logger.log_info(f"Data fetched successfully in {fetch_time:.2f}s")
+        STAGE_SECONDS.labels(stage="fetch").observe(fetch_time)
+        logger.log_info(
+            f"Data fetched successfully in {fetch_time:.2f}s"
+            + (" (page unchanged)" if page.not_modified else "")
+        )
 
         # Parse data
         parse_start = time.time()
         parsed_data = parser.parse_html(html_data)
         parse_time = time.time() - parse_start
+        STAGE_SECONDS.labels(stage="parse").observe(parse_time)
         logger.log_info(f"Data parsed successfully in {parse_time:.2f}s")
 
         # Save to blob storage
         save_start = time.time()
         blob_name = repository.save_data(parsed_data)
         save_time = time.time() - save_start
+        STAGE_SECONDS.labels(stage="save").observe(save_time)
         logger.log_info(f"Data saved to blob storage in {save_time:.2f}s: {blob_name}")
 
         total_time = time.time() - start_time
+        RUNS.labels(result="success").inc()
         logger.log_info(
             f"Crawler execution completed successfully in {total_time:.2f}s"
         )
 
     except Exception as e:
         total_time = time.time() - start_time
+        RUNS.labels(result="failure").inc()
         logger.log_error(f"Error during crawler execution after {total_time:.2f}s: {e}")
         raise
@@ -4,6 +4,7 @@ import azure.functions as func
 import json
 import os
 from datetime import datetime
+from utils.metrics import REGISTRY
 
 
 def main(req: func.HttpRequest) -> func.HttpResponse:
@@ -17,7 +18,9 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             "WEBSOCKET_URL": os.getenv("WEBSOCKET_URL", "not set"),
             "TARGET_UID": os.getenv("TARGET_UID", "not set"),
             "AZURE_STORAGE_CONNECTION_STRING": "configured" if os.getenv("AZURE_STORAGE_CONNECTION_STRING") else "not set"
-        }
+        },
+        # Metrics of this worker process (e.g. the crawler's stage timings)
+        "metrics": REGISTRY.snapshot()
     }
     
     return func.HttpResponse(
@@ -1,6 +1,223 @@
+"""
+Leveled, structured logging.
+
+Records are emitted as one JSON object per line and written by a
+background thread, so logging never blocks a request or the WebSocket
+loop on stdout. Messages use lazy %-style formatting: the arguments of a
+disabled level are never formatted. High-frequency events can be sampled.
+
+Configuration:
+    LOG_LEVEL: Minimum level (default INFO)
+    LOG_FORMAT: 'json' (default) or 'text'
+    LOG_QUEUE_SIZE: Records buffered for the writer thread; further
+                    records are dropped and counted (default 10000)
+
+When the process already configured logging (e.g. the Azure Functions
+host), records go to its handlers instead and only the level and the
+sampling apply.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+ROOT_LOGGER = "badi"
+
+# Attributes of every LogRecord; anything else was passed as a field
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_configure_lock = threading.Lock()
+_listener = None
+_queue_handler = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Let through one in N records of a high-frequency event.
+
+    A record is sampled when it carries a 'sample' attribute (passed as
+    extra={'sample': N} or Logger(...).log_*(..., sample=N)). The first
+    occurrence of each message template always passes.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._seen = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = getattr(record, "sample", None)
+        if not rate or rate <= 1:
+            return True
+        key = (record.name, record.msg)
+        with self._lock:
+            seen = self._seen.get(key, 0)
+            self._seen[key] = seen + 1
+        return seen % rate == 0
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking on a full queue."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_sampler = SamplingFilter()
+
+
+def configure_logging(level=None, stream=None) -> None:
+    """
+    Install the queued JSON handler on the root logger (once per process).
+
+    Does nothing but set the level of the application loggers when the
+    root logger already has handlers.
+
+    Args:
+        level: Minimum level (default: LOG_LEVEL or INFO)
+        stream: Output stream of the writer thread (default: stdout)
+    """
+    global _listener, _queue_handler
+    level = level or os.getenv("LOG_LEVEL", "INFO").upper()
+    logging.getLogger(ROOT_LOGGER).setLevel(level)
+
+    with _configure_lock:
+        root = logging.getLogger()
+        if _listener is not None or root.handlers:
+            return
+
+        output = logging.StreamHandler(stream or sys.stdout)
+        if os.getenv("LOG_FORMAT", "json").lower() == "text":
+            output.setFormatter(
+                logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+            )
+        else:
+            output.setFormatter(JsonFormatter())
+
+        _queue_handler = DroppingQueueHandler(
+            queue.Queue(int(os.getenv("LOG_QUEUE_SIZE", 10000)))
+        )
+        _listener = QueueListener(
+            _queue_handler.queue, output, respect_handler_level=True
+        )
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+        root.addHandler(_queue_handler)
+        root.setLevel(level)
+
+
+def shutdown_logging() -> None:
+    """Flush the queue and stop the writer thread."""
+    global _listener, _queue_handler
+    with _configure_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        logging.getLogger().removeHandler(_queue_handler)
+        _listener = None
+        _queue_handler = None
+
+
+def dropped_records() -> int:
+    """Number of records dropped because the queue was full."""
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+def get_logger(name: str = ROOT_LOGGER) -> logging.Logger:
+    """
+    Return a configured standard library logger with sampling support.
+
+    Args:
+        name: Logger name; names outside the 'badi' tree are used as given
+
+    Returns:
+        logging.Logger
+    """
+    configure_logging()
+    logger = logging.getLogger(name)
+    if _sampler not in logger.filters:
+        logger.addFilter(_sampler)
+    return logger
+
+
 class Logger:
-    def log_info(self, message):
-        print(f"[INFO] {message}")
+    """
+    Application logger keeping the original log_info/log_error API.
+
+    Messages may be plain strings or %-style templates with arguments,
+    which are only formatted if the level is enabled. Keyword arguments
+    become structured fields of the record.
+
+        logger.log_info("Retrieved %d blobs", count, prefix=prefix)
+        logger.log_debug("Frame %s", frame, sample=100)
+    """
+
+    def __init__(self, name: str = None):
+        """
+        Initialize the logger.
+
+        Args:
+            name: Component name, logged below 'badi' (default: 'badi')
+        """
+        full_name = f"{ROOT_LOGGER}.{name}" if name else ROOT_LOGGER
+        self.logger = get_logger(full_name)
+
+    def _log(self, level, message, args, exc_info=False, sample=None, **fields):
+        if not self.logger.isEnabledFor(level):
+            return
+        if sample is not None:
+            fields["sample"] = sample
+        for key in [key for key in fields if key in _RECORD_ATTRIBUTES]:
+            # LogRecord attributes cannot be overwritten through 'extra'
+            fields[f"{key}_"] = fields.pop(key)
+        self.logger.log(level, message, *args, exc_info=exc_info, extra=fields)
+
+    def is_enabled_for(self, level: int) -> bool:
+        """Whether records of a level would be emitted."""
+        return self.logger.isEnabledFor(level)
+
+    def log_debug(self, message, *args, **fields):
+        self._log(logging.DEBUG, message, args, **fields)
+
+    def log_info(self, message, *args, **fields):
+        self._log(logging.INFO, message, args, **fields)
+
+    def log_warning(self, message, *args, **fields):
+        self._log(logging.WARNING, message, args, **fields)
 
-    def log_error(self, message):
-        print(f"[ERROR] {message}")
\ No newline at end of file
+    def log_error(self, message, *args, **fields):
+        self._log(logging.ERROR, message, args, **fields)
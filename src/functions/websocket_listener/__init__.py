@@ -10,51 +10,54 @@ Expected: ~40-80 updates per window (one every 3-4 seconds from API)
 
 import azure.functions as func
 import asyncio
-import json
 import logging
 import os
 import time
 from datetime import datetime
 from .websocket_handler import WebSocketListener
-from azure.storage.blob import BlobClient
+from .window_writer import WindowWriter
+from azure_storage.clients import get_async_container_client, get_container_client
 
 
-def main(mytimer: func.TimerRequest) -> None:
+async def main(mytimer: func.TimerRequest) -> None:
     """
     Azure Function: Listen to BADI Oerlikon WebSocket for 5 minutes.
 
     Timer: Runs every 5 minutes
     Expected: ~40-80 occupancy updates per window (API updates every 3-4s)
 
+    Declared async so the Functions worker runs it on its own long-lived
+    event loop instead of a fresh asyncio.run() loop per invocation; the
+    shared storage clients (and their connection pools) are therefore
+    reused across warm invocations.
+
     Args:
         mytimer: Timer trigger object
     """
-    # Run async function in event loop
-    asyncio.run(_async_main(mytimer))
+    await _async_main(mytimer)
 
 
 async def _async_main(mytimer: func.TimerRequest) -> None:
     """Async implementation of the WebSocket listener."""
     logger = logging.getLogger("websocket_listener")
-    window_start = datetime.utcnow()
     start_time = time.time()
 
     if mytimer.past_due:
         logger.warning("Timer is past due")
 
-    logger.info(f"WebSocket listener started at {window_start.isoformat()}")
+    logger.info(f"WebSocket listener started at {datetime.utcnow().isoformat()}")
 
     try:
         # Get configuration from environment variables
         websocket_url = os.getenv(
             "WEBSOCKET_URL", "wss://badi-public.crowdmonitor.ch:9591/api"
         )
+        # One UID, a comma-separated list, or "all"
         target_uid = os.getenv("TARGET_UID", "SSD-7")
-        connection_string = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
 
-        logger.info(f"Connecting to: {websocket_url}, " f"monitoring UID: {target_uid}")
+        logger.info(f"Connecting to: {websocket_url}, monitoring UID: {target_uid}")
 
-        # Listen to WebSocket for exactly 5 minutes
+        # Listen until the end of the current aligned 5-minute window
         listener = WebSocketListener(
             url=websocket_url, target_uid=target_uid, duration_seconds=300
         )
@@ -62,50 +65,40 @@ async def _async_main(mytimer: func.TimerRequest) -> None:
 
         elapsed = time.time() - start_time
         logger.info(
-            f"Collected {len(updates)} updates in 5-minute window "
-            f"(actual time: {elapsed:.1f}s)"
+            f"Collected {sum(map(len, updates.values()))} updates for "
+            f"{len(updates)} UIDs in 5-minute window (actual time: {elapsed:.1f}s)"
         )
 
         if updates:
-            # Calculate statistics
-            occupancies = [u["occupancy"] for u in updates]
-            stats = {
-                "count": len(updates),
-                "min": min(occupancies),
-                "max": max(occupancies),
-                "avg": sum(occupancies) / len(occupancies),
-                "median": sorted(occupancies)[len(occupancies) // 2],
-            }
-
-            # Save to blob storage
-            window_end = datetime.utcnow()
-
-            data = {
-                "window": {
-                    "start": window_start.isoformat(),
-                    "end": window_end.isoformat(),
-                    "duration_seconds": 300,
-                },
-                "target_uid": target_uid,
-                "updates": updates,
-                "statistics": stats,
-            }
-
-            # Create blob with timestamp filename
-            timestamp = window_start.strftime("%Y%m%d_%H%M%S")
-            blob_name = f"occupancy_data/{timestamp}_{target_uid}.json"
-
-            # Upload to blob storage
-            blob_client = BlobClient.from_connection_string(
-                connection_string, container_name="scraped-data", blob_name=blob_name
+            # Statistics were accumulated while the window was collected;
+            # the aligned bounds match the windows of the persistent daemon
+            window_start, window_end = listener.window_start, listener.window_end
+            listener.window.close(window_end)
+
+            # Upload every UID's window concurrently without blocking the loop
+            connection_string = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
+            async_client = get_async_container_client(
+                connection_string=connection_string
             )
-            blob_client.upload_blob(json.dumps(data), overwrite=True)
-
-            logger.info(f"Saved data to blob: {blob_name}")
-            logger.info(
-                f"Stats: count={stats['count']}, min={stats['min']}, "
-                f"max={stats['max']}, avg={stats['avg']:.1f}"
+            container_client = get_container_client(connection_string=connection_string)
+            await asyncio.gather(
+                *(
+                    WindowWriter(container_client, uid).save_async(
+                        async_client,
+                        window_start,
+                        window_end,
+                        uid_updates,
+                        listener.window.stats[uid],
+                    )
+                    for uid, uid_updates in updates.items()
+                )
             )
+            for uid in updates:
+                summary = listener.window.stats[uid].summary()
+                logger.info(
+                    f"Stats {uid}: count={summary['count']}, min={summary['min']}, "
+                    f"max={summary['max']}, avg={summary['avg']:.1f}"
+                )
         else:
             logger.warning("No updates received in 5-minute window")
 
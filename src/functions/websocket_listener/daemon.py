@@ -0,0 +1,90 @@
+"""
+Persistent WebSocket ingestion daemon.
+
+Alternative to the timer-triggered function for hosts that can run a
+long-lived process (container, VM): keeps one connection to the
+CrowdMonitor API open, cuts aligned windows and writes each one to blob
+storage in the background. Do not run it alongside the timer trigger for
+the same UID, or windows are written twice.
+
+Usage (from src/functions):
+    python -m websocket_listener.daemon
+"""
+
+import asyncio
+import os
+import signal
+from azure_storage.clients import (
+    close_async_clients,
+    get_async_container_client,
+    get_container_client,
+)
+from utils.logger import configure_logging, get_logger
+from .websocket_handler import WebSocketListener
+from .window_writer import WindowWriter
+
+
+async def run(stop: asyncio.Event = None) -> None:
+    """
+    Run the ingestion loop until stop is set (or forever).
+
+    Configuration:
+        WEBSOCKET_URL: CrowdMonitor WebSocket URL
+        TARGET_UID: UID, comma-separated UIDs or 'all' (default 'SSD-7')
+        WINDOW_SECONDS: Window length (default 300)
+        AZURE_STORAGE_CONNECTION_STRING, BLOB_CONTAINER_NAME: Target container
+        STORAGE_*: Connection pool settings (see azure_storage.clients)
+        LOG_*: Logging settings (see utils.logger)
+
+    Args:
+        stop: Optional event that ends the loop
+    """
+    logger = get_logger("websocket_daemon")
+    websocket_url = os.getenv(
+        "WEBSOCKET_URL", "wss://badi-public.crowdmonitor.ch:9591/api"
+    )
+    target_uid = os.getenv("TARGET_UID", "SSD-7")
+    window_seconds = int(os.getenv("WINDOW_SECONDS", 300))
+
+    connection_string = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
+    container_client = get_container_client(connection_string=connection_string)
+    async_client = get_async_container_client(connection_string=connection_string)
+    writers = {}
+
+    async def on_window(uid, window_start, window_end, updates, stats):
+        writer = writers.get(uid)
+        if writer is None:
+            writer = writers[uid] = WindowWriter(container_client, uid)
+        await writer.save_async(
+            async_client, window_start, window_end, updates, stats, window_seconds
+        )
+
+    logger.info(
+        f"Ingesting {target_uid} from {websocket_url} in {window_seconds}s windows"
+    )
+    listener = WebSocketListener(
+        url=websocket_url, target_uid=target_uid, duration_seconds=window_seconds
+    )
+    try:
+        await listener.run_forever(on_window, stop)
+    finally:
+        await close_async_clients()
+
+
+def main() -> None:
+    """Run the daemon until SIGINT/SIGTERM, flushing the partial window."""
+    # JSON lines through a background writer (LOG_LEVEL, LOG_FORMAT)
+    configure_logging()
+
+    async def _main():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        await run(stop)
+
+    asyncio.run(_main())
+
+
+if __name__ == "__main__":
+    main()
@@ -6,30 +6,127 @@ Connects to CrowdMonitor WebSocket API and collects occupancy updates.
 
 import asyncio
 import json
-import logging
+import random
 import websockets
-from datetime import datetime
+from datetime import datetime, timedelta
+from utils.logger import get_logger
+from utils.metrics import counter, gauge
+from utils.statistics import StreamingStats
+
+try:
+    import orjson
+    json_loads = orjson.loads
+    JSON_BACKEND = "orjson"
+except ImportError:  # optional dependency
+    json_loads = json.loads
+    JSON_BACKEND = "json"
+
+
+ALL_UIDS = "all"
+# A timer run starting this close before a window boundary (at most a tenth
+# of the window) collects the next window rather than the current one's end
+ALIGN_GRACE_SECONDS = 5
+# Per-frame problems are logged once every this many occurrences
+FRAME_LOG_SAMPLE = 100
+
+FRAMES = counter("websocket_frames_total", "WebSocket frames received")
+REPEATED_FRAMES = counter(
+    "websocket_repeated_frames_total", "Frames equal to the previous one"
+)
+DROPPED_FRAMES = counter(
+    "websocket_dropped_frames_total", "Frames that could not be processed"
+)
+FRAMES_PER_SECOND = gauge(
+    "websocket_frames_per_second", "Frame rate of the last finished window"
+)
+
+
+def parse_target_uids(target_uid):
+    """
+    Normalize a UID selection.
+    
+    Args:
+        target_uid: A UID ('SSD-7'), a comma-separated string
+                    ('SSD-7,SSD-8'), an iterable of UIDs, or 'all'
+    
+    Returns:
+        frozenset of UIDs, or None to select every location
+    """
+    if isinstance(target_uid, str):
+        if target_uid.strip().lower() == ALL_UIDS:
+            return None
+        target_uid = target_uid.split(",")
+    uids = frozenset(uid.strip() for uid in target_uid if uid.strip())
+    if not uids:
+        raise ValueError("No target UID given")
+    return uids
+
+
+class WindowBuffer:
+    """Updates and running statistics of one collection window, per UID."""
+    
+    def __init__(self):
+        """Initialize an empty window."""
+        self.updates = {}
+        self.stats = {}
+    
+    def add(self, uid, update, timestamp):
+        """
+        Add an update of a UID.
+        
+        Args:
+            uid: Location UID
+            update: {'occupancy': int, 'timestamp': str}
+            timestamp: Parsed timestamp of the update
+        """
+        self.updates.setdefault(uid, []).append(update)
+        stats = self.stats.get(uid)
+        if stats is None:
+            stats = self.stats[uid] = StreamingStats()
+        stats.add(update['occupancy'], timestamp)
+    
+    def close(self, end):
+        """Account for the last reading of every UID up to the window end."""
+        for stats in self.stats.values():
+            stats.close(end)
+    
+    def __bool__(self):
+        return bool(self.updates)
 
 
 class WebSocketListener:
     """Connects to CrowdMonitor WebSocket and collects occupancy updates."""
     
     def __init__(self, url, target_uid, duration_seconds=300,
-                 timeout_per_message=1.0):
+                 timeout_per_message=1.0, skip_repeated_frames=True):
         """
         Initialize WebSocket listener.
         
         Args:
             url: WebSocket URL (wss://badi-public.crowdmonitor.ch:9591/api)
-            target_uid: UID to monitor (e.g., 'SSD-7' for BADI Oerlikon)
+            target_uid: UID(s) to monitor: 'SSD-7' for BADI Oerlikon, a
+                        comma-separated list or an iterable of UIDs, or
+                        'all' for every location in the feed
             duration_seconds: How long to listen (default 5 min)
             timeout_per_message: Max wait for each message (default 1 sec)
+            skip_repeated_frames: Reuse the decoded values when a frame is
+                                  byte-identical to the previous one
         """
         self.url = url
         self.target_uid = target_uid
+        self.target_uids = parse_target_uids(target_uid)
         self.duration_seconds = duration_seconds
         self.timeout_per_message = timeout_per_message
-        self.logger = logging.getLogger(__name__)
+        self.window = WindowBuffer()
+        self.window_start = None
+        self.window_end = None
+        self.skip_repeated_frames = skip_repeated_frames
+        self.decode = json_loads
+        self.frames = 0
+        self.repeated_frames = 0
+        self._last_frame = None
+        self._last_values = {}
+        self.logger = get_logger(__name__)
     
     async def collect_updates(self):
         """
@@ -39,17 +136,35 @@ class WebSocketListener:
         1. Connect to WebSocket
         2. Send "all" command (as expected by API)
         3. Receive JSON array of occupancy data (API sends every 3-4 sec)
-        4. Extract target UID data
+        4. Extract the data of every target UID in one pass
         5. Continue collecting for 5 minutes
         
         Note: API updates every ~3-4 seconds, not on demand.
         In a 5-minute window (~300 sec), expect 75-100 messages.
         
+        The window is aligned like the windows of run_forever (multiples
+        of duration_seconds since the epoch), so timer runs and the
+        persistent daemon write the same window under the same blob name.
+        Collection ends at the window end, set in self.window_start and
+        self.window_end; frames received before the window start (a run
+        that starts just before a boundary) are ignored.
+        
+        Updates and their running statistics are kept per UID in
+        self.window, so the window statistics are complete once this
+        returns (call self.window.close() with self.window_end for the
+        time-weighted averages).
+        
         Returns:
-            List of {'occupancy': int, 'timestamp': str} dicts
+            Dict of UID -> list of {'occupancy': int, 'timestamp': str}
         """
-        updates = []
+        self.window = WindowBuffer()
         start_time = datetime.utcnow()
+        grace = min(ALIGN_GRACE_SECONDS, self.duration_seconds / 10)
+        self.window_start = self._align(start_time + timedelta(seconds=grace))
+        self.window_end = self.window_start + timedelta(
+            seconds=self.duration_seconds
+        )
+        start_frames = self.frames
         
         try:
             async with websockets.connect(self.url) as websocket:
@@ -60,12 +175,17 @@ class WebSocketListener:
                 self.logger.info("Sent 'all' command to WebSocket")
                 
                 while True:
-                    elapsed = (datetime.utcnow() - start_time).total_seconds()
+                    now = datetime.utcnow()
+                    elapsed = (now - start_time).total_seconds()
                     
-                    if elapsed >= self.duration_seconds:
+                    if now >= self.window_end:
                         self.logger.info(
-                            f"5-minute window complete. "
-                            f"Collected {len(updates)} updates."
+                            f"5-minute window complete. Collected "
+                            f"{sum(map(len, self.window.updates.values()))} "
+                            f"updates for {len(self.window.updates)} UIDs."
+                        )
+                        FRAMES_PER_SECOND.set(
+                            (self.frames - start_frames) / elapsed
                         )
                         break
                     
@@ -73,18 +193,26 @@ class WebSocketListener:
                         # Wait for next message (with timeout)
                         message = await asyncio.wait_for(
                             websocket.recv(),
-                            timeout=self.timeout_per_message
+                            timeout=min(
+                                self.timeout_per_message,
+                                (self.window_end - now).total_seconds()
+                            )
                         )
                         
-                        # Parse message and extract target UID
-                        data = self._parse_message(message)
+                        # Parse message and extract the target UIDs
+                        updates = self._parse_message(message)
                         
-                        if data:
-                            updates.append(data)
+                        if updates:
+                            timestamp = self._frame_time(updates)
+                            if not (self.window_start <= timestamp
+                                    < self.window_end):
+                                continue
+                            self._add_updates(
+                                self.window, updates, timestamp
+                            )
                             self.logger.debug(
-                                f"Update {len(updates)}: "
-                                f"occupancy={data['occupancy']} "
-                                f"at {data['timestamp']}"
+                                "Frame with %d updates: %s",
+                                len(updates), updates
                             )
                         
                     except asyncio.TimeoutError:
@@ -92,13 +220,19 @@ class WebSocketListener:
                         continue
                         
                     except json.JSONDecodeError:
+                        DROPPED_FRAMES.inc()
                         self.logger.warning(
-                            f"Failed to parse message: {message[:100]}"
+                            "Failed to parse message: %.100s", message,
+                            extra={'sample': FRAME_LOG_SAMPLE}
                         )
                         continue
                         
                     except Exception as e:
-                        self.logger.warning(f"Error processing message: {e}")
+                        DROPPED_FRAMES.inc()
+                        self.logger.warning(
+                            "Error processing message: %s", e,
+                            extra={'sample': FRAME_LOG_SAMPLE}
+                        )
                         continue
         
         except asyncio.TimeoutError:
@@ -111,11 +245,149 @@ class WebSocketListener:
             self.logger.error(f"WebSocket error: {e}")
             raise
         
-        return updates
+        return self.window.updates
     
+    async def run_forever(self, on_window, stop=None, initial_backoff=1.0,
+                          max_backoff=60.0):
+        """
+        Keep one connection open and emit consecutive aligned windows.
+        
+        Windows are cut on multiples of duration_seconds since the epoch
+        (e.g. :00, :05, :10 for 5-minute windows), independent of when the
+        connection was opened. Each finished window of each UID is handed
+        to on_window as a background task, so receiving never waits for
+        storage. When the connection drops, it is re-established with
+        exponential backoff and full jitter; the current window keeps
+        collecting across the reconnect.
+        
+        Args:
+            on_window: Coroutine function called per UID as
+                       on_window(uid, window_start, window_end, updates, stats)
+            stop: Optional asyncio.Event that ends the loop; the partial
+                  window is flushed and pending flushes are awaited
+            initial_backoff: First reconnect delay ceiling in seconds
+            max_backoff: Largest reconnect delay ceiling in seconds
+        """
+        stop = stop or asyncio.Event()
+        duration = timedelta(seconds=self.duration_seconds)
+        window_start = self._align(datetime.utcnow())
+        self.window = WindowBuffer()
+        pending = set()
+        failures = 0
+        window_frames = self.frames
+
+        def flush(start, end):
+            self.window.close(end)
+            for uid, updates in self.window.updates.items():
+                task = asyncio.create_task(
+                    self._flush_window(
+                        on_window, uid, start, end, updates,
+                        self.window.stats[uid]
+                    )
+                )
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+
+        def cut(now):
+            nonlocal window_start, window_frames
+            if now < window_start + duration:
+                return
+            FRAMES_PER_SECOND.set(
+                (self.frames - window_frames) / self.duration_seconds
+            )
+            window_frames = self.frames
+            if self.window:
+                flush(window_start, window_start + duration)
+            window_start = self._align(now)
+            self.window = WindowBuffer()
+
+        while not stop.is_set():
+            try:
+                async with websockets.connect(self.url) as websocket:
+                    self.logger.info(f"Connected to WebSocket: {self.url}")
+                    await websocket.send("all")
+
+                    while not stop.is_set():
+                        now = datetime.utcnow()
+                        cut(now)
+                        remaining = (window_start + duration - now).total_seconds()
+
+                        try:
+                            message = await asyncio.wait_for(
+                                websocket.recv(),
+                                timeout=min(self.timeout_per_message, remaining)
+                            )
+                        except asyncio.TimeoutError:
+                            continue
+
+                        failures = 0
+                        updates = self._parse_message(message)
+                        if updates:
+                            timestamp = self._frame_time(updates)
+                            cut(timestamp)
+                            self._add_updates(self.window, updates, timestamp)
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as e:
+                delay = random.uniform(
+                    0, min(max_backoff, initial_backoff * 2 ** failures)
+                )
+                failures += 1
+                self.logger.warning(
+                    f"WebSocket connection lost ({e}); "
+                    f"reconnecting in {delay:.1f}s (attempt {failures})"
+                )
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+
+        if self.window:
+            flush(window_start, datetime.utcnow())
+        if pending:
+            await asyncio.gather(*pending)
+
+    def _align(self, moment):
+        """Return the start of the aligned window containing a moment."""
+        epoch = datetime(1970, 1, 1)
+        seconds = int((moment - epoch).total_seconds())
+        return epoch + timedelta(
+            seconds=seconds - seconds % self.duration_seconds
+        )
+
+    async def _flush_window(self, on_window, uid, window_start, window_end,
+                            updates, stats):
+        """Hand a finished window to the callback, logging any failure."""
+        try:
+            await on_window(uid, window_start, window_end, updates, stats)
+            self.logger.info(
+                f"Flushed window {window_start.isoformat()} of {uid} "
+                f"with {len(updates)} updates"
+            )
+        except Exception as e:
+            self.logger.error(
+                f"Error flushing window {window_start.isoformat()} "
+                f"of {uid}: {e}"
+            )
+
+    @staticmethod
+    def _frame_time(updates):
+        """Return the (shared) receive time of the updates of one frame."""
+        return datetime.fromisoformat(
+            next(iter(updates.values()))['timestamp']
+        )
+
+    @staticmethod
+    def _add_updates(window, updates, timestamp):
+        """Add the updates of one frame to a window buffer."""
+        for uid, update in updates.items():
+            window.add(uid, update, timestamp)
+
     def _parse_message(self, message):
         """
-        Parse WebSocket message and extract occupancy for target UID.
+        Parse WebSocket message and extract occupancy of the target UIDs.
         
         Message format from CrowdMonitor API:
         [
@@ -129,43 +401,91 @@ class WebSocketListener:
             ... (other locations)
         ]
         
+        The array is scanned once; with an explicit UID set the scan stops
+        as soon as every target was found. The feed pushes the full array
+        every few seconds whether or not anything changed, so a frame equal
+        to the previous one is not decoded again: its values are reused
+        with a fresh timestamp. Decoding uses orjson when it is installed.
+        
         Args:
             message: Raw WebSocket message (JSON string)
         
         Returns:
-            {'occupancy': int, 'timestamp': str} or None if not our UID
+            Dict of UID -> {'occupancy': int, 'timestamp': str}; empty if
+            no target UID is in the message
         """
+        self.frames += 1
+        FRAMES.inc()
+        timestamp = datetime.utcnow().isoformat()
+        
+        if self.skip_repeated_frames and message == self._last_frame:
+            self.repeated_frames += 1
+            REPEATED_FRAMES.inc()
+            return {
+                uid: {'occupancy': occupancy, 'timestamp': timestamp}
+                for uid, occupancy in self._last_values.items()
+            }
+        self._last_frame = None
+        
         try:
-            data_array = json.loads(message)
+            data_array = self.decode(message)
+        except (ValueError, TypeError) as e:
+            DROPPED_FRAMES.inc()
+            self.logger.warning(
+                "Error parsing message: %s", e,
+                extra={'sample': FRAME_LOG_SAMPLE}
+            )
+            return {}
+        
+        # Data is an array; pick out the matching UIDs
+        if not isinstance(data_array, list):
+            DROPPED_FRAMES.inc()
+            self.logger.warning(
+                "Unexpected message format: %s", type(data_array),
+                extra={'sample': FRAME_LOG_SAMPLE}
+            )
+            return {}
+        
+        targets = self.target_uids
+        updates = {}
+        
+        for element in data_array:
+            if not isinstance(element, dict):
+                continue
+            uid = element.get("uid")
+            if uid is None or (targets is not None and uid not in targets):
+                continue
             
-            # Data is an array; find the matching UID
-            if not isinstance(data_array, list):
+            occupancy = element.get("currentfill")
+            if occupancy is None:
+                if targets is not None:
+                    self.logger.warning(
+                        "No 'currentfill' for %s: %s", uid, element,
+                        extra={'sample': FRAME_LOG_SAMPLE}
+                    )
+                continue
+            
+            try:
+                updates[uid] = {
+                    'occupancy': int(float(occupancy)),
+                    'timestamp': timestamp
+                }
+            except (ValueError, TypeError) as e:
                 self.logger.warning(
-                    f"Unexpected message format: {type(data_array)}"
+                    "Invalid 'currentfill' for %s: %s", uid, e,
+                    extra={'sample': FRAME_LOG_SAMPLE}
                 )
-                return None
+                continue
             
-            for element in data_array:
-                if element.get("uid") == self.target_uid:
-                    # Found our target location
-                    occupancy = element.get("currentfill")
-                    
-                    if occupancy is None:
-                        self.logger.warning(
-                            f"No 'currentfill' for {self.target_uid}: "
-                            f"{element}"
-                        )
-                        return None
-                    
-                    return {
-                        'occupancy': int(float(occupancy)),
-                        'timestamp': datetime.utcnow().isoformat()
-                    }
-            
-            # Target UID not found in this message (not an error,
-            # might be a refresh message)
-            return None
-            
-        except (json.JSONDecodeError, ValueError, TypeError) as e:
-            self.logger.warning(f"Error parsing message: {e}")
-            return None
+            if targets is not None and len(updates) == len(targets):
+                break
+        
+        if self.skip_repeated_frames:
+            self._last_frame = message
+            self._last_values = {
+                uid: update['occupancy'] for uid, update in updates.items()
+            }
+        
+        # Target UIDs missing from a message are not an error (might be a
+        # refresh message)
+        return updates
@@ -0,0 +1,150 @@
+"""
+Persistence of collected occupancy windows.
+
+Shared by the timer-triggered listener and the persistent ingestion daemon.
+"""
+
+import asyncio
+import functools
+import json
+import os
+from datetime import datetime
+from azure_storage.blob_index import BlobIndex, occupancy_series
+from azure_storage.rollups import RollupStore
+from azure_storage.update_encoding import encode_window
+from utils.logger import get_logger
+from utils.statistics import StreamingStats
+
+
+class WindowWriter:
+    """Writes window blobs and keeps the blob index and rollups in sync."""
+
+    def __init__(self, container_client, target_uid, encode_updates=None):
+        """
+        Initialize the writer.
+
+        Args:
+            container_client: ContainerClient of the data container
+            target_uid: UID the windows belong to (e.g. 'SSD-7')
+            encode_updates: Store updates in the change-only encoding
+                            (default: WINDOW_UPDATE_ENCODING != 'plain')
+        """
+        self.container_client = container_client
+        self.target_uid = target_uid
+        if encode_updates is None:
+            encode_updates = os.getenv("WINDOW_UPDATE_ENCODING", "delta") != "plain"
+        self.encode_updates = encode_updates
+        self.index = BlobIndex(container_client)
+        self.rollups = RollupStore(container_client)
+        self.logger = get_logger(__name__)
+
+    def save(
+        self,
+        window_start: datetime,
+        window_end: datetime,
+        updates: list,
+        stats: StreamingStats,
+        duration_seconds: int = 300,
+    ) -> str:
+        """
+        Upload a window and register it in the index and rollups.
+
+        Index and rollup failures are logged but do not fail the write; the
+        index can be rebuilt from the blobs with scripts/rebuild_index.py and
+        the rollups with scripts/rebuild_rollups.py.
+
+        Args:
+            window_start: Start of the window (UTC)
+            window_end: End of the window (UTC)
+            updates: Collected {'occupancy', 'timestamp'} updates
+            stats: Closed accumulator of the window
+            duration_seconds: Nominal window length
+
+        Returns:
+            Name of the uploaded blob
+        """
+        blob_name, data, body = self._build(
+            window_start, window_end, updates, stats, duration_seconds
+        )
+        self.container_client.get_blob_client(blob_name).upload_blob(
+            body, overwrite=True
+        )
+        self.logger.info(f"Saved data to blob: {blob_name}")
+        self._register(blob_name, data)
+        return blob_name
+
+    async def save_async(
+        self,
+        async_container_client,
+        window_start: datetime,
+        window_end: datetime,
+        updates: list,
+        stats: StreamingStats,
+        duration_seconds: int = 300,
+    ) -> str:
+        """
+        Like save(), without blocking the event loop.
+
+        The window is uploaded through the async storage client; the small
+        index and rollup documents are updated in a worker thread with the
+        synchronous client.
+
+        Args:
+            async_container_client: azure.storage.blob.aio.ContainerClient of
+                                    the same container
+            window_start: Start of the window (UTC)
+            window_end: End of the window (UTC)
+            updates: Collected {'occupancy', 'timestamp'} updates
+            stats: Closed accumulator of the window
+            duration_seconds: Nominal window length
+
+        Returns:
+            Name of the uploaded blob
+        """
+        blob_name, data, body = self._build(
+            window_start, window_end, updates, stats, duration_seconds
+        )
+        await async_container_client.get_blob_client(blob_name).upload_blob(
+            body, overwrite=True
+        )
+        self.logger.info(f"Saved data to blob: {blob_name}")
+        # run_in_executor rather than asyncio.to_thread, which needs Python 3.9
+        await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(self._register, blob_name, data)
+        )
+        return blob_name
+
+    def _build(self, window_start, window_end, updates, stats, duration_seconds):
+        """Return (blob name, window document, serialized blob body)."""
+        data = {
+            "window": {
+                "start": window_start.isoformat(),
+                "end": window_end.isoformat(),
+                "duration_seconds": duration_seconds,
+            },
+            "target_uid": self.target_uid,
+            "updates": updates,
+            "statistics": stats.summary(),
+        }
+
+        timestamp = window_start.strftime("%Y%m%d_%H%M%S")
+        blob_name = f"occupancy_data/{timestamp}_{self.target_uid}.json"
+
+        stored = encode_window(data) if self.encode_updates else data
+        return blob_name, data, json.dumps(stored, separators=(",", ":"))
+
+    def _register(self, blob_name: str, data: dict) -> None:
+        """Record an uploaded window in the blob index and the rollups."""
+        # Keep the latest pointer and daily manifest in sync
+        try:
+            self.index.record(blob_name)
+        except Exception as e:
+            self.logger.error(f"Error updating blob index for {blob_name}: {e}")
+
+        # Fold the window into the hourly/daily/weekday-hour rollups
+        try:
+            self.rollups.merge_window(
+                occupancy_series(self.target_uid), blob_name, data
+            )
+        except Exception as e:
+            self.logger.error(f"Error updating rollups for {blob_name}: {e}")
@@ -1,7 +1,281 @@
+"""
+HTTP fetching of the pool pages.
+
+A Fetcher keeps one pooled keep-alive session, so repeated fetches reuse
+their TLS connection, and remembers the ETag / Last-Modified validators of
+every page: an unchanged page is answered with 304 Not Modified and served
+from the copy of the previous fetch. Failed requests (connection errors,
+429 and 5xx) are retried with exponential backoff.
+
+Configuration:
+    FETCH_CONNECT_TIMEOUT: Connect timeout in seconds (default 5)
+    FETCH_READ_TIMEOUT: Read timeout in seconds (default 15)
+    FETCH_RETRIES: Retries after the first attempt (default 3)
+    FETCH_BACKOFF_SECONDS: Base of the exponential backoff (default 0.5)
+    FETCH_CONCURRENCY: Requests in flight in the batch mode (default 8)
+"""
+
+import asyncio
+import os
+import random
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Union
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Responses worth another attempt
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+USER_AGENT = "badi-oerlikon-occupancy/1.0"
+
+
+@dataclass
+class FetchResult:
+    """A fetched page and the validators it was served with."""
+
+    url: str
+    text: str
+    status: int
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    # True if the server answered 304 and text is the copy of a previous fetch
+    not_modified: bool = False
+
+
 class Fetcher:
-    def fetch_data(self, url):
-        import requests
+    """Fetches pages over a pooled session with conditional requests."""
+
+    def __init__(
+        self,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        backoff: Optional[float] = None,
+        concurrency: Optional[int] = None,
+    ):
+        """
+        Initialize the fetcher.
+
+        Args:
+            connect_timeout: Connect timeout in seconds (FETCH_CONNECT_TIMEOUT)
+            read_timeout: Read timeout in seconds (FETCH_READ_TIMEOUT)
+            retries: Retries after the first attempt (FETCH_RETRIES)
+            backoff: Base of the exponential backoff (FETCH_BACKOFF_SECONDS)
+            concurrency: Requests in flight in fetch_many (FETCH_CONCURRENCY)
+        """
+        self.connect_timeout = _setting(connect_timeout, "FETCH_CONNECT_TIMEOUT", 5)
+        self.read_timeout = _setting(read_timeout, "FETCH_READ_TIMEOUT", 15)
+        self.retries = int(_setting(retries, "FETCH_RETRIES", 3))
+        self.backoff = _setting(backoff, "FETCH_BACKOFF_SECONDS", 0.5)
+        self.concurrency = int(_setting(concurrency, "FETCH_CONCURRENCY", 8))
+
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(
+            pool_connections=self.concurrency,
+            pool_maxsize=self.concurrency,
+            max_retries=Retry(
+                total=self.retries,
+                backoff_factor=self.backoff,
+                status_forcelist=RETRY_STATUSES,
+                allowed_methods=frozenset({"GET"}),
+                raise_on_status=False,
+            ),
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # url -> FetchResult of the last full response
+        self._pages: Dict[str, FetchResult] = {}
+        self._lock = threading.Lock()
+
+    def fetch_data(self, url: str) -> str:
+        """
+        Fetch the HTML of a page.
+
+        Args:
+            url: Page URL
+
+        Returns:
+            Page text (the previous copy if the page is unchanged)
+        """
+        return self.fetch(url).text
+
+    def fetch(self, url: str) -> FetchResult:
+        """
+        Fetch a page, revalidating the copy of a previous fetch.
+
+        Args:
+            url: Page URL
+
+        Returns:
+            FetchResult; not_modified is set when the server answered 304
+
+        Raises:
+            requests.HTTPError: On an error status after all retries
+        """
+        response = self.session.get(
+            url,
+            headers=self._conditional_headers(url),
+            timeout=(self.connect_timeout, self.read_timeout),
+        )
+        if response.status_code == 304:
+            cached = self._revalidated(url)
+            if cached is not None:
+                return cached
+        response.raise_for_status()
+        return self._remember(
+            url,
+            response.text,
+            response.status_code,
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+        )
+
+    def fetch_many(
+        self, urls: Sequence[str], concurrency: Optional[int] = None
+    ) -> List[Union[FetchResult, Exception]]:
+        """
+        Fetch many pages concurrently (blocking wrapper of fetch_many_async).
+
+        asyncio.run cannot start a loop inside a running one, so when called
+        from a coroutine the pages are fetched one by one with fetch();
+        async callers should await fetch_many_async instead.
+
+        Args:
+            urls: Page URLs
+            concurrency: Requests in flight (default: the fetcher's setting)
+
+        Returns:
+            One FetchResult per URL, in order; a failed URL holds its exception
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.fetch_many_async(urls, concurrency))
+
+        results: List[Union[FetchResult, Exception]] = []
+        for url in urls:
+            try:
+                results.append(self.fetch(url))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    async def fetch_many_async(
+        self, urls: Sequence[str], concurrency: Optional[int] = None
+    ) -> List[Union[FetchResult, Exception]]:
+        """
+        Fetch many pages concurrently on one aiohttp connection pool.
+
+        Uses the same validators, timeouts and retry policy as fetch().
+
+        Args:
+            urls: Page URLs
+            concurrency: Requests in flight (default: the fetcher's setting)
+
+        Returns:
+            One FetchResult per URL, in order; a failed URL holds its exception
+        """
+        from aiohttp import ClientSession, ClientTimeout, TCPConnector
+
+        limit = concurrency or self.concurrency
+        semaphore = asyncio.Semaphore(limit)
+        timeout = ClientTimeout(
+            sock_connect=self.connect_timeout, sock_read=self.read_timeout
+        )
+
+        async with ClientSession(
+            connector=TCPConnector(limit=limit),
+            timeout=timeout,
+            headers={"User-Agent": USER_AGENT},
+        ) as session:
+
+            async def fetch_one(url):
+                async with semaphore:
+                    return await self._fetch_async(session, url)
+
+            return await asyncio.gather(
+                *(fetch_one(url) for url in urls), return_exceptions=True
+            )
+
+    def close(self) -> None:
+        """Close the pooled connections."""
+        self.session.close()
+
+    async def _fetch_async(self, session, url: str) -> FetchResult:
+        """Fetch one page with retries inside an aiohttp session."""
+        from aiohttp import ClientError, ClientResponseError
+
+        attempt = 0
+        while True:
+            try:
+                async with session.get(
+                    url, headers=self._conditional_headers(url)
+                ) as response:
+                    if response.status == 304:
+                        cached = self._revalidated(url)
+                        if cached is not None:
+                            return cached
+                    if response.status in RETRY_STATUSES and attempt < self.retries:
+                        raise ClientResponseError(
+                            response.request_info,
+                            response.history,
+                            status=response.status,
+                            message=response.reason or "",
+                        )
+                    response.raise_for_status()
+                    return self._remember(
+                        url,
+                        await response.text(),
+                        response.status,
+                        response.headers.get("ETag"),
+                        response.headers.get("Last-Modified"),
+                    )
+            except (ClientError, asyncio.TimeoutError) as e:
+                retryable = not isinstance(e, ClientResponseError) or (
+                    e.status in RETRY_STATUSES
+                )
+                if not retryable or attempt >= self.retries:
+                    raise
+                # Exponential backoff with full jitter
+                await asyncio.sleep(random.uniform(0, self.backoff * 2**attempt))
+                attempt += 1
+
+    def _conditional_headers(self, url: str) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since of the previous copy of a page."""
+        with self._lock:
+            cached = self._pages.get(url)
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+        return headers
+
+    def _revalidated(self, url: str) -> Optional[FetchResult]:
+        """Return the previous copy of a page after a 304."""
+        with self._lock:
+            cached = self._pages.get(url)
+        if cached is None:
+            return None
+        return FetchResult(
+            url, cached.text, 304, cached.etag, cached.last_modified, True
+        )
+
+    def _remember(self, url, text, status, etag, last_modified) -> FetchResult:
+        """Keep a full response for the next conditional fetch."""
+        result = FetchResult(url, text, status, etag, last_modified)
+        if etag or last_modified:
+            with self._lock:
+                self._pages[url] = result
+        return result
+
 
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an error for bad responses
-        return response.text
+def _setting(value, variable: str, default: float) -> float:
+    """Return an explicit value, else the environment variable, else default."""
+    if value is not None:
+        return value
+    return float(os.getenv(variable, default))
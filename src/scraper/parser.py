@@ -1,6 +1,60 @@
+"""
+Extraction of the current number of guests from the pool page.
+
+The stadt-zuerich.ch page is large, but only the number next to
+"Anzahl Gäste" is needed. A precompiled pattern finds the label and the
+first number after it (across tags, entities and separators) without
+building a DOM. Only if that fails, e.g. because the label is split
+across elements, the page is parsed with BeautifulSoup and the pattern
+is applied to its text.
+"""
+
+import re
+import unicodedata
+from datetime import datetime
+from typing import Optional
+
+# Separators allowed between the label and the value
+_GAP = r"(?:\s|&nbsp;|&#160;|:|<[^<>]{0,300}>){0,40}"
+_LABEL = r"Anzahl(?:\s|&nbsp;|&#160;)+G(?:ä|&auml;|&#228;|&#x[eE]4;|a\u0308)ste"
+FIELD_PATTERN = re.compile(_LABEL + _GAP + r"(\d{1,5})(?![\d.,]\d)")
+TEXT_PATTERN = re.compile(r"Anzahl\s+Gäste\s*:?\s*(\d{1,5})(?![\d.,]\d)")
+
+
 class Parser:
-    def parse_html(self, html):
-        # Implement the logic to parse the HTML and extract relevant information
-        # Find the number that is next to the Field "Anzahl Gäste"
+    def parse_html(self, html: str) -> dict:
+        """
+        Extract the current occupancy from the pool page.
+
+        Args:
+            html: Page HTML
+
+        Returns:
+            {'occupancy': int, 'timestamp': str (UTC, ISO 8601)}
+
+        Raises:
+            ValueError: If the page has no "Anzahl Gäste" value
+        """
+        occupancy = self.parse_fast(html)
+        if occupancy is None:
+            occupancy = self.parse_dom(html)
+        if occupancy is None:
+            raise ValueError("No 'Anzahl Gäste' value found in page")
+
+        return {"occupancy": occupancy, "timestamp": datetime.utcnow().isoformat()}
+
+    @staticmethod
+    def parse_fast(html: str) -> Optional[int]:
+        """Find the value with the precompiled pattern; None if not found."""
+        match = FIELD_PATTERN.search(html)
+        return int(match.group(1)) if match else None
+
+    @staticmethod
+    def parse_dom(html: str) -> Optional[int]:
+        """Find the value in the text of the full DOM; None if not found."""
+        from bs4 import BeautifulSoup
 
-        pass
+        text = BeautifulSoup(html, "html.parser").get_text(" ")
+        text = unicodedata.normalize("NFC", " ".join(text.split()))
+        match = TEXT_PATTERN.search(text)
+        return int(match.group(1)) if match else None
@@ -1,5 +1,15 @@
 """Services module for BADI Oerlikon scraper."""
 
-from .crawler_service import CrawlerService, create_crawler_service
+from .downsample import SeriesDownsampler, downsample
+from .forecast import OccupancyForecaster
+from .live_feed import LiveFeed
+from .occupancy import bucket_updates, parse_resolution
 
-__all__ = ["CrawlerService", "create_crawler_service"]
+__all__ = [
+    "LiveFeed",
+    "OccupancyForecaster",
+    "SeriesDownsampler",
+    "bucket_updates",
+    "downsample",
+    "parse_resolution",
+]
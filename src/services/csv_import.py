@@ -0,0 +1,395 @@
+"""
+Bulk import of legacy CSV readings as occupancy windows.
+
+scripts/scrape_once.py appends 'timestamp,occupancy' rows to a CSV. The
+importer turns such a file into the same 5-minute window blobs (with the
+same statistics) the WebSocket listener writes, and registers them in the
+blob index and the rollups, so the API and dashboard can serve them.
+
+The file is read in chunks and every chunk is bucketed and summarized with
+NumPy, so memory depends on the chunk size, not the file size. The rows of
+the last window of a chunk are carried over to the next one, which makes
+windows independent of the chunk boundaries. Rows are expected in time
+order (as appended); rows of a window that was already written are counted
+as late and dropped.
+
+Imports are idempotent and resumable: window blobs are never overwritten
+(existing windows, e.g. from the live listener, are kept), index and
+rollup updates skip blobs they already contain, and a checkpoint records
+the end of the last window that was fully registered.
+"""
+
+import json
+import math
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional
+import numpy as np
+import pandas as pd
+from azure.core.exceptions import ResourceExistsError
+from azure_storage.blob_adapter import AzureBlobStorageAdapter
+from azure_storage.blob_index import occupancy_series
+from azure_storage.clients import BYTES_WRITTEN, STORAGE_SECONDS
+from azure_storage.update_encoding import encode_window
+from utils.logger import Logger
+
+WINDOW_SECONDS = 300
+DEFAULT_CHUNK_ROWS = 250_000
+_NS = 1_000_000_000
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _nearest_rank(sorted_values, starts, counts, q):
+    """Nearest-rank q-quantile of every group (as QuantileSketch.quantile)."""
+    ranks = np.maximum(1, np.ceil(q * counts)).astype(np.int64)
+    return sorted_values[starts + ranks - 1]
+
+
+def build_windows(
+    timestamps_ns: np.ndarray,
+    occupancy: np.ndarray,
+    uid: str,
+    window_seconds: int = WINDOW_SECONDS,
+) -> List[dict]:
+    """
+    Bucket readings into aligned window documents with their statistics.
+
+    The statistics equal StreamingStats.summary() of the window closed at
+    its aligned end, computed for all windows at once.
+
+    Args:
+        timestamps_ns: Naive UTC epoch nanoseconds, sorted ascending
+        occupancy: Integer readings of the same length
+        uid: Location UID of the windows
+        window_seconds: Window length
+
+    Returns:
+        Window documents in time order
+    """
+    if len(timestamps_ns) == 0:
+        return []
+
+    width = window_seconds * _NS
+    windows = timestamps_ns - timestamps_ns % width
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(windows)) + 1))
+    ends = np.append(starts[1:], len(windows))
+    counts = ends - starts
+    window_starts = windows[starts]
+
+    values = occupancy.astype(np.float64)
+    sums = np.add.reduceat(values, starts)
+    means = sums / counts
+    deviations = values - np.repeat(means, counts)
+    variances = np.add.reduceat(deviations * deviations, starts) / counts
+
+    # Windows are contiguous, so sorting by (window, value) keeps the groups
+    sorted_values = occupancy[np.lexsort((occupancy, windows))]
+    p50 = _nearest_rank(sorted_values, starts, counts, 0.5)
+    p90 = _nearest_rank(sorted_values, starts, counts, 0.9)
+    p99 = _nearest_rank(sorted_values, starts, counts, 0.99)
+
+    # Every reading holds until the next one, the last until the window end
+    following = np.append(timestamps_ns[1:], 0)
+    following[ends - 1] = window_starts + width
+    holds = np.maximum(following - timestamps_ns, 0) / _NS
+    weighted_seconds = np.add.reduceat(holds, starts)
+    weighted_sums = np.add.reduceat(values * holds, starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        time_weighted = np.where(
+            weighted_seconds > 0, weighted_sums / weighted_seconds, means
+        )
+
+    # Whole seconds (as in scrape_once.py) keep the short isoformat()
+    unit = "s" if (timestamps_ns % _NS == 0).all() else "us"
+    stamps = np.datetime_as_string(
+        timestamps_ns.view("datetime64[ns]").astype(f"datetime64[{unit}]")
+    )
+    stamps = stamps.tolist()
+    readings = occupancy.tolist()
+
+    columns = zip(
+        starts.tolist(),
+        ends.tolist(),
+        window_starts.tolist(),
+        np.minimum.reduceat(occupancy, starts).tolist(),
+        np.maximum.reduceat(occupancy, starts).tolist(),
+        means.tolist(),
+        p50.tolist(),
+        p90.tolist(),
+        p99.tolist(),
+        variances.tolist(),
+        time_weighted.tolist(),
+    )
+    documents = []
+    for first, last, start_ns, low, high, mean, q50, q90, q99, var, twa in columns:
+        start = _EPOCH + timedelta(microseconds=start_ns // 1000)
+        documents.append(
+            {
+                "window": {
+                    "start": start.isoformat(),
+                    "end": (start + timedelta(seconds=window_seconds)).isoformat(),
+                    "duration_seconds": window_seconds,
+                },
+                "target_uid": uid,
+                "updates": [
+                    {"occupancy": value, "timestamp": stamp}
+                    for value, stamp in zip(readings[first:last], stamps[first:last])
+                ],
+                "statistics": {
+                    "count": last - first,
+                    "min": low,
+                    "max": high,
+                    "avg": mean,
+                    "p50": q50,
+                    "p90": q90,
+                    "p99": q99,
+                    "median": q50,
+                    "variance": var,
+                    "stddev": math.sqrt(var),
+                    "time_weighted_avg": twa,
+                },
+            }
+        )
+    return documents
+
+
+def read_readings(
+    path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS, source_tz: str = "UTC"
+) -> Iterator[tuple]:
+    """
+    Read a timestamp,occupancy CSV in chunks.
+
+    Args:
+        path: CSV file with 'timestamp' and 'occupancy' columns
+        chunk_rows: Rows per chunk
+        source_tz: Time zone of naive timestamps in the file
+
+    Yields:
+        (naive UTC epoch nanoseconds, int64 occupancy, rows read) per chunk;
+        rows with an unparsable timestamp or occupancy are dropped
+    """
+    reader = pd.read_csv(
+        path,
+        usecols=["timestamp", "occupancy"],
+        dtype={"timestamp": str, "occupancy": str},
+        chunksize=chunk_rows,
+    )
+    for chunk in reader:
+        times = pd.to_datetime(chunk["timestamp"], errors="coerce", format="ISO8601")
+        if times.dt.tz is not None:
+            times = times.dt.tz_convert("UTC").dt.tz_localize(None)
+        elif source_tz != "UTC":
+            times = (
+                times.dt.tz_localize(source_tz, ambiguous="NaT", nonexistent="NaT")
+                .dt.tz_convert("UTC")
+                .dt.tz_localize(None)
+            )
+        values = pd.to_numeric(chunk["occupancy"], errors="coerce")
+
+        valid = (times.notna() & values.notna()).to_numpy()
+        timestamps_ns = times.to_numpy(dtype="datetime64[ns]")[valid].view(np.int64)
+        occupancy = values.to_numpy(dtype=np.float64)[valid].round().astype(np.int64)
+        yield timestamps_ns, occupancy, len(chunk)
+
+
+class CsvImporter:
+    """Writes the windows of a readings CSV and registers them in batches."""
+
+    def __init__(
+        self,
+        adapter: AzureBlobStorageAdapter,
+        uid: str,
+        max_workers: int = 8,
+        window_seconds: int = WINDOW_SECONDS,
+        encode_updates: Optional[bool] = None,
+    ):
+        """
+        Initialize the importer.
+
+        Args:
+            adapter: Storage adapter of the data container
+            uid: Location UID the readings belong to (e.g. 'SSD-7')
+            max_workers: Concurrent window uploads
+            window_seconds: Window length
+            encode_updates: Store updates in the change-only encoding
+                            (default: WINDOW_UPDATE_ENCODING != 'plain')
+        """
+        self.adapter = adapter
+        self.uid = uid
+        self.series = occupancy_series(uid)
+        self.max_workers = max_workers
+        self.window_seconds = window_seconds
+        if encode_updates is None:
+            encode_updates = os.getenv("WINDOW_UPDATE_ENCODING", "delta") != "plain"
+        self.encode_updates = encode_updates
+        self.logger = Logger("import")
+
+    def run(
+        self,
+        path: str,
+        checkpoint: Optional[str] = None,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+        source_tz: str = "UTC",
+    ) -> dict:
+        """
+        Import a readings CSV, resuming from a checkpoint if one exists.
+
+        Args:
+            path: CSV file with 'timestamp' and 'occupancy' columns
+            checkpoint: JSON file recording the progress (None: no resume)
+            chunk_rows: Rows read per chunk
+            source_tz: Time zone of naive timestamps in the file
+
+        Returns:
+            Counters: rows, invalid, skipped (before the checkpoint), late,
+            windows, uploaded, existing and pending (rows of a window that
+            has not ended yet)
+        """
+        state = self._load_checkpoint(checkpoint)
+        resume_ns = state.get("done_ns", 0)
+        counters = {
+            "rows": 0,
+            "invalid": 0,
+            "skipped": 0,
+            "late": 0,
+            "windows": 0,
+            "uploaded": 0,
+            "existing": 0,
+            "pending": 0,
+        }
+        if resume_ns:
+            self.logger.log_info(
+                "Resuming %s after %s", path, state.get("done"), uid=self.uid
+            )
+
+        width = self.window_seconds * _NS
+        carry_ts = np.empty(0, dtype=np.int64)
+        carry_values = np.empty(0, dtype=np.int64)
+        done_ns = resume_ns
+        first_ns = None
+
+        for timestamps_ns, occupancy, rows in read_readings(
+            path, chunk_rows, source_tz
+        ):
+            counters["rows"] += rows
+            counters["invalid"] += rows - len(timestamps_ns)
+
+            keep = timestamps_ns >= resume_ns
+            counters["skipped"] += int((~keep).sum())
+            timestamps_ns, occupancy = timestamps_ns[keep], occupancy[keep]
+
+            late = timestamps_ns < done_ns
+            counters["late"] += int(late.sum())
+            timestamps_ns = np.concatenate((carry_ts, timestamps_ns[~late]))
+            occupancy = np.concatenate((carry_values, occupancy[~late]))
+            if len(timestamps_ns) == 0:
+                continue
+
+            order = np.argsort(timestamps_ns, kind="stable")
+            timestamps_ns, occupancy = timestamps_ns[order], occupancy[order]
+
+            # The last window may continue in the next chunk
+            open_start = timestamps_ns[-1] - timestamps_ns[-1] % width
+            closed = timestamps_ns < open_start
+            carry_ts, carry_values = timestamps_ns[~closed], occupancy[~closed]
+            if closed.any():
+                if first_ns is None:
+                    first_ns = int(timestamps_ns[0])
+                done_ns = int(open_start)
+                self._import_batch(timestamps_ns[closed], occupancy[closed], counters)
+                self._save_checkpoint(checkpoint, path, done_ns, counters)
+
+        # The last window is complete once its end has passed; otherwise the
+        # file is still being appended to and the next run picks it up
+        if len(carry_ts):
+            end_ns = int(carry_ts[-1] - carry_ts[-1] % width + width)
+            if end_ns <= time.time_ns():
+                if first_ns is None:
+                    first_ns = int(carry_ts[0])
+                self._import_batch(carry_ts, carry_values, counters)
+                self._save_checkpoint(checkpoint, path, end_ns, counters)
+            else:
+                counters["pending"] = len(carry_ts)
+
+        # Fold the imported days into the daily and weekday-hour rollups;
+        # days folded before the import are recomputed
+        if first_ns is not None and counters["windows"]:
+            rollups = self.adapter.rollups
+            first = _EPOCH + timedelta(microseconds=first_ns // 1000)
+            day = rollups.local_time(first.isoformat()).date().isoformat()
+            rollups.refresh_derived(self.series, since=day)
+
+        self.logger.log_info("Imported %s", path, uid=self.uid, **counters)
+        return counters
+
+    def _import_batch(self, timestamps_ns, occupancy, counters) -> None:
+        """Upload the windows of sorted readings, then register them."""
+        windows = build_windows(timestamps_ns, occupancy, self.uid, self.window_seconds)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(self._upload, windows))
+
+        names = [name for name, _ in results]
+        # Existing windows are registered too: a previous run may have
+        # stopped between the upload and the registration
+        self.adapter.index.record_many(names)
+        self.adapter.rollups.merge_windows(self.series, zip(names, windows))
+
+        uploaded = sum(created for _, created in results)
+        counters["windows"] += len(windows)
+        counters["uploaded"] += uploaded
+        counters["existing"] += len(windows) - uploaded
+        self.logger.log_info(
+            "Imported %d windows up to %s",
+            len(windows),
+            windows[-1]["window"]["end"],
+            uid=self.uid,
+        )
+
+    def _upload(self, window: dict) -> tuple:
+        """Write a window blob unless it exists; returns (name, created)."""
+        start = datetime.fromisoformat(window["window"]["start"])
+        # Same layout as the listener's WindowWriter
+        blob_name = f"occupancy_data/{start.strftime('%Y%m%d_%H%M%S')}_{self.uid}.json"
+        stored = encode_window(window) if self.encode_updates else window
+        body = json.dumps(stored, separators=(",", ":"))
+        try:
+            with STORAGE_SECONDS.labels(operation="write").time():
+                self.adapter.container_client.get_blob_client(blob_name).upload_blob(
+                    body, overwrite=False
+                )
+        except ResourceExistsError:
+            return blob_name, False
+        BYTES_WRITTEN.inc(len(body))
+        return blob_name, True
+
+    def _load_checkpoint(self, checkpoint: Optional[str]) -> dict:
+        """Read the progress of a previous run of the same UID."""
+        if not checkpoint or not os.path.exists(checkpoint):
+            return {}
+        with open(checkpoint) as f:
+            state = json.load(f)
+        if state.get("uid") != self.uid:
+            raise ValueError(
+                f"Checkpoint {checkpoint} belongs to {state.get('uid')}, not {self.uid}"
+            )
+        return state
+
+    def _save_checkpoint(self, checkpoint, path, done_ns, counters) -> None:
+        """Atomically record that every window before done_ns is imported."""
+        if not checkpoint:
+            return
+        state = {
+            "uid": self.uid,
+            "source": os.path.abspath(path),
+            "done": (_EPOCH + timedelta(microseconds=done_ns // 1000)).isoformat(),
+            "done_ns": done_ns,
+            "counters": counters,
+        }
+        directory = os.path.dirname(os.path.abspath(checkpoint))
+        fd, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(temporary, checkpoint)
@@ -0,0 +1,227 @@
+"""
+Downsampling of occupancy series for charts.
+
+A month of 3-4 s readings is several hundred thousand points, while a chart
+is at most a few thousand pixels wide. Two reductions are offered:
+
+    minmax: The time range is cut into points / 2 equal-width buckets (one
+            per pixel column); the lowest and highest reading of every
+            bucket are kept, so no peak or dip disappears.
+    lttb:   Largest-Triangle-Three-Buckets keeps, per bucket, the reading
+            spanning the largest triangle with its neighbours, which follows
+            the shape of the line with exactly `points` readings.
+
+Results are cached per (uid, range, points, method) in a byte-budget LRU.
+An entry of a range that reaches the newest window of the UID remembers
+that window's ETag and is recomputed once a newer window was written. A
+range that ends before the newest window starts is closed: its windows are
+all written, so its entry is kept by its bounds alone.
+
+Configuration:
+    SERIES_CACHE_MAX_BYTES: Byte budget of the result cache (default 8 MiB)
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import List, Optional
+import numpy as np
+from azure_storage.blob_cache import BlobCache, CacheEntry
+from azure_storage.blob_index import occupancy_series
+from azure_storage.repository import AzureBlobRepository
+
+# Version of the results of a range that no longer changes
+CLOSED_RANGE = "closed"
+
+
+def minmax_indices(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """
+    Select the lowest and highest reading of equal-width time buckets.
+
+    Args:
+        x: Sorted sample times
+        y: Sample values
+        points: Maximum number of samples to keep (two per bucket)
+
+    Returns:
+        Sorted indices of the kept samples
+    """
+    n = len(x)
+    if n <= points:
+        return np.arange(n)
+
+    buckets = max(points // 2, 1)
+    span = x[-1] - x[0]
+    if span > 0:
+        bucket = ((x - x[0]) * (buckets / span)).astype(np.int64)
+        bucket = np.minimum(bucket, buckets - 1)
+    else:
+        bucket = np.zeros(n, dtype=np.int64)
+
+    # Within every bucket the first entry is its minimum, the last its maximum
+    order = np.lexsort((y, bucket))
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(bucket[order])) + 1))
+    ends = np.append(starts[1:], n) - 1
+    return np.unique(np.concatenate((order[starts], order[ends])))
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """
+    Select samples with Largest-Triangle-Three-Buckets.
+
+    The first and last sample are kept; the samples in between are split
+    into points - 2 buckets of equal count. Bucket bounds and the centroids
+    of all buckets are computed up front, and the triangle areas of a bucket
+    in one array operation. Only the walk from bucket to bucket, where each
+    choice depends on the previous one, remains a loop.
+
+    Args:
+        x: Sorted sample times
+        y: Sample values
+        points: Number of samples to keep (at least 3)
+
+    Returns:
+        Sorted indices of the kept samples
+    """
+    n = len(x)
+    if n <= points or points < 3:
+        return np.arange(n) if n <= points else np.array([0, n - 1])
+
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    sizes = np.diff(edges)
+    # Centroid of the following bucket; after the last bucket, the last sample
+    next_x = np.append((np.add.reduceat(x[:-1], edges[:-1]) / sizes)[1:], x[-1])
+    next_y = np.append((np.add.reduceat(y[:-1], edges[:-1]) / sizes)[1:], y[-1])
+
+    selected = np.empty(points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    anchor = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[anchor], y[anchor]
+        area = np.abs(
+            (ax - next_x[i]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (next_y[i] - ay)
+        )
+        anchor = lo + int(np.argmax(area))
+        selected[i + 1] = anchor
+    return selected
+
+
+METHODS = {"minmax": minmax_indices, "lttb": lttb_indices}
+
+
+def downsample(updates: List[dict], points: int, method: str = "minmax") -> list:
+    """
+    Reduce occupancy updates to at most `points` readings.
+
+    Args:
+        updates: {'occupancy': int, 'timestamp': str} dicts sorted by time
+                 (naive UTC ISO 8601 timestamps)
+        points: Target number of readings
+        method: 'minmax' or 'lttb'
+
+    Returns:
+        [timestamp, occupancy] pairs in time order
+
+    Raises:
+        ValueError: If the method is unknown
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method: {method} (use {' or '.join(METHODS)})")
+    if not updates:
+        return []
+
+    timestamps = [update["timestamp"] for update in updates]
+    x = np.array(timestamps, dtype="datetime64[ms]").astype(np.int64) / 1000.0
+    y = np.array([update["occupancy"] for update in updates], dtype=np.float64)
+
+    return [
+        [timestamps[i], updates[i]["occupancy"]]
+        for i in METHODS[method](x, y, points).tolist()
+    ]
+
+
+class SeriesDownsampler:
+    """Serves downsampled occupancy series through a result cache."""
+
+    def __init__(self, repository: AzureBlobRepository, cache: BlobCache = None):
+        """
+        Initialize the downsampler.
+
+        Args:
+            repository: Repository the readings are read from
+            cache: Optional BlobCache for the results. If not provided, one
+                   is created from SERIES_CACHE_MAX_BYTES.
+        """
+        self.repository = repository
+        if cache is None:
+            cache = BlobCache(
+                max_bytes=int(os.getenv("SERIES_CACHE_MAX_BYTES", 8 * 1024 * 1024))
+            )
+        self.cache = cache
+
+    def get_series(
+        self, uid: str, start: datetime, end: datetime, points: int, method: str
+    ) -> dict:
+        """
+        Retrieve the downsampled readings of a UID within a time range.
+
+        Args:
+            uid: CrowdMonitor location UID (e.g. 'SSD-7')
+            start: Inclusive range start (UTC)
+            end: Inclusive range end (UTC)
+            points: Target number of readings
+            method: 'minmax' or 'lttb'
+
+        Returns:
+            {'uid', 'from', 'to', 'method', 'points', 'count', 'series'} where
+            count is the number of raw readings and series holds
+            [timestamp, occupancy] pairs
+        """
+        if method not in METHODS:
+            raise ValueError(f"Unknown method: {method} (use {' or '.join(METHODS)})")
+
+        key = f"{uid}|{start.isoformat()}|{end.isoformat()}|{points}|{method}"
+        version = self._version(uid, end)
+        entry = self.cache.get(key)
+        if entry is not None and entry.etag == version:
+            return entry.data
+
+        updates = self.repository.get_occupancy_updates(uid, start, end)
+        data = {
+            "uid": uid,
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "method": method,
+            "points": points,
+            "count": len(updates),
+            "series": downsample(updates, points, method),
+        }
+        size = len(json.dumps(data, separators=(",", ":")))
+        self.cache.put(key, CacheEntry(data, version, None, size))
+        return data
+
+    def cache_stats(self) -> dict:
+        """
+        Retrieve the result cache counters.
+
+        Returns:
+            Dictionary with hit/miss/eviction counters and current usage
+        """
+        return self.cache.stats()
+
+    def _version(self, uid: str, end: datetime) -> Optional[str]:
+        """
+        Version of the results of a range ending at `end`.
+
+        Returns:
+            CLOSED_RANGE if the range ends before the newest window of the
+            UID starts, else the ETag of that window (None if it has none)
+        """
+        entry = self.repository.get_latest_entry(occupancy_series(uid))
+        if entry is None:
+            return None
+        newest = (entry.data.get("window") or {}).get("start")
+        if newest is not None and end < datetime.fromisoformat(newest):
+            return CLOSED_RANGE
+        return entry.etag
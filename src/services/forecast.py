@@ -0,0 +1,265 @@
+"""
+Occupancy forecast per weekday and hour of day.
+
+The forecast of an hour is the distribution of the occupancy seen at the
+same local weekday and hour in the past, with recent weeks counting more:
+every reading is weighted by 0.5 ** (age in days / half-life). Quantiles
+are weighted nearest-rank quantiles.
+
+The model is fitted from the hourly rollups (one document per local day,
+holding a value histogram per hour), so the whole history is a few
+hundred small documents. It is kept in memory per UID: a request is a
+dictionary lookup. At most once per refresh interval the latest pointer of
+the series is revalidated; when new windows arrived, only the new days and
+the newest known day are read again and the model is refitted.
+
+Configuration:
+    FORECAST_HALF_LIFE_DAYS: Age at which a reading counts half (default 28)
+    FORECAST_REFRESH_SECONDS: Minimum time between checks for new windows
+                              (default 300)
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Executor
+from datetime import date
+from typing import Dict, Optional, Tuple
+import numpy as np
+from azure_storage.blob_adapter import AzureBlobStorageAdapter
+from azure_storage.blob_index import occupancy_series
+from utils.logger import Logger
+
+QUANTILES = {"p10": 0.1, "p25": 0.25, "p50": 0.5, "p75": 0.75, "p90": 0.9}
+
+
+def fit_profile(
+    days: np.ndarray,
+    hours: np.ndarray,
+    values: np.ndarray,
+    counts: np.ndarray,
+    half_life_days: float,
+) -> Dict[Tuple[int, int], dict]:
+    """
+    Fit recency-weighted quantiles per (weekday, hour).
+
+    Args:
+        days: Local day of every histogram entry (datetime64[D])
+        hours: Local hour of every entry
+        values: Occupancy value of every entry
+        counts: Number of readings with that value
+        half_life_days: Age in days at which a reading counts half
+
+    Returns:
+        Mapping of (weekday with Monday = 0, hour) to {'count', 'mean',
+        'p10', 'p25', 'p50', 'p75', 'p90'}
+    """
+    if len(days) == 0:
+        return {}
+
+    age = (days.max() - days).astype(np.float64)
+    weights = counts * np.power(0.5, age / half_life_days)
+    # 1970-01-01 was a Thursday
+    weekdays = (days.astype(np.int64) + 3) % 7
+    groups = weekdays * 24 + hours
+
+    order = np.lexsort((values, groups))
+    groups, values, weights = groups[order], values[order], weights[order]
+    counts = counts[order]
+
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(groups)) + 1))
+    ends = np.append(starts[1:], len(groups))
+    cumulative = np.cumsum(weights)
+    before = np.concatenate(([0.0], cumulative))[starts]
+    totals = cumulative[ends - 1] - before
+
+    columns = {
+        "count": np.add.reduceat(counts, starts),
+        "mean": np.add.reduceat(values * weights, starts) / totals,
+    }
+    for name, q in QUANTILES.items():
+        # First value whose cumulative weight reaches q of the group's weight
+        index = np.searchsorted(cumulative, before + q * totals, side="left")
+        columns[name] = values[np.minimum(index, ends - 1)]
+
+    keys = groups[starts].tolist()
+    rows = zip(*(column.tolist() for column in columns.values()))
+    return {
+        (key // 24, key % 24): dict(zip(columns, row)) for key, row in zip(keys, rows)
+    }
+
+
+class _Series:
+    """In-memory model of one UID."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checked = None  # time.monotonic() of the last check
+        self.pointer_etag = None
+        # local day -> (rollup etag, (hours, values, counts))
+        self.days: Dict[str, tuple] = {}
+        self.profile: Optional[Dict[Tuple[int, int], dict]] = None
+        self.updated = None
+
+
+class OccupancyForecaster:
+    """Keeps a forecast model per UID, refitted when new windows arrive."""
+
+    def __init__(
+        self,
+        adapter: AzureBlobStorageAdapter,
+        executor: Optional[Executor] = None,
+        half_life_days: Optional[float] = None,
+        refresh_seconds: Optional[float] = None,
+    ):
+        """
+        Initialize the forecaster.
+
+        Args:
+            adapter: Storage adapter of the data container
+            executor: Executor for reading rollups concurrently (optional)
+            half_life_days: See FORECAST_HALF_LIFE_DAYS
+            refresh_seconds: See FORECAST_REFRESH_SECONDS
+        """
+        self.adapter = adapter
+        self.executor = executor
+        if half_life_days is None:
+            half_life_days = float(os.getenv("FORECAST_HALF_LIFE_DAYS", 28))
+        if refresh_seconds is None:
+            refresh_seconds = float(os.getenv("FORECAST_REFRESH_SECONDS", 300))
+        self.half_life_days = half_life_days
+        self.refresh_seconds = refresh_seconds
+        self.logger = Logger("forecast")
+        self._series: Dict[str, _Series] = {}
+        self._lock = threading.Lock()
+
+    def forecast(self, uid: str, day: date) -> Optional[dict]:
+        """
+        Return the forecast of a local day.
+
+        Args:
+            uid: CrowdMonitor location UID (e.g. 'SSD-7')
+            day: Local date to forecast
+
+        Returns:
+            Dictionary with the weekday, the model's time range and one
+            {'hour', 'count', 'mean', 'p10', ..., 'p90'} entry per hour with
+            history, or None if the UID has no data
+        """
+        state = self._refreshed(uid)
+        if not state.profile:
+            return None
+
+        weekday = day.weekday()
+        hours = [
+            {"hour": hour, **state.profile[(weekday, hour)]}
+            for hour in range(24)
+            if (weekday, hour) in state.profile
+        ]
+        known = sorted(state.days)
+        return {
+            "weekday": weekday,
+            "half_life_days": self.half_life_days,
+            "history": {"from": known[0], "to": known[-1], "days": len(known)},
+            "updated": state.updated,
+            "hours": hours,
+        }
+
+    def _refreshed(self, uid: str) -> _Series:
+        """Return the model of a UID, checking for new windows if due."""
+        with self._lock:
+            state = self._series.setdefault(uid, _Series())
+
+        if state.checked is not None and (
+            time.monotonic() - state.checked < self.refresh_seconds
+        ):
+            return state
+
+        # While a model exists, other requests keep using it during a refresh
+        if not state.lock.acquire(blocking=state.profile is None):
+            return state
+        try:
+            if state.checked is None or (
+                time.monotonic() - state.checked >= self.refresh_seconds
+            ):
+                self._refresh(uid, state)
+        finally:
+            state.lock.release()
+        return state
+
+    def _refresh(self, uid: str, state: _Series) -> None:
+        """Reread changed rollups and refit the model of a UID."""
+        series = occupancy_series(uid)
+        started = time.monotonic()
+        _, etag, modified = self.adapter.index.read_latest(series, state.pointer_etag)
+        if not modified and state.profile is not None:
+            state.checked = started
+            return
+
+        rollups = self.adapter.rollups
+        prefix = rollups.hourly_prefix(series)
+        days = [
+            name[len(prefix) : -len(".json")]
+            for name in self.adapter.list_blobs(prefix)
+        ]
+        # New windows land in the newest days; older days only change when
+        # history is imported, which adds days the model does not know yet
+        newest = max(state.days) if state.days else ""
+        stale = [day for day in days if day not in state.days or day >= newest]
+
+        def read(day):
+            known = state.days.get(day)
+            return rollups.read_document(
+                rollups.hourly_blob_name(series, day), known[0] if known else None
+            )
+
+        mapper = self.executor.map if self.executor else map
+        for day, (document, day_etag, changed) in zip(stale, mapper(read, stale)):
+            if changed and document is not None:
+                state.days[day] = (day_etag, self._histogram(document))
+        for day in set(state.days).difference(days):
+            del state.days[day]
+
+        state.profile = self._fit(state.days)
+        state.pointer_etag = etag
+        # A failed refresh is retried by the next request
+        state.checked = started
+        state.updated = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        self.logger.log_info(
+            "Forecast model of %s refitted from %d days (%d reread)",
+            uid,
+            len(state.days),
+            len(stale),
+        )
+
+    @staticmethod
+    def _histogram(document: dict) -> tuple:
+        """Flatten the hourly buckets of a rollup into (hour, value, count)."""
+        hours, values, counts = [], [], []
+        for hour, bucket in document["buckets"].items():
+            for value, count in bucket["sketch"].items():
+                hours.append(int(hour))
+                values.append(int(value))
+                counts.append(count)
+        return (
+            np.array(hours, dtype=np.int64),
+            np.array(values, dtype=np.float64),
+            np.array(counts, dtype=np.int64),
+        )
+
+    def _fit(self, days: Dict[str, tuple]) -> Dict[Tuple[int, int], dict]:
+        """Fit the profile over every known day."""
+        if not days:
+            return {}
+        parts = [histogram for _, histogram in days.values()]
+        day_column = np.repeat(
+            np.array(list(days), dtype="datetime64[D]"),
+            [len(hours) for hours, _, _ in parts],
+        )
+        return fit_profile(
+            day_column,
+            np.concatenate([hours for hours, _, _ in parts]),
+            np.concatenate([values for _, values, _ in parts]),
+            np.concatenate([counts for _, _, counts in parts]),
+            self.half_life_days,
+        )
@@ -0,0 +1,175 @@
+"""
+Shared live feed for Server-Sent Events.
+
+A single background poller reads the newest blobs of a few series and
+fans every change out to all connected clients, so storage reads depend
+on the poll interval only, not on the number of open dashboards.
+"""
+
+import json
+import queue
+import threading
+from typing import Callable, Dict, Iterator, Optional
+
+# Comment line sent to keep idle connections open
+KEEP_ALIVE = ": keep-alive\n\n"
+
+
+def format_event(event: str, data, event_id: Optional[str] = None) -> str:
+    """
+    Serialize one Server-Sent Event.
+
+    Args:
+        event: Event name
+        data: JSON-serializable payload
+        event_id: Optional event id (sent back by the browser on reconnect)
+
+    Returns:
+        Wire format of the event, terminated by a blank line
+    """
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    head = f"id: {event_id}\n" if event_id else ""
+    return f"{head}event: {event}\ndata: {body}\n\n"
+
+
+class LiveFeed:
+    """Polls the latest entries once and broadcasts changes to subscribers."""
+
+    def __init__(
+        self,
+        sources: Dict[str, Callable],
+        poll_seconds: float = 15.0,
+        max_pending: int = 16,
+        logger=None,
+    ):
+        """
+        Initialize the feed. The poller starts with the first subscriber and
+        stops after the last one has left.
+
+        Args:
+            sources: Event name -> callable returning the newest CacheEntry
+                     (or None) of that source
+            poll_seconds: Interval between two polls of every source
+            max_pending: Events queued per client before the oldest is dropped
+            logger: Optional Logger for poll errors
+        """
+        self.sources = sources
+        self.poll_seconds = poll_seconds
+        self.max_pending = max_pending
+        self.logger = logger
+
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._latest = {}
+        self._versions = {}
+        self._thread = None
+        self._wake = threading.Event()
+        self.polls = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        """Number of connected clients."""
+        return len(self._subscribers)
+
+    def subscribe(self) -> queue.Queue:
+        """
+        Register a client.
+
+        The queue is primed with the last known event of every source, so a
+        new client renders immediately without a storage read of its own.
+
+        Returns:
+            Queue receiving serialized events
+        """
+        subscriber = queue.Queue(self.max_pending)
+        with self._lock:
+            for message in self._latest.values():
+                subscriber.put_nowait(message)
+            self._subscribers.add(subscriber)
+            if self._thread is None:
+                self._wake.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name="live-feed", daemon=True
+                )
+                self._thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue) -> None:
+        """Remove a client; the poller stops with the last one."""
+        with self._lock:
+            self._subscribers.discard(subscriber)
+            if not self._subscribers:
+                self._wake.set()
+
+    def stream(self, heartbeat_seconds: float = 25.0) -> Iterator[str]:
+        """
+        Yield serialized events for one client until it disconnects.
+
+        Args:
+            heartbeat_seconds: Idle time after which a keep-alive comment is
+                               sent (also detects closed connections)
+
+        Yields:
+            Server-Sent Event strings
+        """
+        subscriber = self.subscribe()
+        try:
+            yield f"retry: {int(self.poll_seconds * 1000)}\n\n"
+            while True:
+                try:
+                    yield subscriber.get(timeout=heartbeat_seconds)
+                except queue.Empty:
+                    yield KEEP_ALIVE
+        finally:
+            self.unsubscribe(subscriber)
+
+    def poll(self) -> None:
+        """Read every source once and publish the entries that changed."""
+        self.polls += 1
+        for event, source in self.sources.items():
+            try:
+                entry = source()
+            except Exception as e:
+                if self.logger is not None:
+                    self.logger.log_error(f"Live feed failed to read {event}: {e}")
+                continue
+            if entry is None:
+                continue
+
+            version = entry.etag or json.dumps(entry.data, sort_keys=True)
+            if self._versions.get(event) == version:
+                continue
+            self._versions[event] = version
+            event_id = entry.etag.strip('"') if entry.etag else None
+            self._publish(event, format_event(event, entry.data, event_id))
+
+    def _publish(self, event: str, message: str) -> None:
+        """Remember an event and hand it to every subscriber."""
+        with self._lock:
+            self._latest[event] = message
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                # Slow client: only the newest state matters, drop the oldest
+                try:
+                    subscriber.get_nowait()
+                except queue.Empty:
+                    pass
+                try:
+                    subscriber.put_nowait(message)
+                except queue.Full:
+                    pass
+
+    def _run(self) -> None:
+        """Poll until the last subscriber has left."""
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+            self.poll()
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
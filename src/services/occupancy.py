@@ -0,0 +1,96 @@
+"""Server-side aggregation of occupancy time series."""
+
+import re
+from datetime import datetime, timezone
+from typing import List
+
+_RESOLUTION_PATTERN = re.compile(r"^(\d+)([smhd]?)$")
+_UNIT_SECONDS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_resolution(value: str) -> int:
+    """
+    Parse a bucket resolution such as '300', '5m', '1h' or '1d'.
+
+    Args:
+        value: Resolution string (plain numbers are seconds)
+
+    Returns:
+        Resolution in seconds
+
+    Raises:
+        ValueError: If the resolution is malformed or not positive
+    """
+    match = _RESOLUTION_PATTERN.match(value.strip().lower())
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"Invalid resolution: {value}")
+    return int(match.group(1)) * _UNIT_SECONDS[match.group(2)]
+
+
+def _epoch(timestamp: datetime) -> float:
+    """Seconds since the epoch of a naive UTC datetime."""
+    return timestamp.replace(tzinfo=timezone.utc).timestamp()
+
+
+def bucket_updates(updates: List[dict], resolution_seconds: int) -> List[dict]:
+    """
+    Aggregate occupancy updates into fixed-width, epoch-aligned buckets.
+
+    Updates are sorted, so timestamps are only parsed when an update falls
+    past the end of the current bucket; everything else is a string compare.
+
+    Args:
+        updates: {'occupancy': int, 'timestamp': str} dicts sorted by time
+        resolution_seconds: Bucket width in seconds
+
+    Returns:
+        One {'start', 'end', 'count', 'min', 'max', 'avg'} dict per bucket
+        that received at least one update, in time order
+    """
+    buckets = []
+    current_key = None
+    current_end = ""
+    count = total = 0
+    low = high = None
+
+    def close_bucket():
+        buckets.append(
+            {
+                "start": datetime.utcfromtimestamp(
+                    current_key * resolution_seconds
+                ).isoformat(),
+                "end": current_end,
+                "count": count,
+                "min": low,
+                "max": high,
+                "avg": total / count,
+            }
+        )
+
+    for update in updates:
+        occupancy = update["occupancy"]
+
+        if current_key is None or update["timestamp"] >= current_end:
+            if current_key is not None:
+                close_bucket()
+            current_key = int(
+                _epoch(datetime.fromisoformat(update["timestamp"]))
+                // resolution_seconds
+            )
+            current_end = datetime.utcfromtimestamp(
+                (current_key + 1) * resolution_seconds
+            ).isoformat()
+            count = total = 0
+            low = high = occupancy
+
+        count += 1
+        total += occupancy
+        if occupancy < low:
+            low = occupancy
+        elif occupancy > high:
+            high = occupancy
+
+    if current_key is not None:
+        close_bucket()
+
+    return buckets
@@ -0,0 +1,74 @@
+"""Test doubles shared by the test modules."""
+
+import pytest
+from azure.core.exceptions import (
+    ResourceExistsError,
+    ResourceModifiedError,
+    ResourceNotFoundError,
+)
+
+
+class FakeBlob:
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeDownloader:
+    def __init__(self, content, etag):
+        self.content = content
+        self.properties = type("Properties", (), {"etag": etag})()
+
+    def readall(self):
+        return self.content
+
+
+class FakeBlobClient:
+    def __init__(self, container, name):
+        self.container = container
+        self.name = name
+
+    def download_blob(self):
+        self.container.downloads += 1
+        if self.name not in self.container.blobs:
+            raise ResourceNotFoundError("missing")
+        content, etag = self.container.blobs[self.name]
+        return FakeDownloader(content, etag)
+
+    def upload_blob(self, data, overwrite=False, etag=None, match_condition=None):
+        current = self.container.blobs.get(self.name)
+        if current and not overwrite:
+            raise ResourceExistsError("exists")
+        if etag is not None and (current is None or current[1] != etag):
+            raise ResourceModifiedError("modified")
+        self.container.version += 1
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self.container.blobs[self.name] = (data, str(self.container.version))
+
+    def delete_blob(self):
+        if self.name not in self.container.blobs:
+            raise ResourceNotFoundError("missing")
+        del self.container.blobs[self.name]
+
+
+class FakeContainerClient:
+    def __init__(self):
+        self.blobs = {}
+        self.version = 0
+        self.downloads = 0
+
+    def get_blob_client(self, name):
+        return FakeBlobClient(self, name)
+
+    def list_blobs(self, name_starts_with=""):
+        return [
+            FakeBlob(n) for n in sorted(self.blobs) if n.startswith(name_starts_with)
+        ]
+
+
+@pytest.fixture
+def fake_container(request):
+    """Attach an empty FakeContainerClient to the test case as self.container."""
+    container = FakeContainerClient()
+    request.instance.container = container
+    return container
@@ -0,0 +1,179 @@
+import importlib
+import os
+import sys
+import unittest
+from unittest import mock
+from azure_storage import clients
+
+
+class ApiTestCase(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(
+            os.environ, {"STORAGE_BACKEND": "memory", "LOG_LEVEL": "WARNING"}
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(clients.reset_clients)
+        clients.reset_clients()
+
+        import api.app  # noqa: F401
+
+        # The module builds its repository on import, so rebuild it per test;
+        # api re-exports the Flask object as api.app, hence sys.modules
+        self.app = importlib.reload(sys.modules["api.app"])
+        self.addCleanup(self.app.repository.executor.shutdown)
+        self.client = self.app.app.test_client()
+
+
+class TestBlobRoute(ApiTestCase):
+    def test_window_blob_is_served(self):
+        blob_name = "occupancy_data/20251112_144000_SSD-7.json"
+        window = {
+            "window": {"start": "2025-11-12T14:40:00", "end": "2025-11-12T14:45:00"},
+            "target_uid": "SSD-7",
+            "updates": [{"occupancy": 95, "timestamp": "2025-11-12T14:40:57"}],
+        }
+        self.app.repository.adapter.save_data(window, blob_name)
+
+        response = self.client.get(f"/api/data/{blob_name}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["updates"], window["updates"])
+
+        missing = self.client.get("/api/data/occupancy_data/20251112_145000_SSD-7.json")
+        self.assertEqual(missing.status_code, 404)
+
+    def test_index_and_rollup_documents_are_not_served(self):
+        blob_name = "occupancy_data/20251112_144000_SSD-7.json"
+        window = {
+            "window": {"start": "2025-11-12T14:40:00", "end": "2025-11-12T14:45:00"},
+            "updates": [{"occupancy": 95, "timestamp": "2025-11-12T14:40:57"}],
+        }
+        adapter = self.app.repository.adapter
+        adapter.save_data(window, blob_name)
+        adapter.rollups.merge_windows("occupancy_data/SSD-7", [(blob_name, window)])
+        names = adapter.list_blobs("_")
+        self.assertTrue(any(name.startswith("_index/") for name in names))
+        self.assertTrue(any(name.startswith("_rollups/") for name in names))
+
+        for name in names:
+            response = self.client.get(f"/api/data/{name}")
+            self.assertEqual(response.status_code, 404)
+            self.assertNotIn("immutable", response.headers.get("Cache-Control", ""))
+        self.assertEqual(self.app.repository.cache_stats()["entries"], 0)
+
+
+class TestBlobListRoute(ApiTestCase):
+    def test_pages_follow_the_continuation_token(self):
+        names = [
+            f"scraped_data_2024-01-{day:02d}_12-00-00.json" for day in (14, 15, 16)
+        ]
+        for name in names:
+            self.app.repository.adapter.save_data({}, name)
+
+        listed, token = [], None
+        while True:
+            query = "limit=2&order=desc"
+            if token:
+                query += f"&continuation_token={token}"
+            response = self.client.get(f"/api/data/blobs?{query}")
+            self.assertEqual(response.status_code, 200)
+            body = response.get_json()
+            self.assertEqual(body["count"], len(body["blobs"]))
+            listed.extend(body["blobs"])
+            token = body["continuation_token"]
+            if token is None:
+                break
+
+        self.assertEqual(listed, names[::-1])
+
+    def test_invalid_requests(self):
+        for query in (
+            "limit=0",
+            "order=sideways",
+            "from=yesterday",
+            "continuation_token=garbage",
+            "order=desc&continuation_token=eyJvcmRlciI6ImRlc2MiLCJiZWZvcmUiOiJ4In0",
+        ):
+            response = self.client.get(f"/api/data/blobs?{query}")
+            self.assertEqual(response.status_code, 400, query)
+
+
+class TestOccupancyRoute(ApiTestCase):
+    def test_buckets(self):
+        for minute in (0, 5, 10):
+            name = f"occupancy_data/20240115_09{minute:02d}00_SSD-7.json"
+            updates = [
+                {
+                    "occupancy": minute + i,
+                    "timestamp": f"2024-01-15T09:{minute:02d}:0{i}",
+                }
+                for i in range(3)
+            ]
+            self.app.repository.adapter.save_data({"updates": updates}, name)
+
+        response = self.client.get(
+            "/api/occupancy?uid=SSD-7&resolution=10m"
+            "&from=2024-01-15T09:00:01Z&to=2024-01-15T09:10:00Z"
+        )
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual(body["count"], 6)
+        self.assertEqual(
+            [(b["start"], b["count"], b["min"], b["max"]) for b in body["buckets"]],
+            [("2024-01-15T09:00:00", 5, 1, 7), ("2024-01-15T09:10:00", 1, 10, 10)],
+        )
+
+    def test_invalid_requests(self):
+        for query in (
+            "from=2024-01-15T09:00:00Z",
+            "from=2024-01-15T10:00:00Z&to=2024-01-15T09:00:00Z",
+            "from=2024-01-01T00:00:00Z&to=2024-03-01T00:00:00Z",
+            "from=2024-01-01T00:00:00Z&to=2024-01-31T00:00:00Z&resolution=1",
+            "from=2024-01-15T09:00:00Z&to=2024-01-15T10:00:00Z&resolution=soon",
+        ):
+            response = self.client.get(f"/api/occupancy?uid=SSD-7&{query}")
+            self.assertEqual(response.status_code, 400, query)
+
+
+class TestTrendsRoute(ApiTestCase):
+    def test_trends(self):
+        window = {
+            "updates": [
+                {"occupancy": value, "timestamp": f"2024-01-15T09:00:0{i}"}
+                for i, value in enumerate((10, 20))
+            ]
+        }
+        self.app.repository.adapter.rollups.merge_windows(
+            "occupancy_data/SSD-7",
+            [("occupancy_data/20240115_090000_SSD-7.json", window)],
+        )
+
+        response = self.client.get(
+            "/api/trends?uid=SSD-7&kind=daily"
+            "&from=2024-01-01T00:00:00Z&to=2024-01-31T00:00:00Z"
+        )
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual(body["kind"], "daily")
+        self.assertEqual(
+            [(b["bucket"], b["count"], b["avg"]) for b in body["buckets"]],
+            [("2024-01-15", 2, 15)],
+        )
+
+        response = self.client.get("/api/trends?uid=SSD-7&kind=weekday_hour")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()["buckets"]), 1)
+
+    def test_invalid_trend_requests(self):
+        for query in (
+            "kind=monthly",
+            "kind=hourly",
+            "kind=daily&from=2024-02-01T00:00:00Z&to=2024-01-01T00:00:00Z",
+            "kind=daily&from=2023-01-01T00:00:00Z&to=2024-06-01T00:00:00Z",
+        ):
+            response = self.client.get(f"/api/trends?uid=SSD-7&{query}")
+            self.assertEqual(response.status_code, 400, query)
+
+
+if __name__ == "__main__":
+    unittest.main()
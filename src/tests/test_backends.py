@@ -0,0 +1,164 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from azure.core import MatchConditions
+from azure.core.exceptions import (
+    ResourceExistsError,
+    ResourceModifiedError,
+    ResourceNotFoundError,
+    ResourceNotModifiedError,
+)
+from azure_storage import clients
+from azure_storage.backends import (
+    BackendContainerClient,
+    LocalDiskBackend,
+    MemoryBackend,
+)
+from azure_storage.blob_index import BlobIndex, occupancy_series
+
+
+class BackendContract:
+    """Behaviour both offline backends share with the Blob service."""
+
+    def make_backend(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.container = BackendContainerClient(self.make_backend(), "data")
+
+    def test_round_trip(self):
+        blob = self.container.get_blob_client("a/b/c.json")
+        blob.upload_blob('{"x": 1}', overwrite=True)
+        downloader = blob.download_blob()
+        self.assertEqual(downloader.readall(), b'{"x": 1}')
+        self.assertEqual(downloader.properties.size, 8)
+        self.assertIsNotNone(downloader.properties.last_modified)
+
+        blob.delete_blob()
+        with self.assertRaises(ResourceNotFoundError):
+            blob.download_blob()
+        with self.assertRaises(ResourceNotFoundError):
+            blob.delete_blob()
+
+    def test_conditional_requests(self):
+        blob = self.container.get_blob_client("doc.json")
+        blob.upload_blob(b"1", overwrite=False)
+        with self.assertRaises(ResourceExistsError):
+            blob.upload_blob(b"2", overwrite=False)
+
+        etag = blob.download_blob().properties.etag
+        with self.assertRaises(ResourceNotModifiedError):
+            blob.download_blob(etag=etag, match_condition=MatchConditions.IfModified)
+
+        blob.upload_blob(b"2", etag=etag, match_condition=MatchConditions.IfNotModified)
+        self.assertNotEqual(blob.download_blob().properties.etag, etag)
+        with self.assertRaises(ResourceModifiedError):
+            blob.upload_blob(
+                b"3", etag=etag, match_condition=MatchConditions.IfNotModified
+            )
+        self.assertEqual(blob.download_blob().readall(), b"2")
+
+    def test_listing_and_pages(self):
+        names = [f"logs/2024-01-0{day}.json" for day in range(1, 8)]
+        for name in reversed(names):
+            self.container.get_blob_client(name).upload_blob(b"{}")
+        self.container.get_blob_client("other.json").upload_blob(b"{}")
+
+        listed = [blob.name for blob in self.container.list_blobs("logs/")]
+        self.assertEqual(listed, names)
+
+        pages = self.container.list_blobs(
+            name_starts_with="logs/2024", results_per_page=3
+        ).by_page()
+        self.assertEqual([b.name for b in next(pages)], names[:3])
+        token = pages.continuation_token
+
+        pages = self.container.list_blobs(
+            name_starts_with="logs/2024", results_per_page=3
+        ).by_page(continuation_token=token)
+        self.assertEqual([b.name for b in next(pages)], names[3:6])
+        self.assertEqual([b.name for b in next(pages)], names[6:])
+        self.assertIsNone(pages.continuation_token)
+
+    def test_blob_index_runs_on_backend(self):
+        index = BlobIndex(self.container)
+        index.record("occupancy_data/20240115_100000_SSD-7.json")
+        index.record("occupancy_data/20240115_100500_SSD-7.json")
+
+        pointer = index.get_latest(occupancy_series("SSD-7"))
+        self.assertEqual(
+            pointer["blob_name"], "occupancy_data/20240115_100500_SSD-7.json"
+        )
+
+
+class TestMemoryBackend(BackendContract, unittest.TestCase):
+    def make_backend(self):
+        return MemoryBackend()
+
+
+class TestLocalDiskBackend(BackendContract, unittest.TestCase):
+    def make_backend(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        return LocalDiskBackend(self.root)
+
+    def test_writes_leave_no_temporary_files(self):
+        self.container.get_blob_client("a/doc.json").upload_blob(
+            b"x" * 4096, overwrite=True
+        )
+        self.container.get_blob_client("a/doc.json").upload_blob(b"y", overwrite=True)
+        self.assertEqual(os.listdir(os.path.join(self.root, "a")), ["doc.json"])
+        self.assertEqual(
+            [blob.name for blob in self.container.list_blobs()], ["a/doc.json"]
+        )
+
+    def test_etag_does_not_depend_on_file_metadata(self):
+        blob = self.container.get_blob_client("doc.json")
+        blob.upload_blob(b"1", overwrite=True)
+        path = os.path.join(self.root, "doc.json")
+        stat = os.stat(path)
+        etag = blob.download_blob().properties.etag
+
+        # Second write within the same mtime tick
+        blob.upload_blob(b"2", overwrite=True)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertNotEqual(blob.download_blob().properties.etag, etag)
+        with self.assertRaises(ResourceModifiedError):
+            blob.upload_blob(
+                b"3", etag=etag, match_condition=MatchConditions.IfNotModified
+            )
+        self.assertEqual(blob.download_blob().readall(), b"2")
+
+    def test_rejects_names_outside_root(self):
+        with self.assertRaises(ValueError):
+            self.container.get_blob_client("../escape.json").upload_blob(b"x")
+
+
+class TestBackendSelection(unittest.TestCase):
+    def tearDown(self):
+        clients.reset_clients()
+
+    def test_memory_backend_is_shared(self):
+        with mock.patch.dict(os.environ, {"STORAGE_BACKEND": "memory"}):
+            clients.reset_clients()
+            first = clients.get_container_client("data")
+            first.get_blob_client("a.json").upload_blob(b"1")
+
+            second = clients.get_container_client("data")
+            self.assertEqual(
+                second.get_blob_client("a.json").download_blob().readall(), b"1"
+            )
+            self.assertEqual(
+                list(clients.get_container_client("other").list_blobs()), []
+            )
+
+    def test_unknown_backend(self):
+        with mock.patch.dict(os.environ, {"STORAGE_BACKEND": "ftp"}):
+            with self.assertRaises(ValueError):
+                clients.get_container_client("data")
+
+
+if __name__ == "__main__":
+    unittest.main()
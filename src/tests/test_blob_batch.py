@@ -0,0 +1,68 @@
+import threading
+import time
+import unittest
+from azure.core.exceptions import ResourceNotFoundError
+from azure_storage.blob_cache import BlobCache, CacheEntry
+from azure_storage.repository import AzureBlobRepository
+
+CONNECTION_STRING = (
+    "DefaultEndpointsProtocol=https;AccountName=test;AccountKey=dGVzdA==;"
+    "EndpointSuffix=core.windows.net"
+)
+
+
+class SlowAdapter:
+    """Adapter stand-in that records how many downloads run at once."""
+
+    def __init__(self, missing=()):
+        self.missing = set(missing)
+        self.running = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def retrieve_entry(self, blob_name):
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            time.sleep(0.01)
+            if blob_name in self.missing:
+                raise ResourceNotFoundError("The specified blob does not exist.")
+            return CacheEntry({"name": blob_name}, '"1"', None, 10)
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+class TestIterBlobEntries(unittest.TestCase):
+    def setUp(self):
+        self.repository = AzureBlobRepository(
+            CONNECTION_STRING, cache=BlobCache(max_bytes=1024 * 1024)
+        )
+        self.adapter = SlowAdapter(missing={"b3.json"})
+        self.repository.adapter = self.adapter
+
+    def test_results_in_request_order_with_errors(self):
+        names = [f"b{i}.json" for i in range(20)]
+        results = list(self.repository.iter_blob_entries(names))
+
+        self.assertEqual([name for name, _, _ in results], names)
+        name, entry, error = results[3]
+        self.assertIsNone(entry)
+        self.assertIsInstance(error, ResourceNotFoundError)
+        self.assertEqual(results[4][1].data, {"name": "b4.json"})
+        self.assertEqual(sum(error is not None for _, _, error in results), 1)
+
+    def test_downloads_are_concurrent_and_bounded(self):
+        names = [f"b{i}.json" for i in range(40)]
+        consumed = 0
+        for _ in self.repository.iter_blob_entries(names, max_in_flight=4):
+            consumed += 1
+
+        self.assertEqual(consumed, 40)
+        self.assertGreater(self.adapter.peak, 1)
+        self.assertLessEqual(self.adapter.peak, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+from azure_storage.blob_cache import BlobCache, CacheEntry
+
+
+class TestBlobCache(unittest.TestCase):
+    def test_hit_and_miss(self):
+        cache = BlobCache(max_bytes=100)
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", CacheEntry({"x": 1}, '"1"', None, 10))
+        self.assertEqual(cache.get("a").data, {"x": 1})
+
+        stats = cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["bytes"], 10)
+
+    def test_evicts_least_recently_used(self):
+        cache = BlobCache(max_bytes=25)
+        cache.put("a", CacheEntry(1, None, None, 10))
+        cache.put("b", CacheEntry(2, None, None, 10))
+        cache.get("a")
+        cache.put("c", CacheEntry(3, None, None, 10))
+
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("c"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_oversized_entry_is_not_cached(self):
+        cache = BlobCache(max_bytes=5)
+        cache.put("a", CacheEntry(1, None, None, 10))
+        self.assertIsNone(cache.get("a"))
+
+    def test_latest_ttl(self):
+        cache = BlobCache(latest_ttl_seconds=0)
+        entry = CacheEntry(1, None, None, 1)
+        self.assertEqual(cache.get_latest("s"), (None, None, False))
+
+        cache.put_latest("s", entry, '"p1"')
+        cached, pointer_etag, fresh = cache.get_latest("s")
+        self.assertIs(cached, entry)
+        self.assertEqual(pointer_etag, '"p1"')
+        self.assertFalse(fresh)
+
+        cache.latest_ttl_seconds = 60
+        cache.put_latest("s", entry, '"p1"')
+        self.assertTrue(cache.get_latest("s")[2])
+
+        cache.invalidate_latest("s")
+        self.assertIsNone(cache.get_latest("s")[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import os
+import unittest
+from unittest import mock
+import pytest
+from azure_storage import clients
+from azure_storage.blob_adapter import AzureBlobStorageAdapter
+from azure_storage.blob_index import BlobIndex, parse_blob_name
+
+
+class TestParseBlobName(unittest.TestCase):
+    def test_scraped_data(self):
+        series, timestamp = parse_blob_name("scraped_data_2024-01-15_14-30-45.json")
+        self.assertEqual(series, "scraped_data")
+        self.assertEqual(timestamp.isoformat(), "2024-01-15T14:30:45")
+
+    def test_occupancy_data(self):
+        series, timestamp = parse_blob_name("occupancy_data/20240115_143045_SSD-7.json")
+        self.assertEqual(series, "occupancy_data/SSD-7")
+        self.assertEqual(timestamp.isoformat(), "2024-01-15T14:30:45")
+
+    def test_unknown(self):
+        self.assertIsNone(parse_blob_name("_index/scraped_data/latest.json"))
+
+
+@pytest.mark.usefixtures("fake_container")
+class TestBlobIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = BlobIndex(self.container)
+
+    def test_record_updates_pointer_and_manifest(self):
+        self.index.record("scraped_data_2024-01-15_14-00-00.json")
+        self.index.record("scraped_data_2024-01-16_09-00-00.json")
+        self.index.record("scraped_data_2024-01-15_15-00-00.json")
+
+        pointer = self.index.get_latest("scraped_data")
+        self.assertEqual(pointer["blob_name"], "scraped_data_2024-01-16_09-00-00.json")
+        self.assertEqual(pointer["first_date"], "2024-01-15")
+        self.assertEqual(
+            self.index.get_manifest("scraped_data", "2024-01-15"),
+            [
+                "scraped_data_2024-01-15_14-00-00.json",
+                "scraped_data_2024-01-15_15-00-00.json",
+            ],
+        )
+
+    def test_latest_lookup_is_constant(self):
+        for hour in range(24):
+            self.index.record(f"scraped_data_2024-01-15_{hour:02d}-00-00.json")
+        self.container.downloads = 0
+        self.index.get_latest("scraped_data")
+        self.assertEqual(self.container.downloads, 1)
+
+    def test_remove_latest_drops_pointer(self):
+        self.index.record("scraped_data_2024-01-15_14-00-00.json")
+        self.index.remove("scraped_data_2024-01-15_14-00-00.json")
+        self.assertIsNone(self.index.get_latest("scraped_data"))
+        self.assertEqual(self.index.get_manifest("scraped_data", "2024-01-15"), [])
+
+    def test_remove_many_updates_each_manifest_once(self):
+        names = [
+            f"occupancy_data/20240115_{hour:02d}0000_SSD-7.json" for hour in range(6)
+        ]
+        self.index.record_many(names)
+        manifest = BlobIndex.manifest_blob_name("occupancy_data/SSD-7", "2024-01-15")
+        version = self.container.version
+
+        self.index.remove_many(
+            names[3:] + ["occupancy_data/20240116_000000_SSD-7.json"]
+        )
+
+        self.assertEqual(
+            self.index.get_manifest("occupancy_data/SSD-7", "2024-01-15"), names[:3]
+        )
+        # One manifest write; the latest pointer pointed at a removed blob
+        self.assertEqual(self.container.blobs[manifest][1], str(version + 1))
+        self.assertIsNone(self.index.get_latest("occupancy_data/SSD-7"))
+
+    def test_rebuild_from_listing(self):
+        self.index.record("scraped_data_2023-12-31_10-00-00.json")
+        names = [
+            "scraped_data_2024-01-15_14-00-00.json",
+            "occupancy_data/20240115_140000_SSD-7.json",
+            "occupancy_data/20240115_140500_SSD-7.json",
+        ]
+        counts = self.index.rebuild(names)
+
+        self.assertEqual(counts, {"scraped_data": 1, "occupancy_data/SSD-7": 2})
+        self.assertEqual(
+            self.index.get_latest("occupancy_data/SSD-7")["blob_name"],
+            "occupancy_data/20240115_140500_SSD-7.json",
+        )
+        # Manifest of a day without blobs is removed
+        self.assertEqual(self.index.get_manifest("scraped_data", "2023-12-31"), [])
+        self.assertNotIn(
+            "_index/scraped_data/manifest/2023-12-31.json", self.container.blobs
+        )
+
+
+class TestLatestFallback(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(os.environ, {"STORAGE_BACKEND": "memory"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(clients.reset_clients)
+        clients.reset_clients()
+        self.adapter = AzureBlobStorageAdapter()
+
+    def test_occupancy_latest_without_pointer(self):
+        for name, occupancy in (
+            ("occupancy_data/20240115_140000_SSD-7.json", 10),
+            ("occupancy_data/20240115_140500_SSD-7.json", 20),
+            ("occupancy_data/20240115_141000_SSD-8.json", 30),
+        ):
+            self.adapter.save_data({"updates": [{"occupancy": occupancy}]}, name)
+        index = self.adapter.index
+        index._delete(index.latest_blob_name("occupancy_data/SSD-7"))
+
+        latest = self.adapter.get_latest_data("occupancy_data/SSD-7")
+
+        self.assertEqual(latest["updates"], [{"occupancy": 20}])
+        # The pointer is repaired from the listing
+        self.assertEqual(
+            self.adapter.index.get_latest("occupancy_data/SSD-7")["blob_name"],
+            "occupancy_data/20240115_140500_SSD-7.json",
+        )
+        self.assertIsNone(self.adapter.get_latest_data("occupancy_data/SSD-9"))
+
+
+if __name__ == "__main__":
+    unittest.main()
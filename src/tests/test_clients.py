@@ -0,0 +1,65 @@
+import asyncio
+import os
+import unittest
+from unittest import mock
+from azure_storage import clients
+
+CONNECTION_STRING = (
+    "DefaultEndpointsProtocol=https;AccountName=example;"
+    "AccountKey=ZXhhbXBsZQ==;EndpointSuffix=core.windows.net"
+)
+
+
+class TestClientFactory(unittest.TestCase):
+    def setUp(self):
+        clients.reset_clients()
+        self.addCleanup(clients.reset_clients)
+
+    def test_service_and_container_clients_are_shared(self):
+        service = clients.get_blob_service_client(CONNECTION_STRING)
+        self.assertIs(clients.get_blob_service_client(CONNECTION_STRING), service)
+
+        container = clients.get_container_client("data", CONNECTION_STRING)
+        self.assertIs(
+            clients.get_container_client("data", CONNECTION_STRING), container
+        )
+        self.assertEqual(container.container_name, "data")
+
+        with mock.patch.dict(os.environ, {"BLOB_CONTAINER_NAME": "data"}):
+            self.assertIs(
+                clients.get_container_client(connection_string=CONNECTION_STRING),
+                container,
+            )
+
+    def test_pool_size_is_configurable(self):
+        with mock.patch.dict(os.environ, {"STORAGE_POOL_SIZE": "4"}):
+            service = clients.get_blob_service_client(CONNECTION_STRING)
+        transport = service._pipeline._transport
+        adapter = transport.session.get_adapter("https://example.blob.core.windows.net")
+        self.assertEqual(adapter._pool_maxsize, 4)
+
+    def test_credential_is_lazy(self):
+        with mock.patch("azure.identity.DefaultAzureCredential") as credential:
+            clients.get_blob_service_client(CONNECTION_STRING)
+            credential.assert_not_called()
+
+            with mock.patch.dict(os.environ, {"AZURE_STORAGE_ACCOUNT_NAME": "example"}):
+                clients.get_blob_service_client()
+                clients.get_blob_service_client()
+            credential.assert_called_once()
+
+    def test_async_clients_are_per_loop(self):
+        async def get():
+            first = clients.get_async_container_client("data", CONNECTION_STRING)
+            second = clients.get_async_container_client("data", CONNECTION_STRING)
+            await clients.close_async_clients()
+            return first, second
+
+        first, second = asyncio.run(get())
+        self.assertIs(first, second)
+        other, _ = asyncio.run(get())
+        self.assertIsNot(other, first)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import os
+import sys
+import unittest
+from unittest import mock
+from azure_storage import clients
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "functions"))
+
+import compaction_timer
+
+
+class TestCompactionTimer(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(
+            os.environ, {"STORAGE_BACKEND": "memory", "TARGET_UID": "SSD-1, SSD-7"}
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(clients.reset_clients)
+        clients.reset_clients()
+
+    def test_failing_uid_does_not_stop_the_others(self):
+        def compact_day(uid, day, delete_sources):
+            if uid == "SSD-1":
+                raise OSError("storage unavailable")
+            return None
+
+        with mock.patch.object(
+            compaction_timer.SegmentCompactor, "compact_day", side_effect=compact_day
+        ) as compact, mock.patch(
+            "azure_storage.rollups.RollupStore.refresh_derived", return_value=0
+        ) as refresh:
+            with self.assertRaisesRegex(RuntimeError, "SSD-1"):
+                compaction_timer.main(mock.Mock(past_due=False))
+
+        self.assertEqual(
+            [call.args[0] for call in compact.call_args_list], ["SSD-1", "SSD-7"]
+        )
+        refresh.assert_called_once_with("occupancy_data/SSD-7")
+
+
+if __name__ == "__main__":
+    unittest.main()
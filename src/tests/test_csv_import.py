@@ -0,0 +1,135 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+import numpy as np
+from azure_storage import clients
+from azure_storage.blob_adapter import AzureBlobStorageAdapter
+from azure_storage.blob_index import occupancy_series
+from services.csv_import import CsvImporter, build_windows
+from utils.statistics import StreamingStats
+
+
+def write_csv(path, rows):
+    with open(path, "w") as f:
+        f.write("timestamp,occupancy\n")
+        for moment, value in rows:
+            f.write(f"{moment:%Y-%m-%d %H:%M:%S},{value}\n")
+
+
+def readings(count, start=datetime(2025, 11, 12, 14, 40, 57)):
+    """Irregular readings (5-13 s apart) with a few repeated values."""
+    moment = start
+    for i in range(count):
+        yield moment, 100 + (i * 37) % 60 - (i % 3 == 0) * 5
+        moment += timedelta(seconds=5 + (i * 7) % 9)
+
+
+class TestBuildWindows(unittest.TestCase):
+    def test_matches_streaming_stats(self):
+        rows = list(readings(400))
+        timestamps = np.array(
+            [
+                (moment - datetime(1970, 1, 1)) // timedelta(microseconds=1) * 1000
+                for moment, _ in rows
+            ],
+            dtype=np.int64,
+        )
+        values = np.array([value for _, value in rows], dtype=np.int64)
+
+        windows = build_windows(timestamps, values, "SSD-7")
+
+        self.assertEqual(sum(len(w["updates"]) for w in windows), 400)
+        for window in windows:
+            stats = StreamingStats()
+            for update in window["updates"]:
+                stats.add(
+                    update["occupancy"], datetime.fromisoformat(update["timestamp"])
+                )
+            stats.close(datetime.fromisoformat(window["window"]["end"]))
+            for key, expected in stats.summary().items():
+                self.assertAlmostEqual(window["statistics"][key], expected, 9, key)
+        self.assertEqual(windows[0]["window"]["start"], "2025-11-12T14:40:00")
+        self.assertEqual(windows[0]["updates"][0]["timestamp"], "2025-11-12T14:40:57")
+
+
+class TestCsvImporter(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(os.environ, {"STORAGE_BACKEND": "memory"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(clients.reset_clients)
+        clients.reset_clients()
+
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.csv = os.path.join(self.directory, "scraped_data.csv")
+        self.checkpoint = os.path.join(self.directory, "checkpoint.json")
+        self.adapter = AzureBlobStorageAdapter()
+
+    def rollup_count(self):
+        buckets = self.adapter.rollups.get_weekday_hour_buckets(
+            occupancy_series("SSD-7")
+        )
+        return sum(stats.count for stats in buckets.values())
+
+    def test_import_is_chunk_independent_and_idempotent(self):
+        write_csv(self.csv, readings(500))
+        first = CsvImporter(self.adapter, "SSD-7").run(self.csv, chunk_rows=500)
+        again = CsvImporter(self.adapter, "SSD-7").run(self.csv, chunk_rows=7)
+
+        self.assertEqual(first["uploaded"], first["windows"])
+        self.assertEqual(again["windows"], first["windows"])
+        self.assertEqual(again["uploaded"], 0)
+        self.assertEqual(self.rollup_count(), 500)
+
+        window = self.adapter.retrieve_data("occupancy_data/20251112_144000_SSD-7.json")
+        self.assertEqual(window["updates"][0]["occupancy"], 95)
+        pointer = self.adapter.index.get_latest(occupancy_series("SSD-7"))
+        self.assertEqual(pointer["first_date"], "2025-11-12")
+
+    def test_resumes_after_interruption(self):
+        write_csv(self.csv, readings(600))
+        importer = CsvImporter(self.adapter, "SSD-7")
+        save_checkpoint = importer._save_checkpoint
+        calls = []
+
+        def crash_on_third(*args):
+            calls.append(args)
+            if len(calls) == 3:
+                raise KeyboardInterrupt
+            save_checkpoint(*args)
+
+        with mock.patch.object(importer, "_save_checkpoint", crash_on_third):
+            with self.assertRaises(KeyboardInterrupt):
+                importer.run(self.csv, self.checkpoint, chunk_rows=40)
+
+        resumed = CsvImporter(self.adapter, "SSD-7").run(
+            self.csv, self.checkpoint, chunk_rows=40
+        )
+
+        # The third batch was registered before the crash and is redone
+        self.assertGreater(resumed["skipped"], 0)
+        self.assertGreater(resumed["existing"], 0)
+        self.assertEqual(self.rollup_count(), 600)
+
+        full = CsvImporter(self.adapter, "SSD-7").run(self.csv)
+        self.assertEqual(full["uploaded"], 0)
+        self.assertEqual(self.rollup_count(), 600)
+        self.assertEqual(
+            len(self.adapter.list_blobs("occupancy_data/")), full["windows"]
+        )
+
+    def test_invalid_rows_are_counted(self):
+        with open(self.csv, "w") as f:
+            f.write("timestamp,occupancy\n2025-11-12 14:40:57,12\nbroken,3\n")
+            f.write("2025-11-12 14:41:02,\n")
+        counters = CsvImporter(self.adapter, "SSD-7").run(self.csv)
+        self.assertEqual((counters["rows"], counters["invalid"]), (3, 2))
+        self.assertEqual(counters["windows"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+import os
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+import numpy as np
+from azure_storage import clients
+from azure_storage.repository import AzureBlobRepository
+from services.downsample import (
+    SeriesDownsampler,
+    downsample,
+    lttb_indices,
+    minmax_indices,
+)
+
+
+def reference_lttb(x, y, points):
+    """Straightforward LTTB, one sample at a time."""
+    n = len(x)
+    every = (n - 2) / (points - 2)
+    selected = [0]
+    anchor = 0
+    for i in range(points - 2):
+        lo, hi = int(i * every) + 1, int((i + 1) * every) + 1
+        next_lo, next_hi = hi, min(int((i + 2) * every) + 1, n)
+        if i == points - 3:
+            cx, cy = x[n - 1], y[n - 1]
+        else:
+            cx = sum(x[next_lo:next_hi]) / (next_hi - next_lo)
+            cy = sum(y[next_lo:next_hi]) / (next_hi - next_lo)
+        best, best_area = lo, -1.0
+        for j in range(lo, hi):
+            area = abs(
+                (x[anchor] - cx) * (y[j] - y[anchor])
+                - (x[anchor] - x[j]) * (cy - y[anchor])
+            )
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        anchor = best
+    return selected + [n - 1]
+
+
+class TestDownsample(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.x = np.cumsum(rng.uniform(3, 4, 5000))
+        self.y = np.round(100 + 50 * np.sin(self.x / 900) + rng.normal(0, 5, 5000))
+
+    def test_lttb_matches_reference(self):
+        indices = lttb_indices(self.x, self.y, 200)
+        self.assertEqual(len(indices), 200)
+        self.assertEqual(indices.tolist(), reference_lttb(self.x, self.y, 200))
+
+    def test_minmax_keeps_extremes_of_every_bucket(self):
+        self.y[1234] = 1000
+        indices = minmax_indices(self.x, self.y, 100)
+        self.assertLessEqual(len(indices), 100)
+        self.assertTrue(np.all(np.diff(indices) > 0))
+        self.assertIn(1234, indices)
+        self.assertIn(int(np.argmin(self.y)), indices)
+
+    def test_short_series_is_unchanged(self):
+        updates = [
+            {"occupancy": i, "timestamp": f"2025-11-12T14:40:{i:02d}"} for i in range(5)
+        ]
+        self.assertEqual(
+            downsample(updates, 10, "lttb"),
+            [[update["timestamp"], update["occupancy"]] for update in updates],
+        )
+        with self.assertRaises(ValueError):
+            downsample(updates, 10, "median")
+
+
+class TestSeriesDownsampler(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(os.environ, {"STORAGE_BACKEND": "memory"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(clients.reset_clients)
+        clients.reset_clients()
+        self.repository = AzureBlobRepository()
+        self.addCleanup(self.repository.executor.shutdown)
+
+    def write_window(self, start):
+        updates = [
+            {
+                "uid": "SSD-7",
+                "occupancy": 100 + i % 17,
+                "timestamp": (start + timedelta(seconds=4 * i)).isoformat(),
+            }
+            for i in range(75)
+        ]
+        self.repository.adapter.save_data(
+            {
+                "window": {
+                    "start": start.isoformat(),
+                    "end": (start + timedelta(minutes=5)).isoformat(),
+                },
+                "target_uid": "SSD-7",
+                "updates": updates,
+            },
+            f"occupancy_data/{start:%Y%m%d_%H%M%S}_SSD-7.json",
+        )
+
+    def test_results_are_cached_until_a_new_window_arrives(self):
+        start = datetime(2025, 11, 12, 14)
+        for i in range(4):
+            self.write_window(start + timedelta(minutes=5 * i))
+        downsampler = SeriesDownsampler(self.repository)
+        end = start + timedelta(hours=1)
+
+        with mock.patch.object(
+            self.repository,
+            "get_occupancy_updates",
+            wraps=self.repository.get_occupancy_updates,
+        ) as get_updates:
+            first = downsampler.get_series("SSD-7", start, end, 50, "lttb")
+            self.assertIs(
+                downsampler.get_series("SSD-7", start, end, 50, "lttb"), first
+            )
+            self.assertEqual(get_updates.call_count, 1)
+
+            downsampler.get_series("SSD-7", start, end, 40, "lttb")
+            self.assertEqual(get_updates.call_count, 2)
+
+            self.repository.cache.invalidate_latest()
+            self.write_window(start + timedelta(minutes=20))
+            second = downsampler.get_series("SSD-7", start, end, 50, "lttb")
+            self.assertEqual(get_updates.call_count, 3)
+
+        self.assertEqual((first["count"], second["count"]), (300, 375))
+        self.assertEqual(len(second["series"]), 50)
+        self.assertEqual(second["series"][0], [start.isoformat(), 100])
+
+    def test_closed_ranges_survive_new_windows(self):
+        start = datetime(2025, 11, 12, 14)
+        for i in range(4):
+            self.write_window(start + timedelta(minutes=5 * i))
+        downsampler = SeriesDownsampler(self.repository)
+        # Ends before the newest window (14:15) starts
+        end = start + timedelta(minutes=10)
+
+        with mock.patch.object(
+            self.repository,
+            "get_occupancy_updates",
+            wraps=self.repository.get_occupancy_updates,
+        ) as get_updates:
+            first = downsampler.get_series("SSD-7", start, end, 50, "minmax")
+            self.repository.cache.invalidate_latest()
+            self.write_window(start + timedelta(minutes=20))
+            self.assertIs(
+                downsampler.get_series("SSD-7", start, end, 50, "minmax"), first
+            )
+            self.assertEqual(get_updates.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
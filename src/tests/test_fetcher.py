@@ -0,0 +1,109 @@
+import asyncio
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+from scraper.fetcher import Fetcher
+
+PAGE = "<html><body>Anzahl Gäste: 42</body></html>"
+ETAG = '"v1"'
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    """Serves /page with an ETag and fails /flaky a configured number of times."""
+
+    failures = {}
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append((self.path, self.headers.get("If-None-Match")))
+        if self.failures.get(self.path, 0) > 0:
+            self.failures[self.path] -= 1
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path == "/missing":
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = PAGE.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", ETAG)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestFetcher(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        PageHandler.failures = {}
+        PageHandler.requests_seen = []
+        self.fetcher = Fetcher(retries=2, backoff=0.01)
+        self.addCleanup(self.fetcher.close)
+
+    def test_unchanged_page_is_revalidated(self):
+        first = self.fetcher.fetch(f"{self.base}/page")
+        second = self.fetcher.fetch(f"{self.base}/page")
+
+        self.assertEqual(first.text, PAGE)
+        self.assertFalse(first.not_modified)
+        self.assertTrue(second.not_modified)
+        self.assertEqual(second.text, PAGE)
+        self.assertEqual([etag for _, etag in PageHandler.requests_seen], [None, ETAG])
+
+    def test_retries_server_errors(self):
+        PageHandler.failures = {"/page": 2}
+        self.assertEqual(self.fetcher.fetch_data(f"{self.base}/page"), PAGE)
+        self.assertEqual(len(PageHandler.requests_seen), 3)
+
+        PageHandler.failures = {"/other": 5}
+        with self.assertRaises(requests.HTTPError):
+            self.fetcher.fetch(f"{self.base}/other")
+
+    def test_fetch_many_keeps_order_and_errors(self):
+        PageHandler.failures = {"/flaky": 1}
+        self.fetcher.fetch(f"{self.base}/page")
+        urls = [f"{self.base}/page", f"{self.base}/missing", f"{self.base}/flaky"]
+
+        results = self.fetcher.fetch_many(urls, concurrency=2)
+
+        self.assertTrue(results[0].not_modified)
+        self.assertIsInstance(results[1], Exception)
+        self.assertEqual(results[2].text, PAGE)
+        self.assertFalse(results[2].not_modified)
+
+    def test_fetch_many_inside_running_loop_fetches_sequentially(self):
+        urls = [f"{self.base}/page", f"{self.base}/missing"]
+
+        async def call():
+            return self.fetcher.fetch_many(urls)
+
+        results = asyncio.run(call())
+
+        self.assertEqual(results[0].text, PAGE)
+        self.assertIsInstance(results[1], requests.HTTPError)
+
+
+if __name__ == "__main__":
+    unittest.main()
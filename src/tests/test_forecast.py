@@ -0,0 +1,100 @@
+import os
+import unittest
+from datetime import date, datetime, timedelta
+from unittest import mock
+import numpy as np
+from azure_storage import clients
+from azure_storage.blob_adapter import AzureBlobStorageAdapter
+from azure_storage.blob_index import occupancy_series
+from services.forecast import OccupancyForecaster, fit_profile
+
+
+def window(uid, start, values):
+    """Return a 5-minute window document with one reading per value."""
+    return {
+        "window": {"start": start.isoformat(), "end": start.isoformat()},
+        "updates": [
+            {"uid": uid, "occupancy": value, "timestamp": start.isoformat()}
+            for value in values
+        ],
+    }
+
+
+class TestFitProfile(unittest.TestCase):
+    def test_weighted_quantiles(self):
+        days = np.array(["2025-11-10"] * 4 + ["2025-11-17"] * 2, dtype="datetime64[D]")
+        hours = np.array([9, 9, 9, 9, 9, 10])
+        values = np.array([10.0, 20.0, 30.0, 40.0, 50.0, 7.0])
+        counts = np.array([1, 1, 1, 1, 1, 3])
+
+        profile = fit_profile(days, hours, values, counts, half_life_days=7)
+
+        # 2025-11-10 and 2025-11-17 are Mondays; the older week weighs half
+        monday_nine = profile[(0, 9)]
+        self.assertEqual(monday_nine["count"], 5)
+        self.assertEqual(monday_nine["p10"], 10.0)
+        self.assertEqual(monday_nine["p50"], 30.0)
+        self.assertEqual(monday_nine["p90"], 50.0)
+        self.assertAlmostEqual(monday_nine["mean"], (100 * 0.5 + 50) / 3)
+        self.assertEqual(profile[(0, 10)]["p25"], 7.0)
+        self.assertEqual(set(profile), {(0, 9), (0, 10)})
+
+
+class TestOccupancyForecaster(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(
+            os.environ, {"STORAGE_BACKEND": "memory", "ROLLUP_TIMEZONE": "UTC"}
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(clients.reset_clients)
+        clients.reset_clients()
+        self.adapter = AzureBlobStorageAdapter()
+        self.series = occupancy_series("SSD-7")
+
+    def add(self, start, values):
+        name = f"occupancy_data/{start:%Y%m%d_%H%M%S}_SSD-7.json"
+        self.adapter.rollups.merge_windows(
+            self.series, [(name, window("SSD-7", start, values))]
+        )
+        self.adapter.index.record_many([name])
+
+    def test_forecast_and_incremental_refresh(self):
+        # Three Wednesdays at 14:00
+        for week, value in enumerate((10, 20, 30)):
+            self.add(datetime(2025, 11, 5, 14) + timedelta(weeks=week), [value] * 4)
+        forecaster = OccupancyForecaster(self.adapter, refresh_seconds=0)
+
+        forecast = forecaster.forecast("SSD-7", date(2025, 11, 26))
+        self.assertEqual(forecast["weekday"], 2)
+        self.assertEqual(forecast["history"]["days"], 3)
+        self.assertEqual(len(forecast["hours"]), 1)
+        hour = forecast["hours"][0]
+        self.assertEqual((hour["hour"], hour["count"]), (14, 12))
+        self.assertEqual((hour["p10"], hour["p50"], hour["p90"]), (10, 20, 30))
+        self.assertGreater(hour["mean"], 20)  # the newest week counts most
+        self.assertEqual(forecaster.forecast("SSD-7", date(2025, 11, 27))["hours"], [])
+
+        with mock.patch.object(
+            self.adapter.rollups,
+            "read_document",
+            wraps=self.adapter.rollups.read_document,
+        ) as read_document:
+            forecaster.forecast("SSD-7", date(2025, 11, 26))
+            read_document.assert_not_called()
+
+            self.add(datetime(2025, 11, 26, 15), [50])
+            forecast = forecaster.forecast("SSD-7", date(2025, 11, 26))
+            # Only the new day and the previously newest day are read
+            self.assertEqual(read_document.call_count, 2)
+
+        self.assertEqual(forecast["history"]["to"], "2025-11-26")
+        self.assertEqual([h["hour"] for h in forecast["hours"]], [14, 15])
+
+    def test_no_data(self):
+        forecaster = OccupancyForecaster(self.adapter)
+        self.assertIsNone(forecaster.forecast("SSD-7", date(2025, 11, 26)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import json
+import unittest
+from azure_storage.blob_cache import CacheEntry
+from services.live_feed import KEEP_ALIVE, LiveFeed, format_event
+
+
+class CountingSource:
+    """Latest-entry source that counts its (storage) reads."""
+
+    def __init__(self):
+        self.reads = 0
+        self.entry = CacheEntry({"occupancy": 10}, '"v1"', None, 0)
+
+    def __call__(self):
+        self.reads += 1
+        return self.entry
+
+
+def parse_event(message):
+    fields = dict(line.split(": ", 1) for line in message.strip().split("\n"))
+    return fields["event"], json.loads(fields["data"]), fields.get("id")
+
+
+class TestLiveFeed(unittest.TestCase):
+    def setUp(self):
+        self.source = CountingSource()
+        # Huge interval: the poller thread polls once, the tests drive the rest
+        self.feed = LiveFeed({"reading": self.source}, poll_seconds=3600)
+
+    def tearDown(self):
+        for subscriber in list(self.feed._subscribers):
+            self.feed.unsubscribe(subscriber)
+
+    def test_format_event(self):
+        message = format_event("reading", {"occupancy": 5}, "abc")
+        self.assertEqual(message, 'id: abc\nevent: reading\ndata: {"occupancy":5}\n\n')
+
+    def test_reads_do_not_grow_with_clients(self):
+        subscribers = [self.feed.subscribe() for _ in range(50)]
+        first = [subscriber.get(timeout=5) for subscriber in subscribers]
+        self.assertEqual(self.source.reads, 1)
+        self.assertEqual(parse_event(first[0]), ("reading", {"occupancy": 10}, "v1"))
+
+        self.source.entry = CacheEntry({"occupancy": 42}, '"v2"', None, 0)
+        self.feed.poll()
+        self.assertEqual(self.source.reads, 2)
+        for subscriber in subscribers:
+            event = parse_event(subscriber.get_nowait())
+            self.assertEqual(event[1], {"occupancy": 42})
+
+    def test_unchanged_entry_is_not_republished(self):
+        subscriber = self.feed.subscribe()
+        subscriber.get(timeout=5)
+        self.feed.poll()
+        self.assertTrue(subscriber.empty())
+
+    def test_late_client_gets_current_state_without_read(self):
+        self.feed.subscribe().get(timeout=5)
+        reads = self.source.reads
+
+        late = self.feed.subscribe()
+        self.assertEqual(parse_event(late.get_nowait())[1], {"occupancy": 10})
+        self.assertEqual(self.source.reads, reads)
+
+    def test_slow_client_keeps_newest_events(self):
+        self.feed.max_pending = 2
+        subscriber = self.feed.subscribe()
+        subscriber.get(timeout=5)
+        for value in range(5):
+            self.source.entry = CacheEntry({"occupancy": value}, str(value), None, 0)
+            self.feed.poll()
+
+        values = [parse_event(subscriber.get_nowait())[1] for _ in range(2)]
+        self.assertEqual(values, [{"occupancy": 3}, {"occupancy": 4}])
+
+    def test_stream_unsubscribes_on_close(self):
+        stream = self.feed.stream(heartbeat_seconds=0.01)
+        self.assertTrue(next(stream).startswith("retry: "))
+        self.assertEqual(self.feed.subscriber_count, 1)
+        self.assertIn("event: reading", next(stream))
+        self.assertEqual(next(stream), KEEP_ALIVE)
+
+        stream.close()
+        self.assertEqual(self.feed.subscriber_count, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import json
+import logging
+import queue
+import unittest
+from utils.logger import (
+    DroppingQueueHandler,
+    JsonFormatter,
+    Logger,
+    SamplingFilter,
+)
+
+
+class CountingArgument:
+    """Argument that counts how often it is formatted."""
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return "argument"
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class TestLogger(unittest.TestCase):
+    def setUp(self):
+        self.logger = Logger("tests")
+        self.handler = ListHandler()
+        self.logger.logger.addHandler(self.handler)
+        self.logger.logger.setLevel(logging.INFO)
+        self.addCleanup(self.logger.logger.removeHandler, self.handler)
+
+    def test_disabled_level_is_not_formatted(self):
+        argument = CountingArgument()
+        self.logger.log_debug("Frame %s", argument)
+        self.assertEqual(argument.formatted, 0)
+        self.assertEqual(self.handler.records, [])
+
+        self.logger.log_info("Frame %s", argument)
+        self.assertEqual(self.handler.records[0].getMessage(), "Frame argument")
+
+    def test_plain_messages_keep_working(self):
+        self.logger.log_info("100% done")
+        self.logger.log_error("Error saving data: boom")
+        self.assertEqual(
+            [record.getMessage() for record in self.handler.records],
+            ["100% done", "Error saving data: boom"],
+        )
+        self.assertEqual(self.handler.records[1].levelno, logging.ERROR)
+
+    def test_json_fields(self):
+        self.logger.log_info("Saved %s", "a.json", blob="a.json", name="clash")
+        entry = json.loads(JsonFormatter().format(self.handler.records[0]))
+
+        self.assertEqual(entry["level"], "INFO")
+        self.assertEqual(entry["logger"], "badi.tests")
+        self.assertEqual(entry["message"], "Saved a.json")
+        self.assertEqual(entry["blob"], "a.json")
+        self.assertEqual(entry["name_"], "clash")
+
+    def test_sampling(self):
+        for i in range(250):
+            self.logger.log_warning("Bad frame %d", i, sample=100)
+        self.assertEqual(
+            [record.args[0] for record in self.handler.records], [0, 100, 200]
+        )
+
+
+class TestQueueHandler(unittest.TestCase):
+    def test_full_queue_drops_instead_of_blocking(self):
+        handler = DroppingQueueHandler(queue.Queue(2))
+        for i in range(5):
+            handler.handle(logging.makeLogRecord({"msg": f"record {i}"}))
+        self.assertEqual(handler.queue.qsize(), 2)
+        self.assertEqual(handler.dropped, 3)
+
+    def test_sampling_filter_passes_unsampled_records(self):
+        sampler = SamplingFilter()
+        record = logging.makeLogRecord({"msg": "plain"})
+        self.assertTrue(all(sampler.filter(record) for _ in range(10)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import unittest
+from unittest import mock
+from azure_storage import clients
+from azure_storage.blob_adapter import AzureBlobStorageAdapter
+from azure_storage.clients import BYTES_READ, BYTES_WRITTEN, STORAGE_SECONDS
+from utils.metrics import MetricsRegistry
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter_and_gauge_exposition(self):
+        frames = self.registry.counter("frames_total", "Frames received")
+        frames.inc()
+        frames.inc(2)
+        rate = self.registry.gauge("frame_rate", "Frames per second", ["uid"])
+        rate.labels(uid='SSD-"7"').set(0.25)
+
+        text = self.registry.render_prometheus()
+        self.assertIn("# TYPE badi_frames_total counter\nbadi_frames_total 3\n", text)
+        self.assertIn('badi_frame_rate{uid="SSD-\\"7\\""} 0.25', text)
+
+        with self.assertRaises(ValueError):
+            frames.inc(-1)
+        with self.assertRaises(ValueError):
+            rate.set(1)
+
+    def test_histogram_buckets_are_cumulative(self):
+        latency = self.registry.histogram(
+            "latency_seconds", "Latency", ["route"], buckets=(0.1, 1.0)
+        )
+        for value in (0.05, 0.5, 0.5, 3.0):
+            latency.labels(route="/a").observe(value)
+
+        text = self.registry.render_prometheus()
+        self.assertIn('badi_latency_seconds_bucket{route="/a",le="0.1"} 1', text)
+        self.assertIn('badi_latency_seconds_bucket{route="/a",le="1"} 3', text)
+        self.assertIn('badi_latency_seconds_bucket{route="/a",le="+Inf"} 4', text)
+        self.assertIn('badi_latency_seconds_count{route="/a"} 4', text)
+        self.assertIn('badi_latency_seconds_sum{route="/a"} 4.05', text)
+
+        snapshot = self.registry.snapshot()["badi_latency_seconds"]["route=/a"]
+        self.assertEqual(snapshot["count"], 4)
+        self.assertAlmostEqual(snapshot["p50"], 0.55)
+
+    def test_registration_is_idempotent(self):
+        first = self.registry.counter("runs_total", "Runs", ["result"])
+        self.assertIs(self.registry.counter("runs_total", "Runs", ["result"]), first)
+        with self.assertRaises(ValueError):
+            self.registry.gauge("runs_total", "Runs", ["result"])
+
+    def test_callback_metrics(self):
+        stats = {"hits": 4}
+        self.registry.counter("cache_hits_total", "Hits").set_function(
+            lambda: stats["hits"]
+        )
+        stats["hits"] = 5
+        self.assertIn("badi_cache_hits_total 5\n", self.registry.render_prometheus())
+        self.assertEqual(self.registry.snapshot(), {"badi_cache_hits_total": 5})
+
+
+class TestStorageMetrics(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(os.environ, {"STORAGE_BACKEND": "memory"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(clients.reset_clients)
+        clients.reset_clients()
+
+    def test_adapter_records_bytes_and_latency(self):
+        adapter = AzureBlobStorageAdapter()
+        written = BYTES_WRITTEN.labels().value
+        read = BYTES_READ.labels().value
+        reads = STORAGE_SECONDS.labels(operation="read").count
+
+        adapter.save_bytes("a.bin", b"x" * 100)
+        adapter.retrieve_bytes("a.bin")
+
+        self.assertEqual(BYTES_WRITTEN.labels().value - written, 100)
+        self.assertEqual(BYTES_READ.labels().value - read, 100)
+        self.assertEqual(STORAGE_SECONDS.labels(operation="read").count, reads + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+from services.occupancy import bucket_updates, parse_resolution
+
+
+class TestParseResolution(unittest.TestCase):
+    def test_units(self):
+        self.assertEqual(parse_resolution("300"), 300)
+        self.assertEqual(parse_resolution("5m"), 300)
+        self.assertEqual(parse_resolution("1h"), 3600)
+        self.assertEqual(parse_resolution("1d"), 86400)
+
+    def test_invalid(self):
+        for value in ("", "0", "-5m", "1w", "abc"):
+            with self.assertRaises(ValueError):
+                parse_resolution(value)
+
+
+class TestBucketUpdates(unittest.TestCase):
+    def test_buckets(self):
+        updates = [
+            {"occupancy": 10, "timestamp": "2024-01-15T10:00:04"},
+            {"occupancy": 20, "timestamp": "2024-01-15T10:04:59.500000"},
+            {"occupancy": 30, "timestamp": "2024-01-15T10:05:00"},
+            {"occupancy": 12, "timestamp": "2024-01-15T10:20:00"},
+        ]
+        buckets = bucket_updates(updates, 300)
+
+        self.assertEqual(len(buckets), 3)
+        self.assertEqual(buckets[0]["start"], "2024-01-15T10:00:00")
+        self.assertEqual(buckets[0]["end"], "2024-01-15T10:05:00")
+        self.assertEqual(
+            (
+                buckets[0]["count"],
+                buckets[0]["min"],
+                buckets[0]["max"],
+                buckets[0]["avg"],
+            ),
+            (2, 10, 20, 15),
+        )
+        self.assertEqual(buckets[1]["count"], 1)
+        self.assertEqual(buckets[2]["start"], "2024-01-15T10:20:00")
+
+    def test_empty(self):
+        self.assertEqual(bucket_updates([], 60), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import os
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+from azure_storage import clients
+from azure_storage.pagination import encode_token
+from azure_storage.repository import AzureBlobRepository
+
+SCRAPED = [
+    "scraped_data_2024-01-14_23-00-00.json",
+    "scraped_data_2024-01-15_08-00-00.json",
+    "scraped_data_2024-01-15_12-00-00.json",
+    "scraped_data_2024-01-15_18-00-00.json",
+    "scraped_data_2024-01-17_09-00-00.json",
+]
+
+
+class RepositoryTestCase(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(os.environ, {"STORAGE_BACKEND": "memory"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(clients.reset_clients)
+        clients.reset_clients()
+        self.repository = AzureBlobRepository()
+        self.addCleanup(self.repository.executor.shutdown)
+
+
+class TestGetAllBlobs(RepositoryTestCase):
+    def setUp(self):
+        super().setUp()
+        for name in SCRAPED:
+            self.repository.adapter.save_data({"name": name}, name)
+
+    def pages(self, **kwargs):
+        pages, token = [], None
+        while True:
+            page = self.repository.get_all_blobs(continuation_token=token, **kwargs)
+            pages.append(list(page))
+            token = page.continuation_token
+            if token is None:
+                return pages
+
+    def test_descending_pages_cross_day_boundaries(self):
+        pages = self.pages(limit=2, order="desc")
+        self.assertEqual(
+            pages,
+            [[SCRAPED[4], SCRAPED[3]], [SCRAPED[2], SCRAPED[1]], [SCRAPED[0]]],
+        )
+
+    def test_descending_window(self):
+        pages = self.pages(
+            limit=2,
+            order="desc",
+            start=datetime(2024, 1, 15, 10),
+            end=datetime(2024, 1, 17),
+        )
+        self.assertEqual(pages, [[SCRAPED[3], SCRAPED[2]], []])
+
+    def test_ascending_pages(self):
+        pages = self.pages(limit=2, order="asc", start=datetime(2024, 1, 15))
+        self.assertEqual(sum(pages, []), SCRAPED[1:])
+        self.assertTrue(all(len(page) <= 2 for page in pages))
+
+    def test_descending_skips_long_gaps_with_day_tokens(self):
+        self.repository.adapter.save_data({}, "scraped_data_2023-11-01_12-00-00.json")
+        pages = self.pages(limit=10, order="desc")
+        self.assertEqual(
+            sum(pages, []), SCRAPED[::-1] + ["scraped_data_2023-11-01_12-00-00.json"]
+        )
+        # More than a month without data is walked over several requests
+        self.assertGreater(len(pages), 2)
+
+    def test_invalid_tokens(self):
+        for token in (
+            "not a token",
+            encode_token({"order": "asc"}),
+            encode_token({"order": "desc", "before": "occupancy_data/x.json"}),
+            encode_token({"order": "desc", "before": 17}),
+            encode_token({"order": "desc", "day": "yesterday"}),
+        ):
+            with self.assertRaises(ValueError, msg=token):
+                self.repository.get_all_blobs(
+                    limit=2, order="desc", continuation_token=token
+                )
+
+
+class TestOccupancyUpdates(RepositoryTestCase):
+    def setUp(self):
+        super().setUp()
+        # Windows from 23:45 to 00:10, one reading per minute
+        self.first = datetime(2024, 1, 15, 23, 45)
+        self.names = []
+        for w in range(6):
+            start = self.first + timedelta(minutes=5 * w)
+            name = f"occupancy_data/{start:%Y%m%d_%H%M%S}_SSD-7.json"
+            updates = [
+                {
+                    "occupancy": 5 * w + i,
+                    "timestamp": (start + timedelta(minutes=i)).isoformat(),
+                }
+                for i in range(5)
+            ]
+            self.repository.adapter.save_data({"updates": updates}, name)
+            self.names.append(name)
+
+    def occupancy(self, start, end):
+        return [
+            update["occupancy"]
+            for update in self.repository.get_occupancy_updates("SSD-7", start, end)
+        ]
+
+    def test_windows_are_merged_in_time_order(self):
+        get_entry = self.repository.get_entry_by_blob_name
+
+        def slow_for_early_windows(name):
+            # Later windows finish first
+            time.sleep(0.005 * (len(self.names) - self.names.index(name)))
+            return get_entry(name)
+
+        with mock.patch.object(
+            self.repository, "get_entry_by_blob_name", slow_for_early_windows
+        ):
+            occupancy = self.occupancy(self.first, self.first + timedelta(hours=1))
+        self.assertEqual(occupancy, list(range(30)))
+
+    def test_range_boundaries_are_inclusive(self):
+        # Starts inside the first window and ends on a reading of the last
+        start = self.first + timedelta(minutes=3)
+        end = self.first + timedelta(minutes=27)
+        self.assertEqual(self.occupancy(start, end), list(range(3, 28)))
+        self.assertEqual(self.occupancy(end, end), [27])
+        # Between two readings
+        gap = (end + timedelta(seconds=1), end + timedelta(seconds=59))
+        self.assertEqual(self.occupancy(*gap), [])
+
+    def test_missing_window_is_skipped(self):
+        # Indexed, but gone from the container
+        self.repository.adapter.container_client.get_blob_client(
+            self.names[2]
+        ).delete_blob()
+        occupancy = self.occupancy(self.first, self.first + timedelta(hours=1))
+        self.assertEqual(occupancy, list(range(10)) + list(range(15, 30)))
+
+
+if __name__ == "__main__":
+    unittest.main()
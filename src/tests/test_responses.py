@@ -0,0 +1,110 @@
+import gzip
+import json
+import unittest
+from unittest import mock
+from flask import Flask, Response
+from api.responses import (
+    IMMUTABLE_CACHE_CONTROL,
+    MIN_COMPRESS_BYTES,
+    brotli,
+    compress_response,
+    conditional_json,
+)
+
+LARGE = {"updates": [{"occupancy": i, "timestamp": "2025-11-12"} for i in range(100)]}
+
+
+def make_app():
+    app = Flask(__name__)
+    app.after_request(compress_response)
+
+    @app.route("/blob")
+    def blob():
+        return conditional_json(LARGE, etag='"0x8DC"', immutable=True)
+
+    @app.route("/latest")
+    def latest():
+        return conditional_json(LARGE)
+
+    @app.route("/small")
+    def small():
+        return conditional_json({"status": "ok"})
+
+    @app.route("/stream")
+    def stream():
+        return Response(iter(["x" * MIN_COMPRESS_BYTES]), mimetype="text/plain")
+
+    return app
+
+
+class TestConditionalJson(unittest.TestCase):
+    def setUp(self):
+        self.client = make_app().test_client()
+
+    def test_blob_etag_is_weak_and_immutable(self):
+        response = self.client.get("/blob")
+        self.assertEqual(response.headers["ETag"], 'W/"0x8DC"')
+        self.assertEqual(response.headers["Cache-Control"], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(response.get_json(), LARGE)
+
+    def test_body_etag_revalidates(self):
+        response = self.client.get("/latest")
+        self.assertEqual(response.headers["Cache-Control"], "no-cache")
+        etag = response.headers["ETag"]
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertEqual(self.client.get("/latest").headers["ETag"], etag)
+
+        not_modified = self.client.get("/latest", headers={"If-None-Match": etag})
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.data, b"")
+
+        changed = self.client.get("/latest", headers={"If-None-Match": 'W/"other"'})
+        self.assertEqual(changed.status_code, 200)
+
+
+class TestCompressResponse(unittest.TestCase):
+    def setUp(self):
+        self.client = make_app().test_client()
+
+    def test_gzip_when_accepted(self):
+        response = self.client.get("/latest", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response.headers["Vary"])
+        self.assertEqual(json.loads(gzip.decompress(response.data)), LARGE)
+
+    def test_identity_without_accept_encoding(self):
+        response = self.client.get("/latest", headers={"Accept-Encoding": ""})
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertIn("Accept-Encoding", response.headers["Vary"])
+        self.assertEqual(response.get_json(), LARGE)
+
+    def test_small_and_streamed_bodies_pass_through(self):
+        for path in ("/small", "/stream"):
+            response = self.client.get(path, headers={"Accept-Encoding": "gzip"})
+            self.assertNotIn("Content-Encoding", response.headers, path)
+            self.assertIn("Accept-Encoding", response.headers["Vary"], path)
+
+    def test_not_modified_is_not_compressed(self):
+        etag = self.client.get("/blob").headers["ETag"]
+        response = self.client.get(
+            "/blob", headers={"If-None-Match": etag, "Accept-Encoding": "gzip"}
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertNotIn("Content-Encoding", response.headers)
+
+    def test_gzip_without_brotli(self):
+        with mock.patch("api.responses.brotli", None):
+            response = self.client.get(
+                "/latest", headers={"Accept-Encoding": "br, gzip"}
+            )
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+
+    @unittest.skipIf(brotli is None, "brotli is not installed")
+    def test_brotli_is_preferred(self):
+        response = self.client.get("/latest", headers={"Accept-Encoding": "gzip, br"})
+        self.assertEqual(response.headers["Content-Encoding"], "br")
+        self.assertEqual(json.loads(brotli.decompress(response.data)), LARGE)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,239 @@
+import os
+import unittest
+from datetime import date, datetime, timedelta
+from unittest import mock
+import pytest
+from azure_storage import clients
+from azure_storage.repository import AzureBlobRepository
+from azure_storage.rollups import RollupStore
+
+SERIES = "occupancy_data/SSD-7"
+
+
+def make_window(start, values):
+    begin = datetime.fromisoformat(start)
+    return {
+        "target_uid": "SSD-7",
+        "updates": [
+            {
+                "occupancy": value,
+                "timestamp": (begin + timedelta(seconds=4 * i)).isoformat(),
+            }
+            for i, value in enumerate(values)
+        ],
+    }
+
+
+@pytest.mark.usefixtures("fake_container")
+class TestRollupStore(unittest.TestCase):
+    def setUp(self):
+        self.rollups = RollupStore(self.container, tz="Europe/Zurich")
+        # 09:00 UTC is 10:00 in Zurich in winter; Monday 2024-01-15
+        self.windows = [
+            (
+                "occupancy_data/20240115_090000_SSD-7.json",
+                make_window("2024-01-15T09:00:00", [10, 12]),
+            ),
+            (
+                "occupancy_data/20240115_095800_SSD-7.json",
+                make_window("2024-01-15T09:59:58", [20, 30]),
+            ),
+            (
+                "occupancy_data/20240116_090000_SSD-7.json",
+                make_window("2024-01-16T09:00:00", [5]),
+            ),
+        ]
+
+    def test_merge_window_buckets_in_local_time(self):
+        for name, window in self.windows:
+            self.assertTrue(self.rollups.merge_window(SERIES, name, window))
+
+        hourly = self.rollups.get_buckets(
+            RollupStore.hourly_blob_name(SERIES, "2024-01-15")
+        )
+        self.assertEqual(sorted(hourly), ["10", "11"])
+        self.assertEqual(hourly["10"].summary()["count"], 3)
+        self.assertEqual(hourly["11"].summary()["max"], 30)
+
+        # Read from the hourly rollups before, and from the derived ones after
+        # a refresh
+        for refresh in (False, True):
+            if refresh:
+                self.assertEqual(self.rollups.refresh_derived(SERIES), 2)
+                self.assertIn(
+                    RollupStore.daily_blob_name(SERIES, "2024-01"),
+                    self.container.blobs,
+                )
+            daily = self.rollups.get_daily_buckets(SERIES, "2024-01")
+            self.assertEqual(daily["2024-01-15"].summary()["avg"], 18)
+            self.assertEqual(daily["2024-01-16"].summary()["count"], 1)
+
+            profile = self.rollups.get_weekday_hour_buckets(SERIES)
+            self.assertEqual(profile["0-10"].summary()["count"], 3)
+            self.assertEqual(profile["1-10"].summary()["count"], 1)
+
+    def today(self, day):
+        return mock.patch.object(self.rollups, "_today", return_value=day)
+
+    def test_days_after_a_refresh_are_read_from_hourly_rollups(self):
+        patcher = self.today(date(2024, 1, 17))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for name, window in self.windows[:2]:
+            self.rollups.merge_window(SERIES, name, window)
+        self.rollups.refresh_derived(SERIES)
+        name, window = self.windows[2]
+        self.rollups.merge_window(SERIES, name, window)
+
+        daily = self.rollups.get_daily_buckets(SERIES, "2024-01")
+        self.assertEqual(daily["2024-01-15"].summary()["count"], 4)
+        self.assertEqual(daily["2024-01-16"].summary()["count"], 1)
+        profile = self.rollups.get_weekday_hour_buckets(SERIES)
+        self.assertEqual(profile["1-10"].summary()["count"], 1)
+
+    def test_refresh_folds_only_newly_closed_days(self):
+        for name, window in self.windows:
+            self.rollups.merge_window(SERIES, name, window)
+        with self.today(date(2024, 1, 17)):
+            self.assertEqual(self.rollups.refresh_derived(SERIES), 1)
+            self.assertEqual(self.rollups.refresh_derived(SERIES), 0)
+
+        downloads = self.container.downloads
+        with self.today(date(2024, 1, 18)):
+            self.assertEqual(self.rollups.refresh_derived(SERIES), 1)
+            # The weekday-hour and the January document and one hourly document
+            self.assertEqual(self.container.downloads - downloads, 3)
+
+            downloads = self.container.downloads
+            profile = self.rollups.get_weekday_hour_buckets(SERIES)
+            # The weekday-hour document and the hourly documents of open days
+            self.assertEqual(self.container.downloads - downloads, 3)
+
+        self.assertEqual(profile["0-10"].summary()["count"], 3)
+        self.assertEqual(profile["1-10"].summary()["count"], 1)
+        document = self.rollups._read(RollupStore.weekday_hour_blob_name(SERIES))[0]
+        self.assertEqual(document["through"], "2024-01-16")
+        self.assertEqual(document["days"], {"2024-01-15": 2, "2024-01-16": 1})
+
+    def test_refresh_since_refolds_changed_days(self):
+        for name, window in self.windows:
+            self.rollups.merge_window(SERIES, name, window)
+        with self.today(date(2024, 1, 18)):
+            self.rollups.refresh_derived(SERIES)
+            # An import adds a window to a day that was already folded
+            self.rollups.merge_window(
+                SERIES,
+                "occupancy_data/20240115_120000_SSD-7.json",
+                make_window("2024-01-15T12:00:00", [50]),
+            )
+            self.assertEqual(
+                self.rollups.refresh_derived(SERIES, since="2024-01-15"), 2
+            )
+            daily = self.rollups.get_daily_buckets(SERIES, "2024-01")
+            profile = self.rollups.get_weekday_hour_buckets(SERIES)
+
+        self.assertEqual(daily["2024-01-15"].summary()["count"], 5)
+        self.assertEqual(profile["0-10"].summary()["count"], 3)
+        self.assertEqual(profile["0-13"].summary()["count"], 1)
+
+    def test_merge_window_is_idempotent(self):
+        name, window = self.windows[0]
+        self.assertTrue(self.rollups.merge_window(SERIES, name, window))
+        self.assertFalse(self.rollups.merge_window(SERIES, name, window))
+
+        profile = self.rollups.get_weekday_hour_buckets(SERIES)
+        self.assertEqual(profile["0-10"].summary()["count"], 2)
+
+    def test_rebuild_matches_incremental(self):
+        for name, window in self.windows:
+            self.rollups.merge_window(SERIES, name, window)
+        self.rollups.refresh_derived(SERIES)
+        incremental = {
+            name: {
+                key: stats.to_dict()
+                for key, stats in self.rollups.get_buckets(name).items()
+            }
+            for name in self.container.blobs
+        }
+
+        stale = RollupStore.hourly_blob_name(SERIES, "2020-01-01")
+        self.container.blobs[stale] = (b"{}", "0")
+        self.assertEqual(self.rollups.rebuild(SERIES, self.windows), 3)
+
+        rebuilt = {
+            name: {
+                key: stats.to_dict()
+                for key, stats in self.rollups.get_buckets(name).items()
+            }
+            for name in self.container.blobs
+        }
+        self.assertEqual(rebuilt, incremental)
+
+
+class TestTrends(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(
+            os.environ,
+            {"STORAGE_BACKEND": "memory", "ROLLUP_TIMEZONE": "Europe/Zurich"},
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(clients.reset_clients)
+        clients.reset_clients()
+        self.repository = AzureBlobRepository()
+        self.addCleanup(self.repository.executor.shutdown)
+
+        self.repository.adapter.rollups.merge_windows(
+            SERIES,
+            [
+                (
+                    "occupancy_data/20240115_090000_SSD-7.json",
+                    make_window("2024-01-15T09:00:00", [10, 12, 20]),
+                ),
+                (
+                    "occupancy_data/20240115_100000_SSD-7.json",
+                    make_window("2024-01-15T10:00:00", [30]),
+                ),
+                (
+                    "occupancy_data/20240116_090000_SSD-7.json",
+                    make_window("2024-01-16T09:00:00", [5]),
+                ),
+            ],
+        )
+
+    def counts(self, trends):
+        return [(trend["bucket"], trend["count"]) for trend in trends]
+
+    def test_hourly_trends_are_clipped_to_the_range(self):
+        trends = self.repository.get_trends(
+            "SSD-7", "hourly", datetime(2024, 1, 15, 9, 30), datetime(2024, 1, 16, 9)
+        )
+        # Local hours (UTC+1); 10:00 local holds readings before 09:30 UTC
+        self.assertEqual(
+            self.counts(trends),
+            [("2024-01-15T10", 3), ("2024-01-15T11", 1), ("2024-01-16T10", 1)],
+        )
+        self.assertEqual(trends[0]["max"], 20)
+
+    def test_daily_trends_before_and_after_a_refresh(self):
+        start, end = datetime(2024, 1, 1), datetime(2024, 2, 29)
+        before = self.repository.get_trends("SSD-7", "daily", start, end)
+        self.repository.adapter.rollups.refresh_derived(SERIES)
+        after = self.repository.get_trends("SSD-7", "daily", start, end)
+
+        self.assertEqual(before, after)
+        self.assertEqual(self.counts(after), [("2024-01-15", 4), ("2024-01-16", 1)])
+
+    def test_weekday_hour_trends_ignore_the_range(self):
+        trends = self.repository.get_trends("SSD-7", "weekday_hour")
+        self.assertEqual(self.counts(trends), [("0-10", 3), ("0-11", 1), ("1-10", 1)])
+
+    def test_invalid_requests(self):
+        with self.assertRaises(ValueError):
+            self.repository.get_trends("SSD-7", "monthly")
+        with self.assertRaises(ValueError):
+            self.repository.get_trends("SSD-7", "daily")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -19,11 +19,19 @@ class TestParser(unittest.TestCase):
         self.parser = Parser()
 
     def test_parse_html(self):
-        html = "<html><body><h1>Test</h1></body></html>"
+        html = "<html><body><table><tr><td>Anzahl G&auml;ste:</td>\n<td><b>123</b></td></tr></table></body></html>"
         result = self.parser.parse_html(html)
-        self.assertIn(
-            "Test", result
-        )  # Check if the parsed result contains the expected text
+        self.assertEqual(result["occupancy"], 123)
+        self.assertIn("timestamp", result)
+
+    def test_parse_html_falls_back_to_dom(self):
+        html = "<p><span>Anzahl</span> <span>G&auml;ste</span>: <em>42</em></p>"
+        self.assertIsNone(self.parser.parse_fast(html))
+        self.assertEqual(self.parser.parse_html(html)["occupancy"], 42)
+
+    def test_parse_html_without_field(self):
+        with self.assertRaises(ValueError):
+            self.parser.parse_html("<html><body><h1>Test</h1></body></html>")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,71 @@
+import json
+import unittest
+from datetime import datetime, timedelta
+from azure_storage.segments import decode_segment, encode_segment, is_segment
+
+
+def make_window(start, values):
+    return {
+        "window": {
+            "start": f"2024-01-15T{start}:00",
+            "end": f"2024-01-15T{start}:59",
+            "duration_seconds": 300,
+        },
+        "target_uid": "SSD-7",
+        "updates": [
+            {
+                "occupancy": value,
+                "timestamp": (
+                    datetime.fromisoformat(f"2024-01-15T{start}")
+                    + timedelta(seconds=4 * i, microseconds=1357 * i)
+                ).isoformat(),
+            }
+            for i, value in enumerate(values)
+        ],
+        "statistics": {"count": len(values), "min": min(values), "max": max(values)},
+    }
+
+
+class TestSegments(unittest.TestCase):
+    def test_round_trip(self):
+        windows = [
+            (
+                "occupancy_data/20240115_100000_SSD-7.json",
+                make_window("10:00", [5, 5, 6]),
+            ),
+            ("occupancy_data/20240115_100500_SSD-7.json", make_window("10:05", [7, 3])),
+        ]
+        raw = encode_segment("occupancy_data/SSD-7", "2024-01-15", windows, 1234)
+        segment = decode_segment(raw)
+
+        self.assertEqual(segment["series"], "occupancy_data/SSD-7")
+        self.assertEqual(segment["date"], "2024-01-15")
+        self.assertEqual(segment["source_bytes"], 1234)
+        self.assertEqual(segment["blob_names"], [name for name, _ in windows])
+        self.assertEqual(segment["windows"], [document for _, document in windows])
+
+    def test_smaller_than_json(self):
+        windows = [
+            (
+                f"occupancy_data/20240115_{hour:02d}0000_SSD-7.json",
+                make_window(f"{hour:02d}:00", [40 + i % 3 for i in range(14)]),
+            )
+            for hour in range(24)
+        ]
+        raw = encode_segment("occupancy_data/SSD-7", "2024-01-15", windows)
+        source = sum(len(json.dumps(document)) for _, document in windows)
+        self.assertLess(len(raw), source / 2)
+
+    def test_rejects_lossy_updates(self):
+        window = make_window("10:00", [5])
+        window["updates"][0]["occupancy"] = 5.5
+        with self.assertRaises(ValueError):
+            encode_segment("occupancy_data/SSD-7", "2024-01-15", [("a", window)])
+
+    def test_is_segment(self):
+        self.assertTrue(is_segment("segments/occupancy_data/SSD-7/2024-01-15.seg"))
+        self.assertFalse(is_segment("occupancy_data/20240115_100000_SSD-7.json"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import statistics
+import unittest
+from datetime import datetime, timedelta
+from utils.statistics import QuantileSketch, StreamingStats, SummaryStats
+
+
+class TestSummaryStats(unittest.TestCase):
+    def test_quantiles(self):
+        sketch = QuantileSketch()
+        for value in range(1, 101):
+            sketch.add(value)
+        self.assertEqual(sketch.quantile(0.5), 50)
+        self.assertEqual(sketch.quantile(0.9), 90)
+        self.assertEqual(sketch.quantile(0.99), 99)
+        self.assertIsNone(QuantileSketch().quantile(0.5))
+
+    def test_merge_matches_single_pass(self):
+        merged = SummaryStats.of([3, 9, 4])
+        merged.merge(SummaryStats.from_dict(SummaryStats.of([1, 7]).to_dict()))
+        self.assertEqual(merged.summary(), SummaryStats.of([3, 9, 4, 1, 7]).summary())
+        self.assertEqual(merged.summary()["min"], 1)
+        self.assertEqual(merged.summary()["max"], 9)
+
+
+class TestStreamingStats(unittest.TestCase):
+    def setUp(self):
+        self.start = datetime(2024, 1, 15, 10, 0)
+        self.values = [40, 42, 45, 41, 39, 50, 52, 48]
+
+    def stream(self, values, offset=0):
+        stats = StreamingStats()
+        for i, value in enumerate(values):
+            stats.add(value, self.start + timedelta(seconds=4 * (offset + i)))
+        return stats
+
+    def test_moments(self):
+        summary = self.stream(self.values).summary()
+        self.assertEqual(summary["count"], 8)
+        self.assertAlmostEqual(summary["avg"], statistics.mean(self.values))
+        self.assertAlmostEqual(summary["variance"], statistics.pvariance(self.values))
+        self.assertEqual(summary["median"], 42)
+
+    def test_time_weighted_average(self):
+        stats = StreamingStats()
+        stats.add(10, self.start)
+        stats.add(40, self.start + timedelta(seconds=30))
+        stats.close(self.start + timedelta(seconds=40))
+        # 10 for 30 s, 40 for 10 s
+        self.assertAlmostEqual(stats.summary()["time_weighted_avg"], 17.5)
+
+    def test_merge_matches_single_stream(self):
+        single = self.stream(self.values)
+        single.close(self.start + timedelta(seconds=32))
+
+        first = self.stream(self.values[:5])
+        first.close(self.start + timedelta(seconds=20))
+        second = self.stream(self.values[5:], offset=5)
+        second.close(self.start + timedelta(seconds=32))
+        first.merge(StreamingStats.from_dict(second.to_dict()))
+
+        for key, value in single.summary().items():
+            self.assertAlmostEqual(first.summary()[key], value, msg=key)
+
+
+if __name__ == "__main__":
+    unittest.main()
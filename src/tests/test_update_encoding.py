@@ -0,0 +1,59 @@
+import json
+import unittest
+from datetime import datetime, timedelta
+from azure_storage.update_encoding import (
+    decode_updates,
+    decode_window,
+    encode_updates,
+    encode_window,
+)
+
+
+def make_updates(values, start="2024-01-15T10:00:59"):
+    begin = datetime.fromisoformat(start)
+    return [
+        {
+            "occupancy": value,
+            "timestamp": (
+                begin + timedelta(seconds=4 * i, microseconds=250_000 * (i % 5))
+            ).isoformat(),
+        }
+        for i, value in enumerate(values)
+    ]
+
+
+class TestUpdateEncoding(unittest.TestCase):
+    def test_round_trip(self):
+        updates = make_updates([5, 5, 5, 6, 6, 5, 7])
+        encoded = encode_updates(updates)
+        self.assertEqual(encoded["runs"], [[5, 3], [6, 2], [5, 1], [7, 1]])
+        self.assertEqual(len(encoded["deltas"]), len(updates) - 1)
+        self.assertEqual(decode_updates(json.loads(json.dumps(encoded))), updates)
+
+    def test_round_trip_across_midnight(self):
+        updates = make_updates([1, 2, 2], start="2024-01-15T23:59:58.000001")
+        self.assertEqual(decode_updates(encode_updates(updates)), updates)
+
+    def test_lossy_updates_stay_plain(self):
+        for updates in (
+            [],
+            [{"occupancy": 5.5, "timestamp": "2024-01-15T10:00:00"}],
+            [{"occupancy": 5, "timestamp": "2024-01-15 10:00:00"}],
+            [{"occupancy": 5, "timestamp": "2024-01-15T10:00:00", "x": 1}],
+        ):
+            self.assertIs(encode_updates(updates), updates)
+            self.assertIs(decode_updates(updates), updates)
+
+    def test_decode_window(self):
+        window = {"target_uid": "SSD-7", "updates": make_updates([3, 3, 4])}
+        self.assertEqual(decode_window(encode_window(window)), window)
+        self.assertIs(decode_window(window), window)
+        self.assertEqual(decode_window([1, 2]), [1, 2])
+
+    def test_unknown_encoding(self):
+        with self.assertRaises(ValueError):
+            decode_updates({"encoding": "other"})
+
+
+if __name__ == "__main__":
+    unittest.main()
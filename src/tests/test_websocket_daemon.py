@@ -0,0 +1,183 @@
+import asyncio
+import json
+import os
+import sys
+import unittest
+import websockets
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "functions"))
+
+from websocket_listener.websocket_handler import WebSocketListener, parse_target_uids
+
+
+class StandInServer:
+    """Local stand-in for the CrowdMonitor API that drops every connection."""
+
+    def __init__(self, messages_per_connection=8, interval=0.05):
+        self.messages_per_connection = messages_per_connection
+        self.interval = interval
+        self.connections = 0
+        self.sent = 0
+
+    async def handler(self, websocket, path=None):
+        self.connections += 1
+        self.command = await websocket.recv()
+        for _ in range(self.messages_per_connection):
+            self.sent += 1
+            await websocket.send(
+                json.dumps(
+                    [
+                        {"uid": "SSD-1", "currentfill": "7"},
+                        {"uid": "SSD-4", "currentfill": None},
+                        {"uid": "SSD-7", "currentfill": str(self.sent)},
+                    ]
+                )
+            )
+            await asyncio.sleep(self.interval)
+        # Simulate the server going away mid-window
+        await websocket.close()
+
+
+class TestRunForever(unittest.TestCase):
+    def test_reconnects_and_cuts_aligned_windows(self):
+        server = StandInServer()
+        windows = []
+        others = []
+
+        async def on_window(uid, window_start, window_end, updates, stats):
+            if uid == "SSD-7":
+                windows.append((window_start, window_end, updates, stats.summary()))
+            else:
+                others.append((uid, updates))
+
+        async def scenario():
+            async with websockets.serve(server.handler, "127.0.0.1", 0) as ws:
+                port = ws.sockets[0].getsockname()[1]
+                listener = WebSocketListener(
+                    url=f"ws://127.0.0.1:{port}",
+                    target_uid="all",
+                    duration_seconds=1,
+                    timeout_per_message=0.1,
+                )
+                stop = asyncio.Event()
+                task = asyncio.create_task(
+                    listener.run_forever(
+                        on_window, stop, initial_backoff=0.05, max_backoff=0.1
+                    )
+                )
+                await asyncio.sleep(2.5)
+                stop.set()
+                await asyncio.wait_for(task, timeout=5)
+
+        asyncio.run(scenario())
+
+        self.assertEqual(server.command, "all")
+        self.assertGreaterEqual(server.connections, 3)
+        self.assertGreaterEqual(len(windows), 2)
+        self.assertEqual({uid for uid, _ in others}, {"SSD-1"})
+        self.assertEqual(
+            sum(len(updates) for _, updates in others),
+            sum(len(updates) for _, _, updates, _ in windows),
+        )
+
+        received = [u["occupancy"] for _, _, updates, _ in windows for u in updates]
+        self.assertEqual(received, sorted(received))
+        self.assertGreaterEqual(len(received), server.sent - 1)
+
+        for window_start, window_end, updates, summary in windows[:-1]:
+            self.assertEqual(window_start.microsecond, 0)
+            self.assertEqual((window_end - window_start).total_seconds(), 1)
+            self.assertEqual(summary["count"], len(updates))
+            for update in updates:
+                self.assertTrue(
+                    window_start.isoformat()
+                    <= update["timestamp"]
+                    < window_end.isoformat()
+                )
+
+
+class TestCollectUpdates(unittest.TestCase):
+    def test_collects_one_aligned_window(self):
+        server = StandInServer(messages_per_connection=40, interval=0.05)
+
+        async def scenario():
+            async with websockets.serve(server.handler, "127.0.0.1", 0) as ws:
+                port = ws.sockets[0].getsockname()[1]
+                listener = WebSocketListener(
+                    url=f"ws://127.0.0.1:{port}",
+                    target_uid="SSD-7",
+                    duration_seconds=1,
+                    timeout_per_message=0.1,
+                )
+                updates = await listener.collect_updates()
+                return listener, updates
+
+        listener, updates = asyncio.run(scenario())
+
+        # Same bounds (and so the same blob name) as a run_forever window
+        self.assertEqual(listener.window_start, listener._align(listener.window_start))
+        self.assertEqual(
+            (listener.window_end - listener.window_start).total_seconds(), 1
+        )
+        self.assertTrue(updates["SSD-7"])
+        for update in updates["SSD-7"]:
+            self.assertTrue(
+                listener.window_start.isoformat()
+                <= update["timestamp"]
+                < listener.window_end.isoformat()
+            )
+
+
+class TestParseMessage(unittest.TestCase):
+    frame = json.dumps(
+        [
+            {"uid": "SSD-1", "currentfill": "12"},
+            {"uid": "SSD-4", "currentfill": None},
+            {"uid": "SSD-7", "currentfill": 45.0},
+            {"uid": "SSD-9", "currentfill": "3"},
+        ]
+    )
+
+    def parse(self, target_uid):
+        return WebSocketListener("ws://unused", target_uid)._parse_message(self.frame)
+
+    def test_target_uids(self):
+        self.assertEqual(parse_target_uids("SSD-7"), {"SSD-7"})
+        self.assertEqual(parse_target_uids(" SSD-7, SSD-1 "), {"SSD-7", "SSD-1"})
+        self.assertIsNone(parse_target_uids("all"))
+        with self.assertRaises(ValueError):
+            parse_target_uids(" , ")
+
+    def test_selected_uids(self):
+        updates = self.parse("SSD-7,SSD-1")
+        self.assertEqual(sorted(updates), ["SSD-1", "SSD-7"])
+        self.assertEqual(updates["SSD-7"]["occupancy"], 45)
+        self.assertEqual(updates["SSD-1"]["timestamp"], updates["SSD-7"]["timestamp"])
+
+    def test_all_uids(self):
+        self.assertEqual(sorted(self.parse("all")), ["SSD-1", "SSD-7", "SSD-9"])
+
+    def test_repeated_frame_reuses_values(self):
+        listener = WebSocketListener("ws://unused", "all")
+        first = listener._parse_message(self.frame)
+        second = listener._parse_message(self.frame)
+        self.assertEqual(listener.repeated_frames, 1)
+        self.assertEqual(
+            {uid: u["occupancy"] for uid, u in first.items()},
+            {uid: u["occupancy"] for uid, u in second.items()},
+        )
+        self.assertIsNot(second["SSD-7"], first["SSD-7"])
+
+        changed = self.frame.replace('"12"', '"13"')
+        self.assertEqual(listener._parse_message(changed)["SSD-1"]["occupancy"], 13)
+        self.assertEqual(listener.repeated_frames, 1)
+
+    def test_invalid_frames(self):
+        listener = WebSocketListener("ws://unused", "SSD-7")
+        self.assertEqual(listener._parse_message("not json"), {})
+        self.assertEqual(listener._parse_message('{"uid": "SSD-7"}'), {})
+        self.assertEqual(self.parse("SSD-2"), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
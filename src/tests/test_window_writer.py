@@ -0,0 +1,102 @@
+import asyncio
+import json
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "functions"))
+
+from utils.statistics import StreamingStats
+from websocket_listener.window_writer import WindowWriter
+
+
+class FakeAsyncBlobClient:
+    def __init__(self, container, name):
+        self.container = container
+        self.name = name
+
+    async def upload_blob(self, data, overwrite=False):
+        # Yield to the loop like a real network call would
+        await asyncio.sleep(0.01)
+        self.container.get_blob_client(self.name).upload_blob(data, overwrite)
+
+
+class FakeAsyncContainerClient:
+    def __init__(self, container):
+        self.container = container
+
+    def get_blob_client(self, name):
+        return FakeAsyncBlobClient(self.container, name)
+
+
+@pytest.mark.usefixtures("fake_container")
+class TestWindowWriter(unittest.TestCase):
+    def setUp(self):
+        self.start = datetime(2024, 1, 15, 10, 0)
+        self.updates = [
+            {
+                "occupancy": 40 + i % 2,
+                "timestamp": (self.start + timedelta(seconds=4 * i)).isoformat(),
+            }
+            for i in range(10)
+        ]
+        self.stats = StreamingStats()
+        for update in self.updates:
+            self.stats.add(
+                update["occupancy"], datetime.fromisoformat(update["timestamp"])
+            )
+        self.stats.close(self.start + timedelta(minutes=5))
+
+    def test_save_async_overlaps_uploads(self):
+        async def scenario():
+            client = FakeAsyncContainerClient(self.container)
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.001)
+
+            task = asyncio.create_task(ticker())
+            names = await asyncio.gather(
+                *(
+                    WindowWriter(self.container, uid).save_async(
+                        client,
+                        self.start,
+                        self.start + timedelta(minutes=5),
+                        self.updates,
+                        self.stats,
+                    )
+                    for uid in ("SSD-7", "SSD-1")
+                )
+            )
+            task.cancel()
+            return names, ticks
+
+        names, ticks = asyncio.run(scenario())
+        self.assertEqual(
+            names,
+            [
+                "occupancy_data/20240115_100000_SSD-7.json",
+                "occupancy_data/20240115_100000_SSD-1.json",
+            ],
+        )
+        # The loop kept running while the uploads were in flight
+        self.assertGreater(ticks, 1)
+
+        for name in names:
+            stored = json.loads(self.container.blobs[name][0])
+            self.assertEqual(stored["updates"]["encoding"], "delta-rle/1")
+            self.assertEqual(stored["statistics"]["count"], 10)
+        self.assertIn("_index/occupancy_data/SSD-7/latest.json", self.container.blobs)
+        self.assertIn(
+            "_rollups/occupancy_data/SSD-1/hourly/2024-01-15.json",
+            self.container.blobs,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,310 @@
+"""Mergeable summary statistics for occupancy readings."""
+
+import math
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch backed by a sparse histogram of integer values.
+
+    Occupancy readings are small non-negative integers, so counting each
+    distinct value is exact and stays tiny (a few hundred keys at most).
+    Non-integer values are rounded to the nearest integer. Two sketches
+    merge by adding their counts, which makes them safe to combine across
+    windows, hours and days.
+    """
+
+    def __init__(self, counts: Optional[Dict[int, int]] = None):
+        """
+        Initialize the sketch.
+
+        Args:
+            counts: Optional mapping of value -> number of occurrences
+        """
+        self.counts: Dict[int, int] = dict(counts or {})
+        self.total = sum(self.counts.values())
+
+    def add(self, value, weight: int = 1) -> None:
+        """
+        Add a value to the sketch.
+
+        Args:
+            value: Observed value
+            weight: Number of occurrences
+        """
+        key = int(round(value))
+        self.counts[key] = self.counts.get(key, 0) + weight
+        self.total += weight
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """
+        Merge another sketch into this one.
+
+        Args:
+            other: Sketch to merge
+        """
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.total += other.total
+
+    def quantile(self, q: float) -> Optional[int]:
+        """
+        Return the q-quantile (nearest-rank) of the added values.
+
+        Args:
+            q: Quantile between 0 and 1
+
+        Returns:
+            Value at the quantile, or None if the sketch is empty
+        """
+        if self.total == 0:
+            return None
+
+        rank = max(1, math.ceil(q * self.total))
+        seen = 0
+        for key in sorted(self.counts):
+            seen += self.counts[key]
+            if seen >= rank:
+                return key
+        return max(self.counts)
+
+    def to_dict(self) -> Dict[str, int]:
+        """Serialize the sketch as a JSON-compatible dictionary."""
+        return {str(key): count for key, count in sorted(self.counts.items())}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, int]) -> "QuantileSketch":
+        """Deserialize a sketch created by to_dict()."""
+        return cls({int(key): count for key, count in data.items()})
+
+
+class SummaryStats:
+    """Count, sum, min, max and quantile sketch of a set of readings."""
+
+    def __init__(self):
+        """Initialize empty statistics."""
+        self.count = 0
+        self.total = 0
+        self.minimum = None
+        self.maximum = None
+        self.sketch = QuantileSketch()
+
+    @classmethod
+    def of(cls, values: Iterable) -> "SummaryStats":
+        """
+        Build statistics from a sequence of values.
+
+        Args:
+            values: Readings to summarize
+
+        Returns:
+            SummaryStats of the readings
+        """
+        stats = cls()
+        for value in values:
+            stats.add(value)
+        return stats
+
+    def add(self, value) -> None:
+        """
+        Add a single reading.
+
+        Args:
+            value: Observed value
+        """
+        self.count += 1
+        self.total += value
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+        self.sketch.add(value)
+
+    def merge(self, other: "SummaryStats") -> None:
+        """
+        Merge another set of statistics into this one.
+
+        Args:
+            other: Statistics to merge
+        """
+        if other.count == 0:
+            return
+
+        self.count += other.count
+        self.total += other.total
+        if self.minimum is None or other.minimum < self.minimum:
+            self.minimum = other.minimum
+        if self.maximum is None or other.maximum > self.maximum:
+            self.maximum = other.maximum
+        self.sketch.merge(other.sketch)
+
+    def summary(self) -> dict:
+        """
+        Return the derived statistics.
+
+        Returns:
+            Dictionary with count, min, max, avg, p50, p90 and p99
+        """
+        return {
+            "count": self.count,
+            "min": self.minimum,
+            "max": self.maximum,
+            "avg": self.total / self.count if self.count else None,
+            "p50": self.sketch.quantile(0.5),
+            "p90": self.sketch.quantile(0.9),
+            "p99": self.sketch.quantile(0.99),
+        }
+
+    def to_dict(self) -> dict:
+        """Serialize the mergeable state as a JSON-compatible dictionary."""
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "min": self.minimum,
+            "max": self.maximum,
+            "sketch": self.sketch.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SummaryStats":
+        """Deserialize statistics created by to_dict()."""
+        stats = cls()
+        stats.count = data["count"]
+        stats.total = data["sum"]
+        stats.minimum = data["min"]
+        stats.maximum = data["max"]
+        stats.sketch = QuantileSketch.from_dict(data["sketch"])
+        return stats
+
+
+class StreamingStats(SummaryStats):
+    """
+    Online statistics of a stream of timestamped readings.
+
+    On top of SummaryStats this keeps a running mean and variance (Welford)
+    and a time-weighted average, where each reading counts for as long as
+    it stayed current. Everything is updated per reading, so the summary is
+    available as soon as the stream ends, and two accumulators of closed
+    windows merge exactly.
+    """
+
+    def __init__(self):
+        """Initialize empty statistics."""
+        super().__init__()
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.weighted_total = 0.0
+        self.weighted_seconds = 0.0
+        self.last_time = None
+        self.last_value = None
+
+    def add(self, value, timestamp: Optional[datetime] = None) -> None:
+        """
+        Add a single reading.
+
+        Args:
+            value: Observed value
+            timestamp: Time of the reading; readings without one do not
+                       contribute to the time-weighted average
+        """
+        super().add(value)
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+        if timestamp is not None:
+            self._hold_until(timestamp)
+            self.last_value = value
+
+    def close(self, end: datetime) -> None:
+        """
+        Account for the last reading up to the end of the window.
+
+        Args:
+            end: Time the window closed
+        """
+        self._hold_until(end)
+
+    def _hold_until(self, timestamp: datetime) -> None:
+        """Weight the current reading by the time until the given instant."""
+        if self.last_time is not None and self.last_value is not None:
+            seconds = (timestamp - self.last_time).total_seconds()
+            if seconds > 0:
+                self.weighted_total += self.last_value * seconds
+                self.weighted_seconds += seconds
+        if self.last_time is None or timestamp > self.last_time:
+            self.last_time = timestamp
+
+    @property
+    def variance(self) -> Optional[float]:
+        """Population variance of the readings, or None if empty."""
+        return self.m2 / self.count if self.count else None
+
+    @property
+    def time_weighted_average(self) -> Optional[float]:
+        """Average weighted by how long each reading was current."""
+        if self.weighted_seconds == 0:
+            return self.mean if self.count else None
+        return self.weighted_total / self.weighted_seconds
+
+    def merge(self, other: "StreamingStats") -> None:
+        """
+        Merge the statistics of another (closed) window into this one.
+
+        Args:
+            other: Statistics to merge
+        """
+        if other.count == 0:
+            return
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.weighted_total += other.weighted_total
+        self.weighted_seconds += other.weighted_seconds
+        if other.last_time is not None and (
+            self.last_time is None or other.last_time > self.last_time
+        ):
+            self.last_time = other.last_time
+            self.last_value = other.last_value
+        super().merge(other)
+
+    def summary(self) -> dict:
+        """
+        Return the derived statistics.
+
+        Returns:
+            Dictionary with count, min, max, avg, median, variance, stddev,
+            time_weighted_avg, p50, p90 and p99
+        """
+        variance = self.variance
+        return {
+            **super().summary(),
+            "median": self.sketch.quantile(0.5),
+            "variance": variance,
+            "stddev": math.sqrt(variance) if variance is not None else None,
+            "time_weighted_avg": self.time_weighted_average,
+        }
+
+    def to_dict(self) -> dict:
+        """Serialize the mergeable state as a JSON-compatible dictionary."""
+        return {
+            **super().to_dict(),
+            "mean": self.mean,
+            "m2": self.m2,
+            "weighted_sum": self.weighted_total,
+            "weighted_seconds": self.weighted_seconds,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "StreamingStats":
+        """Deserialize statistics created by to_dict()."""
+        stats = super().from_dict(data)
+        stats.mean = data["mean"]
+        stats.m2 = data["m2"]
+        stats.weighted_total = data["weighted_sum"]
+        stats.weighted_seconds = data["weighted_seconds"]
+        return stats
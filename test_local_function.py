@@ -49,7 +49,7 @@ async def test_function():
             duration_seconds=30  # Test with 30 seconds
         )
         
-        updates = await listener.collect_updates()
+        updates = (await listener.collect_updates()).get(target_uid, [])
         
         elapsed = time.time() - start_time
         logger.info("")